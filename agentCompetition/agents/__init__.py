@@ -1 +1,9 @@
-from .strategies import BasicAgent, ProAgent, AggressiveAgent, Mag7Agent
+# Agent classes pull in numpy/pandas; resolve them on first use so that importing a
+# light submodule (e.g. agents.instrumentation) does not pay for the whole package
+AGENT_CLASSES = ('BasicAgent', 'ProAgent', 'AggressiveAgent', 'Mag7Agent')
+
+def __getattr__(name):
+    if name in AGENT_CLASSES:
+        from . import strategies
+        return getattr(strategies, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
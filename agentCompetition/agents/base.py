@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 
 class BaseAgent(ABC):
+    # True if the agent implements decide_vectorized(snapshot)
+    vectorized = False
+
     def __init__(self, name, config):
         self.name = name
         self.cash = config.get('cash', 10000)
@@ -61,3 +65,23 @@ class BaseAgent(ABC):
         Returns: list of orders [{'symbol': 'AAPL', 'action': 'BUY', 'shares': 10}, ...]
         """
         pass
+
+    def decide_vectorized(self, snapshot):
+        """
+        Optional array-based equivalent of decide() over a MarketSnapshot.
+        Must return the same orders, in the same order, as decide() on the same data.
+        """
+        raise NotImplementedError
+
+    def _orders(self, snapshot, buy, buy_shares, sell):
+        """
+        Turns buy/sell masks into the order list decide() would build (universe order).
+        """
+        orders = []
+        for i in np.flatnonzero(buy | sell):
+            symbol = snapshot.symbols[i]
+            if buy[i]:
+                orders.append({'symbol': symbol, 'action': 'BUY', 'shares': int(buy_shares[i])})
+            else:
+                orders.append({'symbol': symbol, 'action': 'SELL', 'shares': self.holdings[symbol]})
+        return orders
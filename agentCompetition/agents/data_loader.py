@@ -1,11 +1,12 @@
-import yfinance as yf
-from GoogleNews import GoogleNews
 import pandas as pd
 from datetime import datetime, timedelta
 import time
 import random
 from io import StringIO
 import requests
+from .data_cache import OHLCVCache
+
+_caches = {} # {interval: OHLCVCache}
 
 def get_sp500_tickers():
     """
@@ -41,6 +42,7 @@ def select_top_momentum_stocks(tickers, reference_date, top_n=10):
         # Bulk download is faster
         # yfinance expects space-separated string
         tickers_str = " ".join(tickers)
+        import yfinance as yf # Heavy; only the momentum scan needs it
         data = yf.download(tickers_str, start=start_date, end=end_date, progress=True)['Close']
         
         # Calculate Return: (End Price - Start Price) / Start Price
@@ -68,35 +70,69 @@ def select_top_momentum_stocks(tickers, reference_date, top_n=10):
         print(f"Error in momentum selection: {e}")
         return tickers[:top_n] # Fallback
 
-def fetch_stock_data(symbol, start_date, end_date):
+def fetch_stock_data(symbol, start_date, end_date, use_cache=True, interval='1d'):
     """
     Fetches historical stock data using direct Yahoo Finance API call.
     More robust for Vercel/Serverless environments.
+    interval: bar size, '1d' by default or an intraday size such as '5m'.
+    Bars already in the local cache are reused; only missing date ranges are downloaded.
     """
-    print(f"Fetching stock data for {symbol} from {start_date} to {end_date}...")
     try:
-        start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
-        end_ts = int(datetime.strptime(end_date, '%Y-%m-%d').timestamp())
-        
-        url = f"https://query1.finance.yahoo.com/v7/finance/download/{symbol}?period1={start_ts}&period2={end_ts}&interval=1d&events=history&includeAdjustedClose=true"
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        df = pd.read_csv(StringIO(response.text))
-        df['Date'] = pd.to_datetime(df['Date'])
-        df.set_index('Date', inplace=True)
-        return df
+        if not use_cache:
+            return _download_stock_data(symbol, start_date, end_date, interval=interval)
+        if interval not in _caches:
+            _caches[interval] = OHLCVCache(interval=interval)
+        return _caches[interval].get(symbol, start_date, end_date,
+                                     lambda s, start, end: _download_stock_data(s, start, end, interval=interval))
     except Exception as e:
         print(f"Error fetching {symbol}: {e}")
         return pd.DataFrame()
 
+YAHOO_DOWNLOAD_URL = "https://query1.finance.yahoo.com/v7/finance/download/{symbol}"
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+def _download_stock_data(symbol, start_date, end_date, session=None, base_url=YAHOO_DOWNLOAD_URL, timeout=10, interval='1d'):
+    print(f"Fetching {interval} stock data for {symbol} from {start_date} to {end_date}...")
+    start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
+    end_ts = int(datetime.strptime(end_date, '%Y-%m-%d').timestamp())
+    if interval != '1d':
+        return _download_intraday(symbol, start_ts, end_ts, interval, session, timeout)
+    
+    params = {'period1': start_ts, 'period2': end_ts, 'interval': '1d', 'events': 'history', 'includeAdjustedClose': 'true'}
+    response = (session or requests).get(base_url.format(symbol=symbol), params=params, headers=YAHOO_HEADERS, timeout=timeout)
+    response.raise_for_status()
+    
+    df = pd.read_csv(StringIO(response.text))
+    df['Date'] = pd.to_datetime(df['Date'])
+    df.set_index('Date', inplace=True)
+    return df
+
+def _download_intraday(symbol, start_ts, end_ts, interval, session=None, timeout=10):
+    """
+    Intraday bars come from the chart API (the CSV download endpoint only serves daily bars).
+    The index is in the exchange's timezone, like yfinance's.
+    """
+    params = {'period1': start_ts, 'period2': end_ts, 'interval': interval}
+    response = (session or requests).get(YAHOO_CHART_URL.format(symbol=symbol), params=params, headers=YAHOO_HEADERS, timeout=timeout)
+    response.raise_for_status()
+
+    result = response.json()['chart']['result'][0]
+    if not result.get('timestamp'):
+        return pd.DataFrame()
+    quote = result['indicators']['quote'][0]
+    index = pd.to_datetime(result['timestamp'], unit='s', utc=True).tz_convert(result['meta']['exchangeTimezoneName'])
+    df = pd.DataFrame({'Open': quote['open'], 'High': quote['high'], 'Low': quote['low'],
+                       'Close': quote['close'], 'Volume': quote['volume']}, index=index, dtype=float)
+    df.index.name = 'Date'
+    return df.dropna(subset=['Close'])
+
 def fetch_news(symbol, start_date, end_date):
     """
     Fetches news headlines for a given symbol within a date range.
     """
     print(f"Fetching news for {symbol}...")
+    from GoogleNews import GoogleNews # Heavy; only news lookups need it
     googlenews = GoogleNews()
     googlenews.set_lang('en')
     googlenews.set_encode('utf-8')
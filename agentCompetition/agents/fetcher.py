@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from .data_cache import OHLCVCache
+from .data_loader import YAHOO_DOWNLOAD_URL, _download_stock_data
+from .instrumentation import metrics
+from .ratelimit import TokenBucket
+
+# Statuses worth retrying; anything else (e.g. 404 for an unknown symbol) fails fast
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class SingleFlight:
+    """
+    Collapses identical in-flight calls: concurrent callers with the same key share one execution.
+    """
+    def __init__(self):
+        self.calls = {} # {key: Future}
+        self.lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+class MarketDataFetcher:
+    """
+    Concurrent fetch stage for the trade cycle.
+
+    Downloads run on a thread pool over one pooled keep-alive Session, are throttled
+    by a token bucket, retried with exponential backoff on transient failures, and
+    deduplicated while in flight. Bars already in the OHLCV cache are not re-downloaded.
+    """
+    def __init__(self, max_workers=16, rate=10, burst=None, retries=3, backoff=0.5,
+                 timeout=10, base_url=YAHOO_DOWNLOAD_URL, cache=None, use_cache=True, interval='1d'):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self.interval = interval
+        self.cache = cache or (OHLCVCache(interval=interval) if use_cache else None)
+        self.limiter = TokenBucket(rate, burst)
+        self.single_flight = SingleFlight()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+        metrics.inc(f'fetch_{key}_total')
+
+    def download(self, symbol, start_date, end_date):
+        """
+        One rate-limited, retried download. Raises the last error once retries are exhausted.
+        """
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            self._count('requests')
+            start = time.perf_counter()
+            try:
+                return _download_stock_data(symbol, start_date, end_date, session=self.session,
+                                            base_url=self.base_url, timeout=self.timeout, interval=self.interval)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    self._count('failures')
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self._count('failures')
+                    raise
+            finally:
+                metrics.observe('download_latency_seconds', time.perf_counter() - start)
+            self._count('retries')
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def fetch(self, symbol, start_date, end_date):
+        """
+        Cached, single-flight fetch of one symbol; its wall time (including cache hits,
+        rate-limit waits and retries) feeds the fetch_latency_seconds histogram.
+        """
+        def load():
+            if self.cache is None:
+                return self.download(symbol, start_date, end_date)
+            return self.cache.get(symbol, start_date, end_date, self.download)
+
+        start = time.perf_counter()
+        try:
+            return self.single_flight.do((symbol, start_date, end_date), load)
+        finally:
+            metrics.observe('fetch_latency_seconds', time.perf_counter() - start)
+
+    def fetch_many(self, symbols, start_date, end_date):
+        """
+        Fetches all symbols concurrently.
+        Returns ({symbol: df}, [error strings]), both in input order like the serial loop it replaces.
+        """
+        frames, failed = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch, symbol, start_date, end_date): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df = future.result()
+                    if df.empty:
+                        metrics.inc('fetch_errors_total', reason='empty')
+                        failed[symbol] = f"{symbol}: Empty DF"
+                    else:
+                        frames[symbol] = df
+                except Exception as e:
+                    metrics.inc('fetch_errors_total', reason=type(e).__name__)
+                    failed[symbol] = f"{symbol}: {str(e)}"
+
+        # Completion order varies run to run; report in input order like the serial loop
+        return {s: frames[s] for s in symbols if s in frames}, [failed[s] for s in symbols if s in failed]
@@ -0,0 +1,189 @@
+import bisect
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Seconds; covers per-symbol fetches up to whole trade cycles / backtests
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """
+    Minimal thread-safe registry of counters, gauges and histograms, rendered in the
+    Prometheus text format. Metrics are keyed by name plus keyword labels.
+    """
+    def __init__(self, prefix='stocksagent'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """
+        Times a pipeline stage into stage_duration_seconds{stage=...}.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe('stage_duration_seconds', elapsed, stage=stage, **labels)
+            self.set_gauge('stage_last_duration_seconds', elapsed, stage=stage, **labels)
+
+    def stage_totals(self):
+        """
+        {stage: (total seconds, calls)} summed over all other labels.
+        """
+        totals = {}
+        with self.lock:
+            for (name, labels), histogram in self.histograms.items():
+                if name != 'stage_duration_seconds':
+                    continue
+                stage = dict(labels)['stage']
+                seconds, calls = totals.get(stage, (0.0, 0))
+                totals[stage] = (seconds + histogram.sum, calls + histogram.count)
+        return totals
+
+    def print_summary(self):
+        totals = self.stage_totals()
+        grand_total = sum(seconds for seconds, _ in totals.values()) or 1.0
+        print("\n--- Stage Timings ---")
+        for stage, (seconds, calls) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            print(f"{stage:<20} {seconds:>9.2f}s {calls:>6} calls {100 * seconds / grand_total:>6.1f}%")
+        with self.lock:
+            counters = sorted(self.counters.items())
+        for (name, labels), value in counters:
+            label_text = ','.join(f'{k}={v}' for k, v in labels)
+            print(f"{name}{'{' + label_text + '}' if label_text else ''}: {value}")
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for kind, store in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in store}):
+                    full_name = f'{self.prefix}_{name}'
+                    lines.append(f'# TYPE {full_name} {kind}')
+                    for (metric, labels), value in sorted(store.items()):
+                        if metric == name:
+                            lines.append(f'{full_name}{_labels(labels)} {value}')
+
+            for name in sorted({name for name, _ in self.histograms}):
+                full_name = f'{self.prefix}_{name}'
+                lines.append(f'# TYPE {full_name} histogram')
+                for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{full_name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{full_name}_sum{_labels(labels)} {histogram.sum}')
+                    lines.append(f'{full_name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+# Process-wide default registry
+metrics = Metrics()
+
+class StackSampler:
+    """
+    Samples the target thread's Python stack at a fixed interval and accumulates
+    collapsed stacks ("a;b;c count"), the input format of flamegraph.pl and speedscope.
+    """
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+@contextmanager
+def profile(path_prefix, enabled=True):
+    """
+    Opt-in profiling of one block: writes <prefix>.prof (cProfile, for pstats/snakeviz)
+    and <prefix>.folded (collapsed stacks for a flame graph).
+    """
+    if not enabled:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(path_prefix)), exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(path_prefix + '.prof')
+        sampler.write(path_prefix + '.folded')
+        print(f"Profile saved to {path_prefix}.prof / {path_prefix}.folded")
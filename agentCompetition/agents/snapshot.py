@@ -0,0 +1,65 @@
+import numpy as np
+
+class MarketSnapshot:
+    """
+    Cross-sectional latest-bar view of the universe, built once per trade cycle.
+
+    Each field is a float64 array indexed by symbol position, so agents can score the
+    whole universe with array operations instead of extracting rows per symbol.
+    Missing values are NaN, except ATR which defaults to 0 like row.get('ATR', 0).
+    """
+    FIELDS = ('Close', 'SMA_20', 'SMA_50', 'RSI', 'ATR')
+    DEFAULTS = {'ATR': 0.0}
+
+    def __init__(self, symbols, fields):
+        self.symbols = list(symbols)
+        self.fields = fields # {name: ndarray}
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        rows: {symbol: mapping of column -> value} (e.g. a DataFrame row or StreamingIndicators.latest()).
+        """
+        symbols = list(rows.keys())
+        fields = {}
+        for name in cls.FIELDS:
+            default = cls.DEFAULTS.get(name, np.nan)
+            fields[name] = np.array([_get(row, name, default) for row in rows.values()], dtype=float)
+        return cls(symbols, fields)
+
+    @classmethod
+    def from_market_data(cls, market_data):
+        """
+        Builds the snapshot from {symbol: DataFrame}, reading each frame's last row once.
+        """
+        return cls.from_rows({symbol: df.iloc[-1] for symbol, df in market_data.items() if not df.empty})
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def mask(self, symbols):
+        """
+        Boolean array, True where the snapshot symbol is in `symbols`.
+        """
+        result = np.zeros(len(self.symbols), dtype=bool)
+        for symbol in symbols:
+            i = self.index.get(symbol)
+            if i is not None:
+                result[i] = True
+        return result
+
+    def take(self, mask):
+        """
+        Sub-snapshot of the symbols where mask is True (order preserved).
+        """
+        positions = np.flatnonzero(mask)
+        return MarketSnapshot([self.symbols[i] for i in positions],
+                              {name: values[positions] for name, values in self.fields.items()})
+
+def _get(row, name, default):
+    value = row.get(name, default)
+    return default if value is None else value
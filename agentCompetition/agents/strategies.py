@@ -1,12 +1,31 @@
 from .base import BaseAgent
+from .rules import Rule, ScoringRules
+from .stops import ratchet
+import numpy as np
 import pandas as pd
 
+def _trailing_stop_hits(agent, snapshot, held, multiplier):
+    """
+    Vector form of the per-symbol trailing stop: ratchets agent.trailing_stops for held
+    symbols and returns the mask of positions whose price fell below high - ATR * multiplier.
+    """
+    price = snapshot['Close']
+    positions = np.flatnonzero(held)
+    highest = np.full(len(snapshot), np.nan)
+    highest[positions] = [agent.trailing_stops.get(snapshot.symbols[i], price[i]) for i in positions]
+    highest, hits = ratchet(price, snapshot['ATR'], held, highest, multiplier)
+    for i in positions:
+        agent.trailing_stops[snapshot.symbols[i]] = highest[i]
+    return hits
+
 class BasicAgent(BaseAgent):
     """
     Simple SMA Crossover Strategy.
     Buy: SMA_20 > SMA_50
     Sell: SMA_20 < SMA_50
     """
+    vectorized = True
+
     def decide(self, market_data):
         orders = []
         for symbol, df in market_data.items():
@@ -32,10 +51,38 @@ class BasicAgent(BaseAgent):
                     orders.append({'symbol': symbol, 'action': 'SELL', 'shares': self.holdings[symbol]})
         return orders
 
+    def decide_vectorized(self, snapshot):
+        price, sma_20, sma_50 = snapshot['Close'], snapshot['SMA_20'], snapshot['SMA_50']
+        held = snapshot.mask(self.holdings)
+        valid = ~np.isnan(sma_20) & ~np.isnan(sma_50)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.trunc(1000 / price)
+        buy = valid & (sma_20 > sma_50) & ~held & (self.cash > price) & (shares > 0) & (self.cash >= shares * price)
+        sell = valid & (sma_20 < sma_50) & held
+        return self._orders(snapshot, buy, shares, sell)
+
+# Scoring rules shared by decide() (one row) and decide_vectorized() (a snapshot)
+PRO_RULES = ScoringRules([
+    Rule(2, ('SMA_20', '>', 'SMA_50')),
+    Rule(2, ('RSI', '<', 30)),
+    Rule(-2, ('RSI', '>', 70)),
+], buy_threshold=3, sell_threshold=0)
+
+AGGRESSIVE_RULES = ScoringRules([
+    Rule(2, ('SMA_20', '>', 'SMA_50')),
+    Rule(1, ('SMA_20', '>', 'SMA_50'), ('Close', '>', 'SMA_20')), # Strong Trend
+    Rule(1, ('RSI', '>', 50), ('RSI', '<', 70)), # Healthy Momentum
+    Rule(2, ('RSI', '<', 30)),
+    Rule(-2, ('RSI', '>', 70)),
+], buy_threshold=2, sell_threshold=0) # Threshold 2
+
 class ProAgent(BaseAgent):
     """
     Scored Strategy + ATR Trailing Stop (2.0).
     """
+    vectorized = True
+
     def __init__(self, name, config):
         super().__init__(name, config)
         self.trailing_stops = {} # {symbol: highest_price}
@@ -47,7 +94,6 @@ class ProAgent(BaseAgent):
             row = df.iloc[-1]
             price = row['Close']
             atr = row.get('ATR', 0)
-            score = 0
             
             # Update Trailing Stop
             if symbol in self.holdings:
@@ -62,27 +108,42 @@ class ProAgent(BaseAgent):
                     continue
 
             # Scoring
-            if row['SMA_20'] > row['SMA_50']: score += 2
-            if row['RSI'] < 30: score += 2
-            if row['RSI'] > 70: score -= 2
+            _, signal = PRO_RULES.score_latest(row)
             
             # Buy
-            if score >= 3 and symbol not in self.holdings:
+            if signal == 1 and symbol not in self.holdings:
                 shares = int(2000 / price) # 20% allocation
                 if shares > 0 and self.cash >= shares * price:
                     orders.append({'symbol': symbol, 'action': 'BUY', 'shares': shares})
                     self.trailing_stops[symbol] = price
             
             # Sell (Score based)
-            elif score <= 0 and symbol in self.holdings:
+            elif signal == -1 and symbol in self.holdings:
                  orders.append({'symbol': symbol, 'action': 'SELL', 'shares': self.holdings[symbol]})
                  
         return orders
 
+    def decide_vectorized(self, snapshot):
+        price = snapshot['Close']
+        held = snapshot.mask(self.holdings)
+        stopped = _trailing_stop_hits(self, snapshot, held, 2.0)
+
+        _, signal = PRO_RULES.score_latest(snapshot)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.trunc(2000 / price)
+        buy = (signal == 1) & ~held & (shares > 0) & (self.cash >= shares * price)
+        sell = stopped | ((signal == -1) & held)
+        for i in np.flatnonzero(buy):
+            self.trailing_stops[snapshot.symbols[i]] = price[i]
+        return self._orders(snapshot, buy, shares, sell)
+
 class AggressiveAgent(BaseAgent):
     """
     Compounding + ATR 4.0 + Threshold 2.
     """
+    vectorized = True
+
     def __init__(self, name, config):
         super().__init__(name, config)
         self.trailing_stops = {}
@@ -94,7 +155,6 @@ class AggressiveAgent(BaseAgent):
             row = df.iloc[-1]
             price = row['Close']
             atr = row.get('ATR', 0)
-            score = 0
             
             # Trailing Stop (ATR 4.0)
             if symbol in self.holdings:
@@ -109,14 +169,10 @@ class AggressiveAgent(BaseAgent):
                     continue
 
             # Scoring (Aggressive)
-            if row['SMA_20'] > row['SMA_50']: score += 2
-            if row['SMA_20'] > row['SMA_50'] and price > row['SMA_20']: score += 1 # Strong Trend
-            if row['RSI'] > 50 and row['RSI'] < 70: score += 1 # Healthy Momentum
-            if row['RSI'] < 30: score += 2
-            if row['RSI'] > 70: score -= 2
+            _, signal = AGGRESSIVE_RULES.score_latest(row)
             
             # Buy (Threshold 2)
-            if score >= 2 and symbol not in self.holdings:
+            if signal == 1 and symbol not in self.holdings:
                 # Compounding: 30% of AVAILABLE CASH
                 allocation = self.cash * 0.30
                 if allocation > 1000: # Min trade size
@@ -126,11 +182,28 @@ class AggressiveAgent(BaseAgent):
                         self.trailing_stops[symbol] = price
             
             # Sell
-            elif score <= 0 and symbol in self.holdings:
+            elif signal == -1 and symbol in self.holdings:
                  orders.append({'symbol': symbol, 'action': 'SELL', 'shares': self.holdings[symbol]})
 
         return orders
 
+    def decide_vectorized(self, snapshot):
+        price = snapshot['Close']
+        held = snapshot.mask(self.holdings)
+        stopped = _trailing_stop_hits(self, snapshot, held, 4.0)
+
+        _, signal = AGGRESSIVE_RULES.score_latest(snapshot)
+
+        # Compounding: 30% of AVAILABLE CASH, same allocation for every buy this cycle
+        allocation = self.cash * 0.30
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.trunc(allocation / price)
+        buy = (signal == 1) & ~held & (allocation > 1000) & (shares > 0)
+        sell = stopped | ((signal == -1) & held)
+        for i in np.flatnonzero(buy):
+            self.trailing_stops[snapshot.symbols[i]] = price[i]
+        return self._orders(snapshot, buy, shares, sell)
+
 class Mag7Agent(AggressiveAgent):
     """
     Same as Aggressive, but only trades Mag 7 stocks.
@@ -141,3 +214,6 @@ class Mag7Agent(AggressiveAgent):
         # Filter market data for Mag 7 only
         filtered_data = {k: v for k, v in market_data.items() if k in self.MAG7}
         return super().decide(filtered_data)
+
+    def decide_vectorized(self, snapshot):
+        return super().decide_vectorized(snapshot.take(snapshot.mask(self.MAG7)))
@@ -0,0 +1,180 @@
+import math
+from collections import deque
+import pandas as pd
+
+NAN = float('nan')
+
+class StreamingIndicators:
+    """
+    Incremental, per-symbol version of add_technical_indicators.
+
+    Seed it once from history, then feed it one bar (or one intraday tick) at a time.
+    Each update touches only fixed-size windows and a handful of recurrences, so its cost
+    does not depend on how much history has been seen. Values follow the `ta` library
+    definitions and match its output to floating point precision once warmed up.
+
+    A bar with the same timestamp as the last one revises that bar (intraday ticks)
+    instead of appending a new one.
+    """
+    COLUMNS = ('SMA_20', 'SMA_50', 'RSI', 'MACD', 'MACD_Signal', 'BB_High', 'BB_Low', 'Stoch_K', 'Stoch_D', 'ATR')
+    PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+    RSI_WINDOW = 14
+    MACD_FAST, MACD_SLOW, MACD_SIGN = 12, 26, 9
+    BB_WINDOW, BB_DEV = 20, 2
+    STOCH_WINDOW, STOCH_SMOOTH = 14, 3
+    ATR_WINDOW = 14
+
+    def __init__(self, keep=2):
+        self.last_timestamp = None
+        self._closes = deque(maxlen=50)
+        self._highs = deque(maxlen=self.STOCH_WINDOW)
+        self._lows = deque(maxlen=self.STOCH_WINDOW)
+        self._true_ranges = deque(maxlen=self.ATR_WINDOW)
+        self._stoch_k = deque(maxlen=self.STOCH_SMOOTH)
+        self._state = {'n': 0, 'close': None, 'ema_up': 0.0, 'ema_down': 0.0,
+                       'ema_fast': 0.0, 'ema_slow': 0.0, 'macd_signal': 0.0, 'atr': 0.0}
+        self._prior = self._state # State before the last bar, restored when that bar is revised
+        self._rows = deque(maxlen=keep) # [(timestamp, row dict)] for to_frame()
+
+    def extend(self, df):
+        """
+        Feeds every bar of df at or after the last seen timestamp. Seeds on first use.
+        """
+        if df.empty:
+            return
+        if self.last_timestamp is not None:
+            df = df.iloc[df.index.searchsorted(self.last_timestamp):]
+        columns = [c for c in self.PRICE_COLUMNS if c in df.columns]
+        for timestamp, values in zip(df.index, df[columns].itertuples(index=False, name=None)):
+            self.update(timestamp, **dict(zip(columns, values)))
+
+    def update(self, timestamp, Open=NAN, High=NAN, Low=NAN, Close=NAN, Volume=NAN):
+        """
+        Applies one bar and returns its row (prices + indicator columns).
+        """
+        revise = self.last_timestamp is not None and timestamp == self.last_timestamp
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Bar at {timestamp} is older than the last bar at {self.last_timestamp}")
+
+        if revise:
+            prior = self._prior
+            self._closes[-1], self._highs[-1], self._lows[-1] = Close, High, Low
+        else:
+            prior = self._state
+            self._closes.append(Close)
+            self._highs.append(High)
+            self._lows.append(Low)
+
+        state = dict(prior)
+        n = state['n'] = prior['n'] + 1
+        prev_close = prior['close']
+        state['close'] = Close
+        row = {'Open': Open, 'High': High, 'Low': Low, 'Close': Close, 'Volume': Volume}
+
+        # SMA / Bollinger Bands (rolling mean, population std)
+        closes = self._closes
+        row['SMA_20'] = _window_mean(closes, 20) if n >= 20 else NAN
+        row['SMA_50'] = _window_mean(closes, 50) if n >= 50 else NAN
+        if n >= self.BB_WINDOW:
+            window = list(closes)[-self.BB_WINDOW:]
+            mean = row['SMA_20']
+            std = math.sqrt(math.fsum((x - mean) ** 2 for x in window) / self.BB_WINDOW)
+            row['BB_High'] = mean + self.BB_DEV * std
+            row['BB_Low'] = mean - self.BB_DEV * std
+        else:
+            row['BB_High'] = row['BB_Low'] = NAN
+
+        # RSI (Wilder smoothing, alpha = 1/window, seeded with a zero first change)
+        diff = 0.0 if prev_close is None else Close - prev_close
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        alpha = 1.0 / self.RSI_WINDOW
+        if n == 1:
+            state['ema_up'], state['ema_down'] = up, down
+        else:
+            state['ema_up'] = (1 - alpha) * prior['ema_up'] + alpha * up
+            state['ema_down'] = (1 - alpha) * prior['ema_down'] + alpha * down
+        if n < self.RSI_WINDOW:
+            row['RSI'] = NAN
+        elif state['ema_down'] == 0:
+            row['RSI'] = 100.0
+        else:
+            row['RSI'] = 100 - (100 / (1 + state['ema_up'] / state['ema_down']))
+
+        # MACD (EMAs seeded with the first close, signal seeded with the first full MACD)
+        state['ema_fast'] = _ema_step(prior['ema_fast'], Close, self.MACD_FAST, n == 1)
+        state['ema_slow'] = _ema_step(prior['ema_slow'], Close, self.MACD_SLOW, n == 1)
+        if n >= self.MACD_SLOW:
+            macd = state['ema_fast'] - state['ema_slow']
+            state['macd_signal'] = _ema_step(prior['macd_signal'], macd, self.MACD_SIGN, n == self.MACD_SLOW)
+            row['MACD'] = macd
+            row['MACD_Signal'] = state['macd_signal'] if n >= self.MACD_SLOW + self.MACD_SIGN - 1 else NAN
+        else:
+            row['MACD'] = row['MACD_Signal'] = NAN
+
+        # Stochastic Oscillator
+        if n >= self.STOCH_WINDOW:
+            lowest, highest = min(self._lows), max(self._highs)
+            stoch_k = _safe_div(100 * (Close - lowest), highest - lowest)
+        else:
+            stoch_k = NAN
+        if revise:
+            self._stoch_k[-1] = stoch_k
+        else:
+            self._stoch_k.append(stoch_k)
+        row['Stoch_K'] = stoch_k
+        row['Stoch_D'] = _window_mean(self._stoch_k, self.STOCH_SMOOTH) if n >= self.STOCH_WINDOW + self.STOCH_SMOOTH - 1 else NAN
+
+        # ATR (zero until the first full window, then Wilder smoothing)
+        if prev_close is None:
+            true_range = High - Low
+        else:
+            true_range = max(High - Low, abs(High - prev_close), abs(Low - prev_close))
+        if revise:
+            self._true_ranges[-1] = true_range
+        else:
+            self._true_ranges.append(true_range)
+        if n < self.ATR_WINDOW:
+            state['atr'] = 0.0
+        elif n == self.ATR_WINDOW:
+            state['atr'] = math.fsum(self._true_ranges) / self.ATR_WINDOW
+        else:
+            state['atr'] = (prior['atr'] * (self.ATR_WINDOW - 1) + true_range) / float(self.ATR_WINDOW)
+        row['ATR'] = state['atr']
+
+        self._prior, self._state = prior, state
+        if revise:
+            self._rows[-1] = (timestamp, row)
+        else:
+            self._rows.append((timestamp, row))
+        self.last_timestamp = timestamp
+        return row
+
+    def latest(self):
+        return self._rows[-1][1] if self._rows else {}
+
+    def to_frame(self):
+        """
+        Returns the most recent bars as a DataFrame with the same columns add_technical_indicators produces.
+        """
+        if not self._rows:
+            return pd.DataFrame()
+        index = pd.Index([ts for ts, _ in self._rows], name='Date')
+        return pd.DataFrame([row for _, row in self._rows], index=index)
+
+def _window_mean(values, window):
+    if len(values) < window:
+        return NAN
+    return math.fsum(list(values)[-window:]) / window
+
+def _ema_step(previous, value, span, first):
+    if first:
+        return value
+    alpha = 2.0 / (span + 1)
+    return (1 - alpha) * previous + alpha * value
+
+def _safe_div(numerator, denominator):
+    # Mirrors pandas: x/0 -> +/-inf, 0/0 -> NaN
+    if denominator == 0:
+        return NAN if numerator == 0 else math.copysign(math.inf, numerator)
+    return numerator / denominator
@@ -1,7 +1,18 @@
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+import gzip
+import hashlib
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
+from storage import StateStore
+from events import EventBroker
+
+try:
+    import orjson
+except ImportError: # Optional faster encoder
+    orjson = None
 
 app = Flask(__name__)
 
@@ -10,58 +21,170 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 AGENTS_FILE = os.path.join(DATA_DIR, 'agents.json')
 HISTORY_FILE = os.path.join(DATA_DIR, 'history.json')
 TRADES_FILE = os.path.join(DATA_DIR, 'trades.json')
+DB_FILE = os.environ.get('AGENT_DB_PATH', os.path.join(DATA_DIR, 'competition.sqlite'))
 
-def load_json(filepath, default=None):
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    return default if default is not None else {}
+# Append-only state store, opened on first use (see get_store)
+STORE = None
+_store_lock = threading.Lock()
 
-def save_json(filepath, data):
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
+def open_store(path):
+    # The legacy JSON files are imported once on first start
+    store = StateStore(path)
+    store.import_json(AGENTS_FILE, HISTORY_FILE, TRADES_FILE)
+    return store
+
+def get_store():
+    """
+    Opens the state store on first use. Where the data directory is read-only (e.g. a
+    Vercel deploy) the database moves to the temp directory, seeded from the bundled JSON.
+    """
+    global STORE
+    with _store_lock:
+        if STORE is None:
+            try:
+                STORE = open_store(DB_FILE)
+            except (sqlite3.OperationalError, OSError) as e:
+                import tempfile
+                fallback = os.path.join(tempfile.gettempdir(), 'agentCompetition', 'competition.sqlite')
+                print(f"Cannot open {DB_FILE} ({e}); using {fallback}")
+                STORE = open_store(fallback)
+    return STORE
+
+# Pushes each finished trade cycle to connected dashboards
+broker = EventBroker()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, etag=None):
+    """
+    Compact JSON response, gzip-compressed when the client accepts it.
+    """
+    body = encode_json(payload)
+    response = Response(body, mimetype='application/json')
+    if len(body) > 1024 and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/api/stats')
 def get_stats():
-    agents = load_json(AGENTS_FILE, {})
-    history = load_json(HISTORY_FILE, {})
-    trades = load_json(TRADES_FILE, [])
-    return jsonify({'agents': agents, 'history': history, 'trades': trades})
-
-from agents import BasicAgent, ProAgent, AggressiveAgent, Mag7Agent
-from agents.data_loader import fetch_stock_data, get_sp500_tickers
-from agents.technical_analysis import add_technical_indicators
-import pandas as pd
+    """
+    Query parameters (all optional):
+        trades_since / history_since: only return rows newer than these cursors
+        limit / offset: page trades from the newest backwards
+    The response carries 'cursor' for the next delta request and an ETag, so
+    polling an unchanged state costs a 304 with no body.
+    """
+    trades_since = request.args.get('trades_since', 0, type=int)
+    history_since = request.args.get('history_since', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    store = get_store()
+    cursor = store.cursor()
+    version = f"{cursor['trades']}-{cursor['history']}:{request.query_string.decode()}"
+    etag = hashlib.sha1(version.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    payload = {
+        'agents': store.load_agents(),
+        'history': store.load_history(since=history_since, until=cursor['history']),
+        'trades': store.load_trades(since=trades_since, until=cursor['trades'], limit=limit, offset=offset),
+        'total_trades': cursor['trades'], # Trades are append-only, so the latest id is the count
+        'cursor': cursor,
+    }
+    return json_response(payload, etag)
+
+@app.route('/api/stream')
+def stream():
+    """
+    Server-Sent Events: one 'cycle' event per finished trade cycle carrying only the
+    new trades, new history points and agent summaries, plus the cursors around them.
+    """
+    response = Response(stream_with_context(broker.stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Trading-path modules (pandas, numpy, requests, the agents) are imported lazily inside the
+# trade cycle so a cold start serving '/', /api/stats or /api/stream stays cheap
+from agents.instrumentation import metrics, profile
+from universe import Universe
 from datetime import datetime, timedelta
 import random
+import time
 
-# Fetch S&P 500 once on startup
-try:
-    SP500_TICKERS = get_sp500_tickers()
-    if not SP500_TICKERS:
-        raise Exception("Failed to fetch S&P 500")
-    print(f"Loaded {len(SP500_TICKERS)} S&P 500 stocks.")
-except:
-    print("Fallback to Tech Universe")
-    SP500_TICKERS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NVDA', 'META', 'NFLX', 'AMD', 'INTC', 
-                     'IBM', 'ORCL', 'CSCO', 'ADBE', 'CRM', 'QCOM', 'TXN', 'AVGO', 'PYPL', 'SBUX']
+# S&P 500 list from the bundled snapshot (refreshed in the background when stale)
+UNIVERSE = Universe()
 
-import threading
-import time
+# Shared fetch stage: pooled connections, rate limiting, retries and single-flight (created on first cycle)
+FETCHER = None
+
+def get_fetcher():
+    global FETCHER
+    if FETCHER is None:
+        from agents.fetcher import MarketDataFetcher
+        FETCHER = MarketDataFetcher()
+    return FETCHER
+
+# Per-symbol incremental indicator state, seeded on first sight and then updated bar by bar
+INDICATOR_STREAMS = {}
+
+# Background trading slot; cycles that take longer are counted as overruns
+CYCLE_INTERVAL = 10
+
+# Set PROFILE_CYCLES=1 to profile every cycle (or call /api/trade?profile=1 for one)
+PROFILE_CYCLES = os.environ.get('PROFILE_CYCLES') == '1'
+PROFILE_DIR = os.path.join(DATA_DIR, 'profiles')
+
+@app.route('/api/metrics')
+def get_metrics():
+    """
+    Stage timings, fetch counters and latency histograms in the Prometheus text format.
+    """
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
-def run_trade_cycle():
+def run_trade_cycle(profile_cycle=False):
+    """
+    Runs one timed trade cycle, optionally under cProfile + stack sampling
+    (written to data/profiles/cycle-<timestamp>.prof / .folded).
+    """
+    path_prefix = os.path.join(PROFILE_DIR, f"cycle-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    start = time.perf_counter()
+    with profile(path_prefix, enabled=profile_cycle or PROFILE_CYCLES), metrics.timer('cycle'):
+        result = _run_trade_cycle()
+
+    if time.perf_counter() - start > CYCLE_INTERVAL:
+        metrics.inc('cycle_overruns_total')
+    metrics.inc('trade_cycles_total', status=result['status'])
+    return result
+
+def _run_trade_cycle():
     """
     Core trading logic, decoupled from Flask request context.
     """
+    from agents import BasicAgent, ProAgent, AggressiveAgent, Mag7Agent
+    from agents.streaming_indicators import StreamingIndicators
+    from agents.snapshot import MarketSnapshot
+
     try:
         # 1. Load State
-        agents_data = load_json(AGENTS_FILE, {})
-        history = load_json(HISTORY_FILE, {})
-        trades_log = load_json(TRADES_FILE, [])
+        with metrics.timer('load'):
+            agents_data = get_store().load_agents()
         
         # Initialize Agents
         agents = {
@@ -73,7 +196,8 @@ def run_trade_cycle():
         
         # 2. Fetch Market Data (Batch of 50)
         batch_size = 50
-        universe_batch = random.sample(SP500_TICKERS, min(len(SP500_TICKERS), batch_size))
+        sp500_tickers = UNIVERSE.get()
+        universe_batch = random.sample(sp500_tickers, min(len(sp500_tickers), batch_size))
         mag7 = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NVDA', 'META']
         universe_batch = list(set(universe_batch + mag7))
         
@@ -85,50 +209,60 @@ def run_trade_cycle():
         
         current_prices = {}
         
-        errors = []
-        for symbol in universe_batch:
-            try:
-                df = fetch_stock_data(symbol, start_date, end_date)
-                if not df.empty:
-                    df = add_technical_indicators(df)
+        with metrics.timer('fetch'):
+            frames, errors = get_fetcher().fetch_many(universe_batch, start_date, end_date)
+        with metrics.timer('indicators'):
+            for symbol, df in frames.items():
+                try:
+                    stream = INDICATOR_STREAMS.setdefault(symbol, StreamingIndicators())
+                    stream.extend(df)
+                    df = stream.to_frame()
                     market_data[symbol] = df
                     current_prices[symbol] = df.iloc[-1]['Close']
-                else:
-                    errors.append(f"{symbol}: Empty DF")
-            except Exception as e:
-                errors.append(f"{symbol}: {str(e)}")
+                except Exception as e:
+                    metrics.inc('indicator_errors_total')
+                    errors.append(f"{symbol}: {str(e)}")
 
         if not market_data:
             return {'status': 'Error', 'message': 'No market data fetched', 'details': errors[:5]}
 
+        # One cross-sectional snapshot shared by every agent this cycle
+        with metrics.timer('snapshot'):
+            snapshot = MarketSnapshot.from_rows({symbol: INDICATOR_STREAMS[symbol].latest() for symbol in market_data})
+
         # 3. Run Agents
         timestamp = datetime.now().isoformat()
         new_trades = []
+        history_points = []
         
         for name, agent in agents.items():
             # Decide
-            orders = agent.decide(market_data)
+            with metrics.timer('decide', agent=name):
+                if agent.vectorized:
+                    orders = agent.decide_vectorized(snapshot)
+                else:
+                    orders = agent.decide(market_data)
             
             # Execute
-            for order in orders:
-                symbol = order['symbol']
-                action = order['action']
-                shares = order['shares']
-                price = current_prices.get(symbol)
-                
-                if price:
-                    if agent.execute_trade(symbol, action, price, shares, timestamp):
-                        trade_record = {
-                            'date': timestamp,
-                            'agent': name,
-                            'symbol': symbol,
-                            'action': action,
-                            'shares': shares,
-                            'price': price,
-                            'total': shares * price
-                        }
-                        new_trades.append(trade_record)
-                        trades_log.append(trade_record)
+            with metrics.timer('execute', agent=name):
+                for order in orders:
+                    symbol = order['symbol']
+                    action = order['action']
+                    shares = order['shares']
+                    price = current_prices.get(symbol)
+                    
+                    if price:
+                        if agent.execute_trade(symbol, action, price, shares, timestamp):
+                            trade_record = {
+                                'date': timestamp,
+                                'agent': name,
+                                'symbol': symbol,
+                                'action': action,
+                                'shares': shares,
+                                'price': price,
+                                'total': shares * price
+                            }
+                            new_trades.append(trade_record)
 
             # Update Portfolio Value
             agent.update_portfolio_value(current_prices)
@@ -149,13 +283,25 @@ def run_trade_cycle():
             }
             
             # Update History
-            if name not in history: history[name] = []
-            history[name].append({'date': timestamp, 'value': agent.portfolio_value})
+            history_points.append((name, timestamp, agent.portfolio_value))
+
+        # 4. Save State (one transaction: agent state + appended trades and history points)
+        with metrics.timer('save'):
+            since, cursor = get_store().commit_cycle(agents_data, new_trades, history_points)
+        metrics.inc('trades_executed_total', len(new_trades))
 
-        # 4. Save State
-        save_json(AGENTS_FILE, agents_data)
-        save_json(HISTORY_FILE, history)
-        save_json(TRADES_FILE, trades_log)
+        # 5. Push the delta to live dashboards
+        history_delta = {}
+        for name, date, value in history_points:
+            history_delta.setdefault(name, []).append({'date': date, 'value': value})
+        with metrics.timer('publish'):
+            broker.publish('cycle', {
+                'since': since,
+                'cursor': cursor,
+                'agents': agents_data,
+                'history': history_delta,
+                'trades': [dict(t, id=since['trades'] + i + 1) for i, t in enumerate(new_trades)],
+            })
         
         return {
             'status': 'Success', 
@@ -171,9 +317,9 @@ def run_trade_cycle():
 @app.route('/api/trade')
 def trigger_trade():
     """
-    Manual trigger endpoint.
+    Manual trigger endpoint. ?profile=1 captures a profile of this cycle.
     """
-    result = run_trade_cycle()
+    result = run_trade_cycle(profile_cycle=request.args.get('profile') == '1')
     return jsonify(result)
 
 def background_trader():
@@ -183,7 +329,7 @@ def background_trader():
     print("Starting Background Auto-Trader...")
     while True:
         run_trade_cycle()
-        time.sleep(10)
+        time.sleep(CYCLE_INTERVAL)
 
 if __name__ == '__main__':
     # Start background thread
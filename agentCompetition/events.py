@@ -0,0 +1,71 @@
+import json
+import queue
+import threading
+
+class EventBroker:
+    """
+    In-process fan-out of trade-cycle events to Server-Sent Events subscribers.
+
+    Each subscriber gets a small bounded queue. A subscriber that falls behind has its
+    queue replaced by a single 'resync' event instead of blocking the publisher, and an
+    idle stream costs one sleeping thread plus a periodic keepalive comment.
+    """
+    def __init__(self, max_queue=100, keepalive=15):
+        self.max_queue = max_queue
+        self.keepalive = keepalive
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.event_id = 0
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def publish(self, event, data):
+        with self.lock:
+            self.event_id += 1
+            message = format_sse(event, data, self.event_id)
+            subscribers = list(self.subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop its backlog and tell it to reload state
+                _drain(q)
+                q.put_nowait(format_sse('resync', {}, self.event_id))
+
+    def stream(self):
+        """
+        Generator of SSE-formatted messages for one client.
+        """
+        q = self.subscribe()
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    yield q.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(q)
+
+def format_sse(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+def _drain(q):
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            return
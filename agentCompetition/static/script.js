@@ -1,18 +1,91 @@
 let chart;
 
-async function fetchStats() {
+// Client-side copy of the competition state, kept current with delta updates
+const TRADES_SHOWN = 20;
+const state = {
+    cursor: { trades: 0, history: 0 },
+    etag: null,
+    agents: {},
+    history: {},
+    trades: []
+};
+
+let inFlight = null;
+
+function fetchStats() {
+    // One request at a time; callers share the pending one
+    if (!inFlight) inFlight = loadDelta().finally(() => { inFlight = null; });
+    return inFlight;
+}
+
+async function loadDelta() {
     try {
-        const response = await fetch('/api/stats');
-        const data = await response.json();
+        // Only ask for rows we haven't seen; an unchanged state answers 304 with no body
+        const since = state.cursor;
+        const params = new URLSearchParams({
+            trades_since: since.trades,
+            history_since: since.history,
+            limit: TRADES_SHOWN
+        });
+        const headers = state.etag ? { 'If-None-Match': state.etag } : {};
+        const response = await fetch(`/api/stats?${params}`, { cache: 'no-store', headers });
+        if (response.status === 304) return;
 
-        updateLeaderboard(data.agents);
-        updateChart(data.history, data.agents);
-        updateTrades(data.trades);
+        const data = await response.json();
+        // A pushed event already moved us past this delta
+        if (state.cursor !== since) return;
+        state.etag = response.headers.get('ETag');
+        applyUpdate(data);
     } catch (error) {
         console.error('Error fetching stats:', error);
     }
 }
 
+function subscribe() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    const source = new EventSource('/api/stream');
+    source.addEventListener('cycle', event => {
+        const data = JSON.parse(event.data);
+        // Events must continue exactly from our cursor; otherwise reload the delta
+        if (data.since.trades !== state.cursor.trades || data.since.history !== state.cursor.history) {
+            fetchStats();
+            return;
+        }
+        state.etag = null;
+        applyUpdate(data);
+    });
+    source.addEventListener('resync', () => fetchStats());
+    // Catch up on anything missed while (re)connecting
+    source.addEventListener('open', () => fetchStats());
+    source.addEventListener('error', () => {
+        // Streaming unsupported (e.g. serverless): fall back to polling
+        if (source.readyState === EventSource.CLOSED) startPolling();
+    });
+}
+
+let pollTimer = null;
+function startPolling() {
+    if (!pollTimer) pollTimer = setInterval(fetchStats, 5000);
+}
+
+function applyUpdate(data) {
+    state.cursor = data.cursor;
+    state.agents = data.agents;
+
+    Object.entries(data.history).forEach(([name, points]) => {
+        state.history[name] = (state.history[name] || []).concat(points);
+    });
+    state.trades = state.trades.concat(data.trades).slice(-TRADES_SHOWN);
+
+    updateLeaderboard(state.agents);
+    appendToChart(data.history, state.agents);
+    if (data.trades.length) updateTrades(state.trades);
+}
+
 async function triggerTrade() {
     // Manual trigger (optional, since background thread is running)
     try {
@@ -57,6 +130,39 @@ function updateLeaderboard(agents) {
     });
 }
 
+function appendToChart(newHistory, agents) {
+    if (!chart) {
+        updateChart(state.history, agents);
+        return;
+    }
+
+    // Labels follow the first agent's history, as in updateChart
+    const firstAgent = Object.keys(state.history)[0];
+    (newHistory[firstAgent] || []).forEach(h => chart.data.labels.push(new Date(h.date).toLocaleDateString()));
+
+    Object.entries(newHistory).forEach(([name, points]) => {
+        let dataset = chart.data.datasets.find(d => d.label === name);
+        if (!dataset) {
+            dataset = makeDataset(name, [], agents);
+            chart.data.datasets.push(dataset);
+        }
+        points.forEach(h => dataset.data.push(h.value));
+    });
+
+    if (Object.keys(newHistory).length) chart.update();
+}
+
+function makeDataset(name, data, agents) {
+    return {
+        label: name,
+        data: data.map(h => h.value),
+        borderColor: agents[name] ? agents[name].color : '#000000',
+        backgroundColor: 'transparent',
+        borderWidth: 2,
+        tension: 0.4
+    };
+}
+
 function updateChart(history, agents) {
     const ctx = document.getElementById('portfolioChart').getContext('2d');
 
@@ -66,16 +172,7 @@ function updateChart(history, agents) {
 
     const labels = history[firstAgent].map(h => new Date(h.date).toLocaleDateString());
 
-    const datasets = Object.entries(history).map(([name, data]) => {
-        return {
-            label: name,
-            data: data.map(h => h.value),
-            borderColor: agents[name].color,
-            backgroundColor: 'transparent',
-            borderWidth: 2,
-            tension: 0.4
-        };
-    });
+    const datasets = Object.entries(history).map(([name, data]) => makeDataset(name, data, agents));
 
     if (chart) {
         chart.data.labels = labels;
@@ -110,7 +207,7 @@ function updateTrades(trades) {
     list.innerHTML = '';
 
     // Show last 20 trades
-    trades.slice().reverse().slice(0, 20).forEach(trade => {
+    trades.slice().reverse().slice(0, TRADES_SHOWN).forEach(trade => {
         const div = document.createElement('div');
         div.className = 'trade-item';
         div.innerHTML = `
@@ -125,10 +222,8 @@ function updateTrades(trades) {
     });
 }
 
-// Initial Load
-fetchStats();
-// Poll every 5 seconds for UI updates
-setInterval(fetchStats, 5000);
+// Initial Load, then live updates pushed by the server
+fetchStats().then(subscribe);
 
 // Client-side Auto-Trader (Pings /api/trade every 10 seconds while tab is open)
 // This bypasses Vercel's Hobby cron limits for the active user.
@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT NOT NULL,
+    shares INTEGER NOT NULL,
+    price REAL NOT NULL,
+    total REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_agent ON history (agent, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+TRADE_FIELDS = ('date', 'agent', 'symbol', 'action', 'shares', 'price', 'total')
+
+class StateStore:
+    """
+    Competition state in SQLite (WAL mode).
+
+    Trades and history points are append-only rows; agent state is one JSON row per agent.
+    Each trade cycle commits in a single transaction, so a crash can never leave a
+    half-written state, and readers (the dashboard) never block the trader.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local() # sqlite3 connections are per thread
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load_agents(self):
+        rows = self._conn().execute('SELECT name, state FROM agents ORDER BY rowid')
+        return {name: json.loads(state) for name, state in rows}
+
+    def load_history(self, since=0, until=None):
+        """
+        History points with since < id <= until, grouped by agent.
+        """
+        history = {}
+        until = until if until is not None else -1
+        rows = self._conn().execute('SELECT agent, date, value FROM history WHERE id > ? AND (? < 0 OR id <= ?) ORDER BY id',
+                                    (since, until, until))
+        for agent, date, value in rows:
+            history.setdefault(agent, []).append({'date': date, 'value': value})
+        return history
+
+    def load_trades(self, since=0, until=None, limit=None, offset=0):
+        """
+        Trades with since < id <= until in chronological order.
+        limit/offset page from the newest trade backwards (offset 0 is the latest page).
+        """
+        until = until if until is not None else -1
+        query = f'SELECT id, {", ".join(TRADE_FIELDS)} FROM trades WHERE id > ? AND (? < 0 OR id <= ?)'
+        if limit is None:
+            rows = self._conn().execute(query + ' ORDER BY id', (since, until, until)).fetchall()
+        else:
+            rows = self._conn().execute(query + ' ORDER BY id DESC LIMIT ? OFFSET ?',
+                                        (since, until, until, limit, offset)).fetchall()
+            rows.reverse()
+        return [dict(zip(('id',) + TRADE_FIELDS, row)) for row in rows]
+
+    def cursor(self):
+        """
+        Latest trade and history ids. Agent state only changes together with new
+        history points, so this pair identifies the whole state version.
+        """
+        return _cursor(self._conn())
+
+    def commit_cycle(self, agents_data, new_trades, history_points):
+        """
+        Saves one trade cycle atomically.
+        agents_data: {name: state dict}, new_trades: [trade dict], history_points: [(agent, date, value)]
+        Returns (cursor before, cursor after); the new rows are exactly the ids in between.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE') # Take the write lock before reading the cursor
+            before = _cursor(conn)
+            conn.executemany('INSERT OR REPLACE INTO agents (name, state) VALUES (?, ?)',
+                             [(name, json.dumps(state)) for name, state in agents_data.items()])
+            conn.executemany(f'INSERT INTO trades ({", ".join(TRADE_FIELDS)}) VALUES ({", ".join("?" * len(TRADE_FIELDS))})',
+                             [tuple(t[f] for f in TRADE_FIELDS) for t in new_trades])
+            conn.executemany('INSERT INTO history (agent, date, value) VALUES (?, ?, ?)', history_points)
+            after = _cursor(conn)
+        return before, after
+
+    def import_json(self, agents_file, history_file, trades_file):
+        """
+        One-time migration from the legacy agents.json / history.json / trades.json files.
+        Does nothing once the store has been migrated (or already holds state).
+        """
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+            return False
+
+        def load(filepath, default):
+            if os.path.exists(filepath):
+                with open(filepath, 'r') as f:
+                    return json.load(f)
+            return default
+
+        has_state = conn.execute('SELECT 1 FROM agents LIMIT 1').fetchone()
+        with conn:
+            if not has_state:
+                agents = load(agents_file, {})
+                history = load(history_file, {})
+                trades = load(trades_file, [])
+                points = [(agent, p['date'], p['value']) for agent, series in history.items() for p in series]
+                # Legacy files interleave agents in time; keep chronological order for ids
+                points.sort(key=lambda p: p[1])
+                conn.executemany('INSERT OR REPLACE INTO agents (name, state) VALUES (?, ?)',
+                                 [(name, json.dumps(state)) for name, state in agents.items()])
+                conn.executemany(f'INSERT INTO trades ({", ".join(TRADE_FIELDS)}) VALUES ({", ".join("?" * len(TRADE_FIELDS))})',
+                                 [tuple(t.get(f) for f in TRADE_FIELDS) for t in trades])
+                conn.executemany('INSERT INTO history (agent, date, value) VALUES (?, ?, ?)', points)
+                print(f"Imported {len(agents)} agents, {len(trades)} trades and {len(points)} history points from JSON.")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', '1')")
+        return True
+
+def _cursor(conn):
+    trades = conn.execute('SELECT MAX(id) FROM trades').fetchone()[0] or 0
+    history = conn.execute('SELECT MAX(id) FROM history').fetchone()[0] or 0
+    return {'trades': trades, 'history': history}
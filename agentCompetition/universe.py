@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+UNIVERSE_FILE = os.environ.get('UNIVERSE_PATH', os.path.join(DATA_DIR, 'sp500.json'))
+
+# Re-read the snapshot file at most this often (seconds)
+UNIVERSE_TTL = 3600
+# Snapshots older than this are refreshed from Wikipedia in the background (seconds)
+REFRESH_AGE = 7 * 24 * 3600
+
+FALLBACK_TICKERS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NVDA', 'META', 'NFLX', 'AMD', 'INTC',
+                    'IBM', 'ORCL', 'CSCO', 'ADBE', 'CRM', 'QCOM', 'TXN', 'AVGO', 'PYPL', 'SBUX']
+
+class Universe:
+    """
+    S&P 500 ticker list served from a bundled JSON snapshot.
+
+    The snapshot is read once per `ttl` seconds and never blocks on the network:
+    when it is older than `refresh_age`, a background thread re-scrapes Wikipedia
+    and rewrites the file (read-only deployments just keep the bundled list).
+    """
+    def __init__(self, path=UNIVERSE_FILE, ttl=UNIVERSE_TTL, refresh_age=REFRESH_AGE, auto_refresh=True):
+        self.path = path
+        self.ttl = ttl
+        self.refresh_age = refresh_age
+        self.auto_refresh = auto_refresh
+        self.tickers = None
+        self.updated = None
+        self.loaded_at = 0
+        self.lock = threading.Lock()
+        self.next_refresh = 0 # Earliest time for the next background refresh attempt
+
+    def load(self):
+        """
+        Returns (tickers, updated datetime) from the snapshot file, or the fallback list.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                snapshot = json.load(f)
+            tickers = snapshot['tickers']
+            if not tickers:
+                raise ValueError("empty ticker list")
+            return tickers, datetime.fromisoformat(snapshot['updated'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read universe snapshot ({e}), using Tech Universe")
+            return list(FALLBACK_TICKERS), None
+
+    def save(self, tickers, updated=None):
+        updated = updated or datetime.now()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies',
+                       'updated': updated.isoformat(timespec='seconds'), 'tickers': tickers}, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def get(self):
+        with self.lock:
+            if self.tickers is None or time.time() - self.loaded_at > self.ttl:
+                self.tickers, self.updated = self.load()
+                self.loaded_at = time.time()
+            stale = self.updated is None or (datetime.now() - self.updated).total_seconds() > self.refresh_age
+            if stale and self.auto_refresh and time.time() >= self.next_refresh:
+                # At most one attempt per TTL, so a failing scrape is retried without hammering Wikipedia
+                self.next_refresh = time.time() + self.ttl
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+            return self.tickers
+
+    def refresh(self):
+        """
+        Scrapes the current list and rewrites the snapshot. Returns the tickers, or None on failure.
+        """
+        from agents.data_loader import get_sp500_tickers # Pulls in pandas; keep it off the startup path
+
+        tickers = get_sp500_tickers()
+        if not tickers:
+            return None
+        updated = datetime.now()
+        try:
+            self.save(tickers, updated)
+        except OSError as e:
+            print(f"Warning: Could not write universe snapshot: {e}")
+        with self.lock:
+            self.tickers, self.updated, self.loaded_at = tickers, updated, time.time()
+        return tickers
+
+    def _refresh_in_background(self):
+        try:
+            tickers = self.refresh()
+        except Exception as e:
+            print(f"Universe refresh failed: {e}")
+            return
+        if tickers:
+            print(f"Refreshed universe snapshot: {len(tickers)} stocks.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the bundled S&P 500 universe snapshot")
+    parser.add_argument('--path', type=str, default=UNIVERSE_FILE)
+    args = parser.parse_args()
+
+    tickers = Universe(args.path, auto_refresh=False).refresh()
+    if not tickers:
+        raise SystemExit("Refresh failed; snapshot left unchanged.")
+    print(f"Saved {len(tickers)} tickers to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
 import pandas as pd
 import numpy as np
+from panel import MarketPanel
+from stops import ratchet
+from instrumentation import metrics
 
 class Backtester:
-    def __init__(self, initial_capital=10000, trailing_stop_atr_multiplier=4.0):
+    def __init__(self, initial_capital=10000, trailing_stop_atr_multiplier=4.0, engine='loop',
+                 allocation_pct=0.3, min_trade_size=1000, verbose=True):
+        """
+        allocation_pct: fraction of available cash invested per buy.
+        min_trade_size: buys are skipped unless the allocation exceeds this.
+        engine: 'loop' walks every (date, symbol) through pandas,
+                'vectorized' aligns the universe into NumPy panels once and
+                runs the same state machine over arrays (identical trades and equity).
+        """
+        if engine not in ('loop', 'vectorized'):
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
         self.initial_capital = initial_capital
         self.cash = initial_capital
         self.positions = {} # {symbol: shares}
@@ -10,15 +24,30 @@ class Backtester:
         self.trades = []
         self.portfolio_history = []
         self.trailing_stop_atr_multiplier = trailing_stop_atr_multiplier
+        self.allocation_pct = allocation_pct
+        self.min_trade_size = min_trade_size
+        self.verbose = verbose
 
     def run(self, data_dict):
         """
-        Runs the backtest on a dictionary of dataframes {symbol: df}.
+        Runs the backtest on a dictionary of dataframes {symbol: df},
+        or on a MarketPanel with Close, Signal and ATR fields (used as-is by the vectorized engine).
         """
+        with metrics.timer('backtest', engine=self.engine):
+            if self.engine == 'vectorized':
+                return self._run_vectorized(data_dict)
+            if isinstance(data_dict, MarketPanel):
+                data_dict = data_dict.to_frames()
+            return self._run_loop(data_dict)
+
+    def _run_loop(self, data_dict):
+        last_prices = {} # {symbol: last known close}, values positions on days a symbol has no bar
+
         # 1. Align Dates
         all_dates = sorted(list(set().union(*[df.index.tolist() for df in data_dict.values()])))
         
-        print(f"Backtesting over {len(all_dates)} days...")
+        if self.verbose:
+            print(f"Backtesting over {len(all_dates)} days...")
         
         for date in all_dates:
             daily_value = self.cash
@@ -26,12 +55,13 @@ class Backtester:
             for symbol, df in data_dict.items():
                 if date not in df.index:
                     if symbol in self.positions:
-                         # Use last known price for valuation if possible
-                         pass
+                        # Use last known price for valuation
+                        daily_value += self.positions[symbol] * last_prices[symbol]
                     continue
                 
                 row = df.loc[date]
                 price = row['Close']
+                last_prices[symbol] = price
                 signal = row.get('Signal', 0)
                 atr = row.get('ATR', 0)
                 
@@ -52,10 +82,10 @@ class Backtester:
                 # Execute Trades
                 if signal == 1: # Buy
                     # Aggressive Compounding: Invest 30% of AVAILABLE CASH per trade
-                    allocation = self.cash * 0.3
+                    allocation = self.cash * self.allocation_pct
                     
                     # Ensure minimum trade size to avoid tiny trades
-                    if allocation > 1000 and symbol not in self.positions:
+                    if allocation > self.min_trade_size and symbol not in self.positions:
                         shares_to_buy = int(allocation // price)
                         if shares_to_buy > 0:
                             cost = shares_to_buy * price
@@ -84,12 +114,148 @@ class Backtester:
             
             self.portfolio_history.append({'Date': date, 'Portfolio Value': daily_value})
             
+        return self._history_frame(), self.trades
+
+    def _run_vectorized(self, data_dict):
+        # 1. Align all symbols once into (dates x symbols) panels
+        panel = data_dict if isinstance(data_dict, MarketPanel) else _to_panel(data_dict)
+
+        if self.verbose:
+            print(f"Backtesting over {len(panel.dates)} days...")
+
+        state = self._initial_state(panel.symbols)
+        values = self._simulate(panel, state)
+        self._finish(state)
+        self.portfolio_history = [{'Date': d, 'Portfolio Value': v} for d, v in zip(panel.dates, values)]
+
+        return self._history_frame(), self.trades
+
+    def run_chunked(self, chunks):
+        """
+        Vectorized backtest over time-ordered chunks of the universe, e.g. from chunk_by_date().
+        Each chunk is a {symbol: df} (or MarketPanel) with the same symbols in the same order,
+        covering later bars than the chunk before it; frames may be empty where a symbol has no bars.
+
+        Only one chunk is aligned at a time and positions, cash and last prices carry over,
+        so memory is bounded by the chunk size instead of the history length (millions of
+        intraday bars). Trades and equity are identical to run() on the whole universe.
+        """
+        state = None
+        pieces = []
+        with metrics.timer('backtest', engine='chunked'):
+            for chunk in chunks:
+                panel = chunk if isinstance(chunk, MarketPanel) else _to_panel(chunk)
+                if state is None:
+                    state = self._initial_state(panel.symbols)
+                elif panel.symbols != state['symbols']:
+                    raise ValueError("Every chunk must hold the same symbols in the same order")
+                if len(panel.dates) and pieces and panel.dates[0] <= pieces[-1].index[-1]:
+                    raise ValueError(f"Chunk starting {panel.dates[0]} overlaps the previous chunk")
+
+                values = self._simulate(panel, state)
+                pieces.append(pd.DataFrame({'Portfolio Value': values}, index=pd.Index(panel.dates, name='Date')))
+
+            if state is not None:
+                self._finish(state)
+
+        if self.verbose:
+            print(f"Backtested {sum(len(p) for p in pieces)} bars in {len(pieces)} chunks.")
+        pieces = [p for p in pieces if not p.empty]
+        history_df = pd.concat(pieces) if pieces else pd.DataFrame()
+        return history_df, self.trades
+
+    def _initial_state(self, symbols):
+        n_symbols = len(symbols)
+        return {
+            'symbols': list(symbols),
+            'cash': self.cash,
+            'held': np.zeros(n_symbols, dtype=bool),
+            'shares': np.zeros(n_symbols, dtype=np.int64),
+            'highest': np.full(n_symbols, np.nan),
+            'entry': np.full(n_symbols, np.nan),
+            'last_close': np.full(n_symbols, np.nan), # Valuation price for symbols without a bar
+        }
+
+    def _simulate(self, panel, state):
+        """
+        Runs the trading state machine over one aligned panel, updating `state` in place.
+        Returns the portfolio value per panel date.
+        """
+        dates, symbols = panel.dates, panel.symbols
+        close, signal, atr, present = panel['Close'], panel['Signal'], panel['ATR'], panel.present
+        valuation = panel.ffill('Close')
+        # Symbols with no bar yet in this panel are valued at their close from earlier chunks
+        valuation = np.where(np.isnan(valuation), state['last_close'], valuation)
+
+        held, shares, highest, entry = state['held'], state['shares'], state['highest'], state['entry']
+        cash = state['cash']
+        values = np.empty(len(dates))
+
+        for t in range(len(dates)):
+            daily_value = cash
+            price = close[t]
+            active = present[t]
+
+            # Trailing stop: ratchet the high-water mark, then override signal to sell below it
+            highest, stopped = ratchet(price, atr[t], held & active, highest, self.trailing_stop_atr_multiplier)
+            day_signal = np.where(stopped, -1.0, signal[t])
+
+            # Only symbols that can actually trade today need scalar handling, in universe order
+            candidates = np.flatnonzero(active & (((day_signal == 1) & ~held) | ((day_signal == -1) & held)))
+            for j in candidates:
+                p = price[j]
+                if day_signal[j] == 1: # Buy
+                    allocation = cash * self.allocation_pct
+                    if allocation > self.min_trade_size:
+                        shares_to_buy = int(allocation // p)
+                        if shares_to_buy > 0:
+                            cash -= shares_to_buy * p
+                            held[j] = True
+                            shares[j] = shares_to_buy
+                            highest[j] = p
+                            entry[j] = p
+                            self.trades.append({
+                                'Date': dates[t], 'Symbol': symbols[j], 'Type': 'BUY',
+                                'Price': p, 'Shares': shares_to_buy
+                            })
+                else: # Sell
+                    current_shares = int(shares[j])
+                    cash += current_shares * p
+                    held[j] = False
+                    shares[j] = 0
+                    highest[j] = np.nan
+                    entry[j] = np.nan
+                    self.trades.append({
+                        'Date': dates[t], 'Symbol': symbols[j], 'Type': 'SELL',
+                        'Price': p, 'Shares': current_shares
+                    })
+
+            # Valuation in universe order (same summation order as the loop engine);
+            # symbols without a bar today are valued at their last known close
+            for j in np.flatnonzero(held):
+                daily_value += int(shares[j]) * valuation[t, j]
+            values[t] = daily_value
+
+        state['cash'] = cash
+        state['highest'] = highest
+        if len(dates):
+            state['last_close'] = valuation[-1]
+        return values
+
+    def _finish(self, state):
+        # Leave the same end state behind as the loop engine
+        self.cash = state['cash']
+        symbols = state['symbols']
+        for j in np.flatnonzero(state['held']):
+            self.positions[symbols[j]] = int(state['shares'][j])
+            self.position_metadata[symbols[j]] = {'highest_price': state['highest'][j], 'entry_price': state['entry'][j]}
+
+    def _history_frame(self):
         # Create history dataframe
         history_df = pd.DataFrame(self.portfolio_history)
         if not history_df.empty:
             history_df.set_index('Date', inplace=True)
-            
-        return history_df, self.trades
+        return history_df
 
     def get_performance_metrics(self, history_df):
         if history_df.empty:
@@ -114,3 +280,23 @@ class Backtester:
             'Max Drawdown (%)': max_drawdown,
             'Total Trades': len(self.trades)
         }
+
+def _to_panel(data_dict):
+    return MarketPanel.from_frames(data_dict, columns=('Close', 'Signal', 'ATR'), defaults={'Signal': 0, 'ATR': 0})
+
+def chunk_by_date(data_dict, bars=100000):
+    """
+    Splits {symbol: df} into time-ordered chunks of at most `bars` distinct timestamps
+    for Backtester.run_chunked. Every chunk keeps all symbols (empty frames where a symbol
+    has no bars), and frames are sliced lazily, one chunk at a time.
+    """
+    dates = None
+    for df in data_dict.values():
+        dates = df.index if dates is None else dates.union(df.index)
+    if dates is None:
+        return
+    dates = dates.unique().sort_values()
+
+    for first in range(0, len(dates), bars):
+        start, end = dates[first], dates[min(first + bars, len(dates)) - 1]
+        yield {symbol: df.loc[start:end] for symbol, df in data_dict.items()}
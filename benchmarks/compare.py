@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Matches results by (stage, symbols, years) and flags cases slower than threshold x baseline.
+    """
+    def key(r):
+        return (r['stage'], r['symbols'], r['years'])
+
+    base = {key(r): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = base.get(key(result))
+        if old is None:
+            rows.append({**result, 'ratio': None, 'memory_ratio': None, 'status': 'NEW'})
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] > 0 else float('inf')
+        memory_ratio = result['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] > 0 else None
+        if ratio > threshold or (memory_ratio is not None and memory_ratio > threshold):
+            status = 'REGRESSION'
+        elif ratio < 1 / threshold:
+            status = 'FASTER'
+        else:
+            status = 'OK'
+        rows.append({**result, 'ratio': ratio, 'memory_ratio': memory_ratio, 'status': status})
+    return rows
+
+def print_report(rows):
+    print(f"\n{'stage':<28} {'symbols':>7} {'years':>5} {'time':>10} {'x base':>7} {'mem x':>7}  status")
+    for r in rows:
+        ratio = f"{r['ratio']:.2f}" if r['ratio'] is not None else '-'
+        memory_ratio = f"{r['memory_ratio']:.2f}" if r['memory_ratio'] is not None else '-'
+        print(f"{r['stage']:<28} {r['symbols']:>7} {r['years']:>5} {r['seconds'] * 1000:>8.1f}ms {ratio:>7} {memory_ratio:>7}  {r['status']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('baseline', type=str)
+    parser.add_argument('current', type=str)
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r') as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print_report(rows)
+    sys.exit(1 if any(r['status'] == 'REGRESSION' for r in rows) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'agentCompetition'))
+
+from agents.fetcher import MarketDataFetcher
+
+CSV_HEADER = "Date,Open,High,Low,Close,Adj Close,Volume\n"
+CSV_BARS = CSV_HEADER + "2024-01-02,10,11,9,10.5,10.5,1000\n2024-01-03,10.5,12,10,11.5,11.5,1200\n"
+
+# Status sequence per stub symbol; the last entry repeats. 'slow' answers 200 after SLOW_SECONDS.
+SCRIPTS = {
+    'OK': [200],
+    'FLAKY': [429, 500, 200],
+    'DOWN': [500],
+    'MISSING': [404],
+    'EMPTY': ['empty'],
+    'SLOW': ['slow'],
+}
+SLOW_SECONDS = 0.3
+
+class StubYahoo:
+    """
+    Local stand-in for the CSV download endpoint: /<symbol> answers from SCRIPTS and
+    every request is logged with its arrival time.
+    """
+    def __init__(self):
+        self.requests = {} # {symbol: [monotonic arrival times]}
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                symbol = self.path.split('?')[0].strip('/')
+                with stub.lock:
+                    arrivals = stub.requests.setdefault(symbol, [])
+                    arrivals.append(time.monotonic())
+                    script = SCRIPTS.get(symbol, [404])
+                    action = script[min(len(arrivals), len(script)) - 1]
+                if action == 'slow':
+                    time.sleep(SLOW_SECONDS)
+                    action = 200
+                status, body = (200, CSV_HEADER) if action == 'empty' else (action, CSV_BARS if action == 200 else "error")
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/{{symbol}}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, symbol):
+        with self.lock:
+            return len(self.requests.get(symbol, []))
+
+def make_fetcher(stub, backoff, retries=3):
+    return MarketDataFetcher(max_workers=8, rate=1000, retries=retries, backoff=backoff,
+                             timeout=5, base_url=stub.base_url, use_cache=False)
+
+def check(backoff=0.05):
+    """
+    Returns a list of failures (empty when retries, backoff, single-flight and error reporting behave).
+    """
+    failures = []
+    start, end = '2024-01-01', '2024-01-05'
+    with StubYahoo() as stub:
+        # 1. Retries with exponential backoff: 429, 500, then 200
+        fetcher = make_fetcher(stub, backoff)
+        df = fetcher.fetch('FLAKY', start, end)
+        if len(df) != 2 or stub.count('FLAKY') != 3:
+            failures.append(f"FLAKY: expected 2 bars after 3 requests, got {len(df)} bars after {stub.count('FLAKY')}")
+        if fetcher.stats != {'requests': 3, 'retries': 2, 'failures': 0}:
+            failures.append(f"FLAKY: unexpected stats {fetcher.stats}")
+        gaps = [b - a for a, b in zip(stub.requests['FLAKY'], stub.requests['FLAKY'][1:])]
+        for attempt, gap in enumerate(gaps):
+            minimum = backoff * (2 ** attempt) * 0.5 # Jitter is 0.5x-1.5x
+            if gap < minimum:
+                failures.append(f"FLAKY: retry {attempt + 1} came after {gap:.3f}s, backoff needs >= {minimum:.3f}s")
+
+        # 2. Persistent 5xx gives up after retries + 1 requests; 404 is not retried
+        fetcher = make_fetcher(stub, backoff, retries=2)
+        fetcher.fetch_many(['DOWN', 'MISSING'], start, end)
+        if stub.count('DOWN') != 3:
+            failures.append(f"DOWN: expected 3 requests (2 retries), got {stub.count('DOWN')}")
+        if stub.count('MISSING') != 1:
+            failures.append(f"MISSING: 404 should not be retried, got {stub.count('MISSING')} requests")
+
+        # 3. Single flight: concurrent fetches of one key share one download
+        fetcher = make_fetcher(stub, backoff)
+        barrier = threading.Barrier(8)
+        results = []
+        def fetch_slow():
+            barrier.wait()
+            results.append(len(fetcher.fetch('SLOW', start, end)))
+        threads = [threading.Thread(target=fetch_slow) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if stub.count('SLOW') != 1 or results != [2] * 8:
+            failures.append(f"SLOW: 8 concurrent fetches made {stub.count('SLOW')} requests, results {results}")
+
+        # 4. fetch_many: frames and errors in input order, whatever finishes first
+        fetcher = make_fetcher(stub, backoff, retries=1)
+        symbols = ['DOWN', 'OK', 'EMPTY', 'MISSING', 'SLOW']
+        frames, errors = fetcher.fetch_many(symbols, start, end)
+        if list(frames) != ['OK', 'SLOW']:
+            failures.append(f"fetch_many frames: expected ['OK', 'SLOW'], got {list(frames)}")
+        error_symbols = [e.split(':')[0] for e in errors]
+        if error_symbols != ['DOWN', 'EMPTY', 'MISSING']:
+            failures.append(f"fetch_many errors: expected DOWN, EMPTY, MISSING in input order, got {errors}")
+        elif errors[1] != "EMPTY: Empty DF" or '500' not in errors[0] or '404' not in errors[2]:
+            failures.append(f"fetch_many error messages: {errors}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MarketDataFetcher against a local stub HTTP server")
+    parser.add_argument('--backoff', type=float, default=0.05, help="Base backoff in seconds")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()): # The downloader prints one line per request
+        failures = check(args.backoff)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("MarketDataFetcher retries, backs off, collapses in-flight fetches and reports errors in input order.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'agentCompetition'))
+
+import numpy as np
+import pandas as pd
+from technical_analysis import add_technical_indicators, detect_candlestick_patterns
+from strategy import AdvancedPatternStrategy
+from backtester import Backtester
+from benchmarks.synthetic import generate_ohlcv, generate_headlines
+from benchmarks.compare import compare, print_report
+
+STAGES = ('add_technical_indicators', 'detect_candlestick_patterns', 'score_headlines', 'generate_signals',
+          'backtest_vectorized', 'backtest_loop', 'agents_decide', 'agents_decide_vectorized')
+
+# The loop engine is O(days x symbols) pandas indexing; skip it above this many symbol-years
+LOOP_ENGINE_LIMIT = 100
+
+def measure(fn, repeat):
+    """
+    Best wall time of `repeat` runs, then one extra run under tracemalloc for peak Python heap use.
+    Progress prints and warnings from the measured code are silenced.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+def build_cases(n_symbols, years, seed):
+    """
+    Returns {stage: zero-argument callable} for one scale, with inputs prepared up front
+    so each stage is timed on its own.
+    """
+    raw = generate_ohlcv(n_symbols, years, seed=seed)
+    with_indicators = {s: add_technical_indicators(df) for s, df in raw.items()}
+    with_patterns = {s: detect_candlestick_patterns(df) for s, df in with_indicators.items()}
+
+    dates = next(iter(raw.values())).index
+    news = generate_headlines(list(raw), dates, per_day=0.5, seed=seed)
+    rng = np.random.default_rng(seed)
+    for news_df in news.values():
+        news_df['Sentiment'] = rng.uniform(-1, 1, len(news_df))
+    titles = pd.concat([n['title'] for n in news.values()], ignore_index=True)
+
+    strategy = AdvancedPatternStrategy()
+    signals = {s: strategy.generate_signals(df, news[s]) for s, df in with_patterns.items()}
+
+    cases = {
+        'add_technical_indicators': lambda: [add_technical_indicators(df) for df in raw.values()],
+        'detect_candlestick_patterns': lambda: [detect_candlestick_patterns(df) for df in with_indicators.values()],
+        'generate_signals': lambda: [strategy.generate_signals(df, news[s]) for s, df in with_patterns.items()],
+        'backtest_vectorized': lambda: Backtester(50000, engine='vectorized', verbose=False).run(signals),
+    }
+    if n_symbols * years <= LOOP_ENGINE_LIMIT:
+        cases['backtest_loop'] = lambda: Backtester(50000, engine='loop', verbose=False).run(signals)
+
+    try:
+        from sentiment_analyzer import score_headlines, get_analyzer
+        get_analyzer()
+        cases['score_headlines'] = lambda: score_headlines(titles, cache=False, processes=1)
+    except (ImportError, LookupError) as e:
+        print(f"Skipping score_headlines: {e}")
+
+    try:
+        from agents import BasicAgent, ProAgent, AggressiveAgent, Mag7Agent
+        from agents.snapshot import MarketSnapshot
+    except ImportError as e:
+        print(f"Skipping agent stages: {e}")
+        return cases
+
+    # Agents see the last 100 bars per symbol, as in run_trade_cycle
+    market_data = {s: df.iloc[-100:] for s, df in with_indicators.items()}
+    agent_classes = (BasicAgent, ProAgent, AggressiveAgent, Mag7Agent)
+
+    def holdings():
+        return {s: 10 for s in list(market_data)[::3]}
+
+    def decide():
+        for cls in agent_classes:
+            cls(cls.__name__, {'cash': 10000, 'holdings': holdings()}).decide(market_data)
+
+    def decide_vectorized():
+        snapshot = MarketSnapshot.from_market_data(market_data)
+        for cls in agent_classes:
+            cls(cls.__name__, {'cash': 10000, 'holdings': holdings()}).decide_vectorized(snapshot)
+
+    cases['agents_decide'] = decide
+    cases['agents_decide_vectorized'] = decide_vectorized
+    return cases
+
+def run(symbol_scales, year_scales, stages, repeat, seed):
+    results = []
+    for years in year_scales:
+        for n_symbols in symbol_scales:
+            print(f"\n--- {n_symbols} symbols x {years} years ---")
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                cases = build_cases(n_symbols, years, seed)
+            for stage in stages:
+                if stage not in cases:
+                    print(f"{stage:<28} {'skipped':>13}")
+                    continue
+                seconds, peak = measure(cases[stage], repeat)
+                print(f"{stage:<28} {seconds * 1000:>10.2f} ms {peak / 1e6:>10.2f} MB")
+                results.append({'stage': stage, 'symbols': n_symbols, 'years': years,
+                                'seconds': seconds, 'peak_bytes': peak})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the signal pipeline on a synthetic market")
+    parser.add_argument('--symbols', type=str, default='10,100,500', help="Comma-separated universe sizes")
+    parser.add_argument('--years', type=str, default='1,5,20', help="Comma-separated history lengths in years")
+    parser.add_argument('--stages', type=str, default=','.join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic market seed")
+    parser.add_argument('--output', type=str, default='', help="Write results JSON (baseline) to this path")
+    parser.add_argument('--compare', type=str, default='', help="Compare against a baseline JSON")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.symbols.split(',')], [float(y) if '.' in y else int(y) for y in args.years.split(',')],
+                  args.stages.split(','), args.repeat, args.seed)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.threshold)
+        print_report(rows)
+        if any(r['status'] == 'REGRESSION' for r in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from nltk.sentiment.vader import VaderConstants
+import fast_sentiment
+from sentiment_analyzer import analyze_sentiment
+from benchmarks.synthetic import generate_headlines
+
+# Hand-written cases for every VADER rule
+EDGE_CASES = [
+    "", "a", "I love this stock!", "This company is going bankrupt.", "NOT good at all",
+    "The stock is not very good but the CEO is GREAT!!!", "kind of good", "sort of bad news, but really great",
+    "never so good", "never this happy", "at least good", "very least bad", "least good",
+    "the shit is the bomb", "cut the mustard today nice", "kiss of death for this great firm",
+    "yeah right awesome", "hand to mouth good", "Bad ass good job", "great great great! great",
+    "Good, GOOD good?", "What??", "wow????", "good!!!!", "he isn't happy", "they don't like it :)",
+    "Hardly GOOD results", "EXTREMELY good", "extremely GOOD deal ok", "not,good", "'good'", "!!good",
+    "Shares plunge after weak guidance; analysts downgrade", "Record profit beats estimates, stock soars",
+]
+
+def reference_corpus(n_random=20000, seed=0):
+    """
+    Edge cases, synthetic headlines, and random word salads drawn from the lexicon and
+    VADER's modifier words with random ALL CAPS, capitalisation and edge punctuation.
+    """
+    rng = np.random.default_rng(seed)
+    constants = VaderConstants
+    news = generate_headlines([f"SYN{i:04d}" for i in range(20)], pd.bdate_range('2020-01-01', periods=250), seed=seed)
+    headlines = pd.concat(news.values())['title'].tolist()
+
+    modifiers = (list(constants.NEGATE) + list(constants.BOOSTER_DICT)
+                 + [w for phrase in constants.SPECIAL_CASE_IDIOMS for w in phrase.split()]
+                 + ['but', 'least', 'at', 'very', 'never', 'so', 'this', 'kind', 'of', 'I', 'stock']
+                 + ['.', '!', '?', ',', '!!', '???', "'", '"', '-'])
+    pool = list(fast_sentiment.get_lexicon()) + modifiers * 30
+    salads = []
+    for _ in range(n_random):
+        words = []
+        for _ in range(rng.integers(0, 16)):
+            word = str(pool[rng.integers(len(pool))])
+            r = rng.random()
+            if r < 0.1:
+                word = word.upper()
+            elif r < 0.15:
+                word = word.capitalize()
+            r = rng.random()
+            if r < 0.1:
+                word = word + str(rng.choice(constants.PUNC_LIST))
+            elif r < 0.15:
+                word = str(rng.choice(constants.PUNC_LIST)) + word
+            words.append(word)
+        salads.append(' '.join(words))
+    return EDGE_CASES + headlines + salads
+
+def check(corpus):
+    """
+    Returns (max |fast - analyze_sentiment|, number of differing texts, failure list).
+    """
+    reference = np.array([analyze_sentiment(text) for text in corpus])
+    fast = fast_sentiment.compound_scores(corpus)
+    diff = np.abs(reference - fast)
+    failures = [f"{corpus[k]!r}: vader {reference[k]} fast {fast[k]}" for k in np.flatnonzero(diff > fast_sentiment.TOLERANCE)]
+    return float(diff.max()), int((diff > 0).sum()), failures
+
+def timing(corpus, repeat=3):
+    """
+    Headlines per second for both scorers (VADER timed once: it is the slow one).
+    """
+    fast_sentiment.compound_scores(corpus[:100]) # Load the lexicon outside the timing
+    start = time.perf_counter()
+    for text in corpus:
+        analyze_sentiment(text)
+    vader = time.perf_counter() - start
+
+    fast = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fast_sentiment.compound_scores(corpus)
+        fast = min(fast, time.perf_counter() - start)
+    return {'vader': len(corpus) / vader, 'fast': len(corpus) / fast}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check fast_sentiment against NLTK VADER and time both")
+    parser.add_argument('--random', type=int, default=20000, help="Random word-salad texts in the reference corpus")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = reference_corpus(args.random, args.seed)
+    max_diff, n_diff, failures = check(corpus)
+    for failure in failures[:20]:
+        print(f"FAIL: {failure}")
+    print(f"{len(corpus)} texts: max |difference| {max_diff:.1e} ({n_diff} differ, tolerance {fast_sentiment.TOLERANCE:.0e})")
+
+    headlines = corpus[len(EDGE_CASES):len(corpus) - args.random]
+    for name, texts in (('headlines', headlines), ('reference corpus', corpus)):
+        rates = timing(texts)
+        print(f"{name:<18} vader {rates['vader']:>10,.0f}/s   fast {rates['fast']:>10,.0f}/s   ({rates['fast'] / rates['vader']:.1f}x)")
+
+    if failures:
+        sys.exit(1)
+    print("fast_sentiment matches analyze_sentiment within tolerance.")
+
+if __name__ == "__main__":
+    main()
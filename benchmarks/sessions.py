@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+from news_archive import NewsArchive
+from sentiment_panel import SESSION_CLOSE, SentimentPanel, bar_calendar
+
+# Thu 2024-01-04 .. Tue 2024-01-09, exchange-time daily bars
+BARS = pd.date_range('2024-01-04', '2024-01-09', freq='B', tz='America/New_York', name='Date')
+
+# (timestamp as it arrives, session the headline must count for)
+CASES = [
+    ('2024-01-04 09:00', '2024-01-04'),          # Before the close: same day
+    ('2024-01-04 18:00', '2024-01-05'),          # After the close: next session
+    ('2024-01-05 16:00', '2024-01-08'),          # At Friday's close: Monday
+    ('2024-01-06', '2024-01-08'),                # Weekend, date only: Monday
+    ('2024-01-08T22:30:00Z', '2024-01-09'),      # UTC stamp, 17:30 ET: after Monday's close
+]
+
+def sessions(panel, symbols):
+    # Session each symbol's only headline landed on (first bar where the mean leaves 0)
+    frame = panel.feature('mean')
+    return {symbol: str(frame.index[frame[symbol].to_numpy() != 0][0].date()) for symbol in symbols}
+
+def check():
+    """
+    Every headline in CASES must land on its expected bar, both straight from timestamped
+    news (the live path) and after a round trip through a dump import and the news archive.
+    Returns a list of failures.
+    """
+    symbols = [f"S{i}" for i in range(len(CASES))]
+    calendar = bar_calendar({'bars': pd.DataFrame(index=BARS)})
+    expected = {symbol: session for symbol, (_, session) in zip(symbols, CASES)}
+    failures = []
+
+    # Live path: naive exchange-time stamps (as GoogleNews returns them), then the same instants as UTC
+    stamps = pd.DatetimeIndex([pd.Timestamp(stamp).tz_localize('America/New_York') if pd.Timestamp(stamp).tz is None
+                               else pd.Timestamp(stamp).tz_convert('America/New_York') for stamp, _ in CASES])
+    for name, dates in (('naive', stamps.tz_localize(None)), ('UTC', stamps.tz_convert('UTC'))):
+        news = pd.DataFrame({'symbol': symbols, 'Date': dates, 'Sentiment': 0.5})
+        live = sessions(SentimentPanel.from_news(news, calendar, symbols=symbols, session_close=SESSION_CLOSE), symbols)
+        failures += [f"from_news ({name}): {CASES[k][0]} counted for {live[s]}, expected {expected[s]}"
+                     for k, s in enumerate(symbols) if live[s] != expected[s]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, 'dump.csv')
+        pd.DataFrame({'symbol': symbols, 'published': [stamp for stamp, _ in CASES],
+                      'title': 'Record profit beats estimates'}).to_csv(dump, index=False)
+        archive = NewsArchive(os.path.join(tmp, 'news.sqlite'))
+        archive.import_file(dump)
+        panel = SentimentPanel.from_archive(symbols, '2024-01-01', '2024-01-09', calendar, archive=archive,
+                                            session_close=SESSION_CLOSE)
+        archived = sessions(panel, symbols)
+    failures += [f"archive: {CASES[k][0]} counted for {archived[s]}, expected {expected[s]}"
+                 for k, s in enumerate(symbols) if archived[s] != expected[s]]
+    return failures
+
+def main():
+    failures = check()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"Headlines land on the right session ({len(CASES)} cases, close at {SESSION_CLOSE}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'agentCompetition')
+
+# Cold-start budget for the agentCompetition app (seconds)
+IMPORT_BUDGET = 0.5
+FIRST_REQUEST_BUDGET = 0.05
+
+# Must stay off the startup path; they belong to the trading cycle only
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance', 'GoogleNews', 'ta', 'requests')
+
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import app
+import_seconds = time.perf_counter() - start
+
+client = app.app.test_client()
+requests = {}
+agents = None
+for path in ('/', '/api/stats', '/api/metrics'):
+    start = time.perf_counter()
+    response = client.get(path)
+    requests[path] = {'status': response.status_code, 'seconds': time.perf_counter() - start}
+    if path == '/api/stats' and response.status_code == 200:
+        agents = len(response.get_json()['agents'])
+
+print(json.dumps({'import_seconds': import_seconds, 'requests': requests, 'agents': agents,
+                  'db_path': app.STORE.path if app.STORE is not None else None,
+                  'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+def measure_cold_start(read_only=False):
+    """
+    Imports a copy of the app in a fresh interpreter (cold module cache, default database
+    path, no AGENT_DB_PATH) and times the import plus the first read-only requests.
+    read_only: the database cannot be created in the data directory, as on a Vercel deploy;
+    the app must fall back to the temp directory and still serve the bundled JSON.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        app_dir = os.path.join(tmp, 'app')
+        shutil.copytree(APP_DIR, app_dir, ignore=shutil.ignore_patterns('__pycache__', '*.sqlite*', 'profiles'))
+        data_dir = os.path.join(app_dir, 'data')
+        if read_only:
+            # Mode bits alone do not stop root, so also occupy the database path with a directory
+            os.mkdir(os.path.join(data_dir, 'competition.sqlite'))
+            os.chmod(data_dir, stat.S_IRUSR | stat.S_IXUSR)
+        env = {k: v for k, v in os.environ.items() if k != 'AGENT_DB_PATH'}
+        env['TMPDIR'] = os.path.join(tmp, 'tmp') # Where the fallback database goes
+        os.mkdir(env['TMPDIR'])
+        probe = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n" + PROBE
+        try:
+            result = subprocess.run([sys.executable, '-c', probe], cwd=app_dir, env=env,
+                                    capture_output=True, text=True, timeout=120)
+        finally:
+            os.chmod(data_dir, stat.S_IRWXU)
+    if result.returncode != 0:
+        raise RuntimeError(f"App import failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['fallback'] = report['db_path'] is not None and report['db_path'].startswith(env['TMPDIR'])
+    return report
+
+def bundled_agents():
+    with open(os.path.join(APP_DIR, 'data', 'agents.json')) as f:
+        return len(json.load(f))
+
+def check_read_only(report):
+    """
+    Returns a list of failures for a read-only cold start: every route must still answer,
+    from a temp-directory database seeded with the bundled JSON.
+    """
+    failures = [f"read-only: {path} returned {r['status']}" for path, r in report['requests'].items() if r['status'] != 200]
+    if not report['fallback']:
+        failures.append(f"read-only: store opened at {report['db_path']}, not the temp directory")
+    if report['agents'] != bundled_agents():
+        failures.append(f"read-only: /api/stats served {report['agents']} agents, agents.json has {bundled_agents()}")
+    return failures
+
+def check(report, import_budget=IMPORT_BUDGET, request_budget=FIRST_REQUEST_BUDGET):
+    """
+    Returns a list of budget violations (empty when the cold start is within budget).
+    """
+    failures = []
+    if report['import_seconds'] > import_budget:
+        failures.append(f"import took {report['import_seconds'] * 1000:.0f} ms (budget {import_budget * 1000:.0f} ms)")
+    for path, r in report['requests'].items():
+        if r['status'] != 200:
+            failures.append(f"{path} returned {r['status']}")
+        elif r['seconds'] > request_budget:
+            failures.append(f"{path} took {r['seconds'] * 1000:.1f} ms (budget {request_budget * 1000:.0f} ms)")
+    if report['heavy_modules']:
+        failures.append(f"heavy modules imported at startup: {', '.join(report['heavy_modules'])}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the agentCompetition cold-start budget")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET, help="Seconds allowed for 'import app'")
+    parser.add_argument('--request-budget', type=float, default=FIRST_REQUEST_BUDGET, help="Seconds allowed per first request")
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts to measure (best is checked)")
+    args = parser.parse_args()
+
+    reports = [measure_cold_start() for _ in range(args.runs)]
+    best = min(reports, key=lambda r: r['import_seconds'])
+
+    print(f"import app: {best['import_seconds'] * 1000:.0f} ms")
+    for path, r in best['requests'].items():
+        print(f"GET {path:<14} {r['status']} {r['seconds'] * 1000:.1f} ms")
+
+    failures = check(best, args.import_budget, args.request_budget)
+    read_only = measure_cold_start(read_only=True)
+    print(f"read-only data dir: store at {read_only['db_path']}, {read_only['agents']} agents served")
+    failures += check_read_only(read_only)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("Startup within budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'agentCompetition'))
+
+import numpy as np
+import stops
+from backtester import Backtester
+from strategy import AdvancedPatternStrategy
+from technical_analysis import add_technical_indicators, detect_candlestick_patterns
+from benchmarks.synthetic import generate_ohlcv
+
+# Capital large enough that no entry is ever skipped for lack of cash
+AMPLE_CASH = 1e12
+
+def prepare(n_symbols, years, seed):
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        raw = generate_ohlcv(n_symbols, years, seed=seed)
+        strategy = AdvancedPatternStrategy()
+        return {s: strategy.generate_signals(detect_candlestick_patterns(add_technical_indicators(df))) for s, df in raw.items()}
+
+def compare_path(close, exits, holding_periods, stop_bars, kernel_stops, kernel_highest):
+    """
+    Checks the kernel against a reference run: same stop-exit bars, and while a position is
+    held (buy bar through exit bar) the high-water mark is the running max close since entry.
+    A stop on a bar that also has an exit signal looks like a plain exit in the reference,
+    so stop bars are compared where there is no exit signal (the holding periods cover the rest).
+    Returns a list of mismatch descriptions.
+    """
+    failures = []
+    kernel_stops = kernel_stops[~exits[kernel_stops]]
+    if sorted(stop_bars) != kernel_stops.tolist():
+        failures.append(f"stop exits differ: reference {sorted(stop_bars)[:10]} vs kernel {kernel_stops.tolist()[:10]}")
+
+    expected = np.full(len(close), np.nan)
+    for buy, sell in holding_periods:
+        expected[buy:sell + 1] = np.fmax.accumulate(close[buy:sell + 1])
+    if not np.array_equal(expected, kernel_highest, equal_nan=True):
+        bad = np.flatnonzero(~((expected == kernel_highest) | (np.isnan(expected) & np.isnan(kernel_highest))))
+        failures.append(f"high-water mark differs on {len(bad)} bars, first at bar {bad[0]}")
+    return failures
+
+def check_backtester(df, multiplier=4.0):
+    """
+    Backtester (loop engine) on one symbol with ample cash: every Signal == 1 on a flat
+    symbol opens a position, so its trades are the kernel's path with entries = Signal == 1
+    and exits = Signal == -1.
+    """
+    backtester = Backtester(AMPLE_CASH, trailing_stop_atr_multiplier=multiplier, engine='loop', verbose=False)
+    _, trades = backtester.run({'SYM': df})
+    position = {date: i for i, date in enumerate(df.index)}
+    signal = df['Signal'].to_numpy()
+
+    periods, stop_bars, buy = [], [], None
+    for trade in trades:
+        bar = position[trade['Date']]
+        if trade['Type'] == 'BUY':
+            buy = bar
+        else:
+            periods.append((buy, bar))
+            if signal[bar] != -1:
+                stop_bars.append(bar)
+            buy = None
+    if buy is not None:
+        periods.append((buy, len(df) - 1))
+
+    kernel_stops, highest = stops.trailing_stop_path(df['Close'], df['ATR'], signal == 1, multiplier, exits=signal == -1)
+    return compare_path(df['Close'].to_numpy(), signal == -1, periods, stop_bars, kernel_stops, highest)
+
+def check_agent(agent_class, multiplier, df):
+    """
+    Steps an agent through every bar of one symbol (orders filled at the close). Entry and
+    exit signals come from probing the agent's own rules on each bar while flat / while held
+    with a fresh stop; the path-dependent stop must then match the kernel.
+    """
+    symbol = 'SYM'
+    agent = agent_class('check', {'cash': AMPLE_CASH, 'holdings': {}})
+    entries, exits = np.zeros(len(df), dtype=bool), np.zeros(len(df), dtype=bool)
+    periods, stop_bars, buy = [], [], None
+
+    for t in range(len(df)):
+        bar = {symbol: df.iloc[t:t + 1]}
+        price = df['Close'].iloc[t]
+        flat_probe = agent_class('probe', {'cash': AMPLE_CASH, 'holdings': {}})
+        entries[t] = any(o['action'] == 'BUY' for o in flat_probe.decide(bar))
+        held_probe = agent_class('probe', {'cash': AMPLE_CASH, 'holdings': {symbol: 1}})
+        exits[t] = any(o['action'] == 'SELL' for o in held_probe.decide(bar))
+
+        for order in agent.decide(bar):
+            agent.execute_trade(symbol, order['action'], price, order['shares'], df.index[t])
+            if order['action'] == 'BUY':
+                buy = t
+            else:
+                periods.append((buy, t))
+                if not exits[t]:
+                    stop_bars.append(t)
+                buy = None
+    if buy is not None:
+        periods.append((buy, len(df) - 1))
+
+    kernel_stops, highest = stops.trailing_stop_path(df['Close'], df['ATR'], entries, multiplier, exits=exits)
+    return compare_path(df['Close'].to_numpy(), exits, periods, stop_bars, kernel_stops, highest)
+
+def check_paths(data_dict, multiplier=4.0):
+    """
+    The compiled (if available), scalar and cross-sectional paths agree, and a 2D call equals per-symbol calls.
+    """
+    close = np.column_stack([df['Close'].to_numpy() for df in data_dict.values()])
+    atr = np.column_stack([df['ATR'].to_numpy() for df in data_dict.values()])
+    signal = np.column_stack([df['Signal'].to_numpy() for df in data_dict.values()])
+    close[::7, ::3] = np.nan # Bars without data
+
+    failures = []
+    shape_args = (close, atr, signal == 1, signal == -1, multiplier)
+    results = {}
+    for name, fn in (('scalar', stops._path_scalar), ('cross_section', stops._path_cross_section)):
+        hits, highest = np.zeros(close.shape, dtype=bool), np.full(close.shape, np.nan)
+        fn(*shape_args, hits, highest)
+        results[name] = (hits, highest)
+    (hits_a, high_a), (hits_b, high_b) = results.values()
+    if not (np.array_equal(hits_a, hits_b) and np.array_equal(high_a, high_b, equal_nan=True)):
+        failures.append("scalar and cross-sectional paths differ")
+
+    (rows, cols), highest = stops.trailing_stop_path(close, atr, signal == 1, multiplier, exits=signal == -1)
+    for j in range(close.shape[1]):
+        single_stops, single_highest = stops.trailing_stop_path(close[:, j], atr[:, j], signal[:, j] == 1, multiplier, exits=signal[:, j] == -1)
+        if not (np.array_equal(rows[cols == j], single_stops) and np.array_equal(highest[:, j], single_highest, equal_nan=True)):
+            failures.append(f"2D path differs from the 1D path for column {j}")
+            break
+    mask = np.zeros(close.shape, dtype=bool)
+    mask[rows, cols] = True
+    if not (np.array_equal(mask, hits_a) and np.array_equal(highest, high_a, equal_nan=True)):
+        failures.append("trailing_stop_path differs from the reference path")
+    return failures
+
+def timing(data_dict, multiplier=4.0, repeat=3):
+    close = np.column_stack([df['Close'].to_numpy() for df in data_dict.values()])
+    atr = np.column_stack([df['ATR'].to_numpy() for df in data_dict.values()])
+    signal = np.column_stack([df['Signal'].to_numpy() for df in data_dict.values()])
+
+    def best(fn):
+        seconds = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            seconds = min(seconds, time.perf_counter() - start)
+        return seconds
+
+    results = {'trailing_stop_path': best(lambda: stops.trailing_stop_path(close, atr, signal == 1, multiplier, exits=signal == -1))}
+    hits, highest = np.zeros(close.shape, dtype=bool), np.full(close.shape, np.nan)
+    results['scalar (Python)'] = best(lambda: stops._path_scalar(close, atr, signal == 1, signal == -1, multiplier, hits, highest))
+    results['cross_section (NumPy)'] = best(lambda: stops._path_cross_section(close, atr, signal == 1, signal == -1, multiplier, hits, highest))
+    return results
+
+def check(n_symbols=5, years=8, seed=0):
+    """
+    Returns a list of equivalence failures (empty when the kernel matches every implementation).
+    """
+    from agents import ProAgent, AggressiveAgent
+
+    data_dict = prepare(n_symbols, years, seed)
+    failures = []
+    for symbol, df in data_dict.items():
+        failures += [f"Backtester {symbol}: {f}" for f in check_backtester(df, 4.0)]
+        failures += [f"ProAgent {symbol}: {f}" for f in check_agent(ProAgent, 2.0, df)]
+        failures += [f"AggressiveAgent {symbol}: {f}" for f in check_agent(AggressiveAgent, 4.0, df)]
+    failures += check_paths(data_dict)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the trailing-stop kernel against the Backtester and agents, and time it")
+    parser.add_argument('--symbols', type=int, default=5, help="Synthetic symbols for the equivalence check")
+    parser.add_argument('--years', type=int, default=8, help="Synthetic history length in years")
+    parser.add_argument('--timing-symbols', type=int, default=200, help="Universe size for the timing run")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"JIT: {'numba' if stops.njit is not None else 'not available (NumPy/Python fallback)'}")
+    failures = check(args.symbols, args.years, args.seed)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    universe = prepare(args.timing_symbols, args.years, args.seed)
+    for name, seconds in timing(universe).items():
+        print(f"{name:<24} {seconds * 1000:>10.2f} ms ({args.timing_symbols} symbols x {args.years} years)")
+
+    if failures:
+        sys.exit(1)
+    print("Trailing-stop kernel matches Backtester, ProAgent and AggressiveAgent.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+POSITIVE_WORDS = ['beats', 'soars', 'record', 'upgrade', 'strong', 'growth', 'rally', 'profit', 'wins', 'surges']
+NEGATIVE_WORDS = ['misses', 'plunges', 'downgrade', 'weak', 'lawsuit', 'loss', 'crash', 'recall', 'fraud', 'slumps']
+NEUTRAL_WORDS = ['announces', 'reports', 'earnings', 'quarter', 'update', 'shares', 'market', 'guidance', 'ceo', 'deal']
+
+def symbol_names(n_symbols):
+    return [f"SYN{i:04d}" for i in range(n_symbols)]
+
+def generate_ohlcv(n_symbols=10, years=1, start='2000-01-03', seed=0):
+    """
+    Deterministic random-walk OHLCV universe: {symbol: DataFrame} shaped like fetch_stock_data output.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = int(years * TRADING_DAYS_PER_YEAR)
+    index = pd.bdate_range(start, periods=n_days, name='Date')
+
+    data = {}
+    for symbol in symbol_names(n_symbols):
+        drift = rng.normal(0.0003, 0.0002)
+        vol = rng.uniform(0.01, 0.03)
+        close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(drift, vol, n_days)))
+        open_ = close * (1 + rng.normal(0, vol / 2, n_days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n_days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n_days)))
+        volume = rng.integers(100_000, 10_000_000, n_days)
+        data[symbol] = pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+            'Dividends': 0.0, 'Stock Splits': 0.0,
+        }, index=index)
+    return data
+
+def generate_headlines(symbols, dates, per_day=1.0, seed=0):
+    """
+    Deterministic fake headlines: {symbol: DataFrame[Date, title]} shaped like fetch_news output.
+    per_day is the average number of headlines per symbol per date.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(dates)
+    vocab = np.array(POSITIVE_WORDS + NEGATIVE_WORDS + NEUTRAL_WORDS)
+
+    news = {}
+    for symbol in symbols:
+        n = rng.poisson(per_day * len(dates))
+        picked = np.sort(rng.integers(0, len(dates), n))
+        words = vocab[rng.integers(0, len(vocab), (n, 5))]
+        titles = [f"{symbol} " + ' '.join(w) for w in words]
+        news[symbol] = pd.DataFrame({'Date': dates[picked], 'title': titles})
+    return news
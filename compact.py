@@ -0,0 +1,47 @@
+# Compact frame layout (opt-in, e.g. main.py --compact).
+#
+# Only the columns read by detect_candlestick_patterns, AdvancedPatternStrategy and the
+# Backtester are kept; prices and indicators are stored as float32 and Score/Signal as int8.
+# Indicators are still computed in float64 and rounded once when stored.
+#
+# Tolerance vs the float64 layout: every stored price/indicator is within float32 rounding
+# (relative error <= 2**-24, about 6e-8). A signal only differs where two compared values
+# (e.g. SMA_20 vs SMA_50) are closer than that: 0 of 63k cells on a synthetic 50-symbol x
+# 5-year universe (identical trades, equity within 7e-8) and 4 of 2.5M cells on 500 x 20
+# years. The backtest is path dependent (cash allocation follows every earlier trade), so
+# one flipped signal can shift later trades: in that 500 x 20 run final equity differed
+# by 2% (3.5% at worst along the curve). Use float64 when exact reproduction matters.
+
+import numpy as np
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+FLOAT_DTYPE = np.float32
+SIGNAL_DTYPE = np.int8
+
+# Default float64 layout of one fully processed row, for the bytes-saved report
+FULL_LAYOUT = {
+    'Open': 8, 'High': 8, 'Low': 8, 'Close': 8, 'Volume': 8, 'Dividends': 8, 'Stock Splits': 8,
+    'SMA_20': 8, 'SMA_50': 8, 'RSI': 8, 'MACD': 8, 'MACD_Signal': 8, 'BB_High': 8, 'BB_Low': 8,
+    'Stoch_K': 8, 'Stoch_D': 8, 'ATR': 8, 'Patterns': 4, 'Bullish_Engulfing': 1, 'Hammer': 1, 'Signal': 8, 'Score': 8,
+}
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def full_nbytes(df):
+    """
+    Bytes the same rows would take in the default float64 layout (plus Sentiment if present).
+    """
+    row_bytes = sum(FULL_LAYOUT.values()) + (8 if 'Sentiment' in df.columns else 0)
+    return len(df) * row_bytes + int(df.index.memory_usage())
+
+def memory_report(frames):
+    """
+    Prints and returns (compact bytes, float64-layout bytes) over {symbol: compact df}.
+    """
+    compact = sum(frame_nbytes(df) for df in frames.values())
+    full = sum(full_nbytes(df) for df in frames.values())
+    saved = full - compact
+    print(f"Compact mode: {compact / 1e6:.1f} MB vs {full / 1e6:.1f} MB in float64 "
+          f"(saved {saved / 1e6:.1f} MB, {100 * saved / full if full else 0:.0f}%)")
+    return compact, full
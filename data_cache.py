@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime, date
+
+CACHE_DIR = os.environ.get('STOCKS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache'))
+
+class OHLCVCache:
+    """
+    On-disk OHLCV cache, one compact columnar file per symbol.
+
+    Each file is an uncompressed .npz archive holding one NumPy array per column,
+    the bar index as int64 nanoseconds, and the list of [start, end) date ranges
+    that have already been fetched. Only ranges that are not covered yet are
+    downloaded, new bars are merged in, and fully covered requests never touch the network.
+    Each bar interval ('1d', '5m', '1m', ...) is cached in its own file.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, interval='1d'):
+        self.cache_dir = cache_dir
+        self.interval = interval
+
+    def path(self, symbol):
+        suffix = '' if self.interval == '1d' else f"_{self.interval}"
+        return os.path.join(self.cache_dir, f"{symbol.upper()}{suffix}.npz")
+
+    def load(self, symbol):
+        """
+        Returns (df, covered) for a symbol. covered is a sorted list of [start, end) date pairs.
+        """
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return pd.DataFrame(), []
+
+        with np.load(path, allow_pickle=False) as archive:
+            columns = [str(c) for c in archive['__columns__']]
+            tz = str(archive['__tz__'])
+            index = pd.DatetimeIndex(archive['__index__'].astype('datetime64[ns]'), name='Date')
+            if tz:
+                index = index.tz_localize('UTC').tz_convert(tz)
+            df = pd.DataFrame({c: archive[c] for c in columns}, index=index)
+            covered = [(s.astype(object), e.astype(object)) for s, e in archive['__covered__']]
+        return df, covered
+
+    def save(self, symbol, df, covered):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index = df.index
+        tz = str(index.tz) if getattr(index, 'tz', None) is not None else ''
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        arrays = {
+            '__columns__': np.array(list(df.columns), dtype=str),
+            '__tz__': np.array(tz),
+            '__index__': index.values.astype('datetime64[ns]').astype(np.int64),
+            '__covered__': np.array(covered, dtype='datetime64[D]').reshape(-1, 2),
+        }
+        for column in df.columns:
+            arrays[column] = df[column].to_numpy()
+
+        # Write to a temp file and swap it in so a crash never leaves a half-written cache
+        path = self.path(symbol)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def missing_ranges(self, symbol, start_date, end_date, covered=None):
+        """
+        Returns the [start, end) sub-ranges of the request that are not cached yet.
+        """
+        if covered is None:
+            _, covered = self.load(symbol)
+        return _missing_ranges(covered, start_date, end_date)
+
+    def is_cached(self, symbol, start_date, end_date):
+        return not self.missing_ranges(symbol, start_date, end_date)
+
+    def get(self, symbol, start_date, end_date, fetcher):
+        """
+        Returns bars for [start_date, end_date), calling fetcher(symbol, start, end) only for missing ranges.
+        fetcher receives 'YYYY-MM-DD' strings and must return a DataFrame indexed by date.
+        """
+        df, covered = self.load(symbol)
+        missing = self.missing_ranges(symbol, start_date, end_date, covered)
+
+        if missing:
+            new_bars = []
+            newly_covered = False
+            for range_start, range_end in missing:
+                new_df = fetcher(symbol, range_start.strftime('%Y-%m-%d'), range_end.strftime('%Y-%m-%d'))
+                # An empty result may be a failed download, so only ranges that returned bars count as covered,
+                # unless the range has no trading days at all (a weekend)
+                if new_df is not None and not new_df.empty:
+                    new_bars.append(new_df)
+                elif np.busday_count(range_start, range_end) > 0:
+                    continue
+                covered = _add_range(covered, range_start, range_end)
+                newly_covered = True
+
+            if newly_covered:
+                if new_bars:
+                    df = pd.concat([df] + new_bars) if not df.empty else pd.concat(new_bars)
+                    df = df[~df.index.duplicated(keep='last')].sort_index()
+                    df.index.name = 'Date'
+                try:
+                    self.save(symbol, df, covered)
+                except OSError as e:
+                    # Read-only filesystems (e.g. serverless) still get the fetched data
+                    print(f"Warning: Could not write cache for {symbol}: {e}")
+
+        return _slice_dates(df, start_date, end_date)
+
+def _to_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _missing_ranges(covered, start_date, end_date):
+    """
+    Returns the [start, end) sub-ranges of the request not in the sorted `covered` list.
+    """
+    start, end = _to_date(start_date), _to_date(end_date)
+
+    missing = []
+    cursor = start
+    for cov_start, cov_end in covered:
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            missing.append((cursor, cov_start))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+def _add_range(covered, start, end):
+    """
+    Marks [start, end) as fetched. Today's bar is still forming, so coverage stops at today
+    and the current session is always re-fetched.
+    """
+    end = min(end, date.today())
+    if start >= end:
+        return covered
+
+    merged = []
+    for cov_start, cov_end in sorted(covered + [(start, end)]):
+        if merged and cov_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], cov_end))
+        else:
+            merged.append((cov_start, cov_end))
+    return merged
+
+def _slice_dates(df, start_date, end_date):
+    if df.empty:
+        return df
+    index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    start = pd.Timestamp(_to_date(start_date))
+    end = pd.Timestamp(_to_date(end_date))
+    return df[(index >= start) & (index < end)]
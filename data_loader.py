@@ -6,6 +6,15 @@ import time
 import random
 from io import StringIO
 import requests
+from data_cache import OHLCVCache
+from news_archive import NewsArchive
+from screener import MomentumScreener, DEFAULT_WINDOWS
+
+_caches = {} # {interval: OHLCVCache}
+_news_archive = None
+
+# Bar sizes yfinance serves; intraday history is limited (1m: last 30 days, <= 60 days below 1h)
+INTERVALS = ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d')
 
 def get_sp500_tickers():
     """
@@ -28,39 +37,16 @@ def get_sp500_tickers():
         print(f"Error fetching S&P 500 list: {e}")
         return []
 
-def select_top_momentum_stocks(tickers, reference_date, top_n=10):
+def select_top_momentum_stocks(tickers, reference_date, top_n=10, windows=DEFAULT_WINDOWS):
     """
-    Selects the top N stocks based on 6-month momentum prior to reference_date.
+    Selects the top N stocks based on momentum prior to reference_date
+    (6-month lookback by default; see screener.MomentumScreener for other windows).
+    Closes come from a cached universe panel, so repeat scans need no downloads.
     """
     print(f"Scanning {len(tickers)} stocks for top {top_n} momentum winners...")
     
-    end_date = datetime.strptime(reference_date, '%Y-%m-%d')
-    start_date = end_date - timedelta(days=180) # 6 months lookback
-    
     try:
-        # Bulk download is faster
-        # yfinance expects space-separated string
-        tickers_str = " ".join(tickers)
-        data = yf.download(tickers_str, start=start_date, end=end_date, progress=True)['Close']
-        
-        # Calculate Return: (End Price - Start Price) / Start Price
-        # We use the first valid index and the last valid index for each column
-        returns = {}
-        
-        for ticker in tickers:
-            if ticker in data.columns:
-                series = data[ticker].dropna()
-                if not series.empty:
-                    start_price = series.iloc[0]
-                    end_price = series.iloc[-1]
-                    if start_price > 0:
-                        ret = (end_price - start_price) / start_price
-                        returns[ticker] = ret
-        
-        # Sort by return descending
-        sorted_tickers = sorted(returns.items(), key=lambda x: x[1], reverse=True)
-        top_tickers = [t[0] for t in sorted_tickers[:top_n]]
-        
+        top_tickers = MomentumScreener(windows).top(tickers, reference_date, top_n=top_n)
         print(f"Top {top_n} Momentum Stocks: {top_tickers}")
         return top_tickers
         
@@ -68,18 +54,70 @@ def select_top_momentum_stocks(tickers, reference_date, top_n=10):
         print(f"Error in momentum selection: {e}")
         return tickers[:top_n] # Fallback
 
-def fetch_stock_data(symbol, start_date, end_date):
+def fetch_stock_data(symbol, start_date, end_date, use_cache=True, interval='1d'):
     """
     Fetches historical stock data using yfinance.
+    interval: bar size, '1d' by default or an intraday size such as '5m' (see INTERVALS).
+    Bars already in the local cache are reused; only missing date ranges are downloaded.
+    """
+    if not use_cache:
+        return _download_stock_data(symbol, start_date, end_date, interval)
+    return _get_cache(interval).get(symbol, start_date, end_date,
+                                    lambda s, start, end: _download_stock_data(s, start, end, interval))
+
+def is_stock_data_cached(symbol, start_date, end_date, interval='1d'):
+    """
+    True if fetch_stock_data would be served entirely from the local cache.
     """
-    print(f"Fetching stock data for {symbol} from {start_date} to {end_date}...")
+    return _get_cache(interval).is_cached(symbol, start_date, end_date)
+
+def _get_cache(interval):
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval: {interval}")
+    if interval not in _caches:
+        _caches[interval] = OHLCVCache(interval=interval)
+    return _caches[interval]
+
+def _download_stock_data(symbol, start_date, end_date, interval='1d'):
+    print(f"Fetching {interval} stock data for {symbol} from {start_date} to {end_date}...")
     ticker = yf.Ticker(symbol)
-    df = ticker.history(start=start_date, end=end_date)
+    df = ticker.history(start=start_date, end=end_date, interval=interval)
+    df.index.name = 'Date' # Intraday history comes back indexed as 'Datetime'
     return df
 
-def fetch_news(symbol, start_date, end_date):
+def fetch_news(symbol, start_date, end_date, use_archive=True, offline=False):
+    """
+    Fetches news headlines for a given symbol within a date range (end_date inclusive).
+    Headlines are kept in the local news archive (see news_archive.py): only date ranges
+    not fetched before go to the network. offline=True returns archived headlines only.
+    """
+    if not use_archive:
+        news_df = _download_news(symbol, start_date, end_date)
+        return pd.DataFrame() if news_df is None else news_df
+
+    archive = _get_news_archive()
+    if offline:
+        news_df = archive.query(symbol, start_date, end_date)
+    else:
+        news_df = archive.get(symbol, start_date, end_date, _download_news)
+    return news_df if not news_df.empty else pd.DataFrame()
+
+def is_news_cached(symbol, start_date, end_date):
+    """
+    True if fetch_news would be served entirely from the news archive.
+    """
+    return _get_news_archive().is_covered(symbol, start_date, end_date)
+
+def _get_news_archive():
+    global _news_archive
+    if _news_archive is None:
+        _news_archive = NewsArchive()
+    return _news_archive
+
+def _download_news(symbol, start_date, end_date):
     """
-    Fetches news headlines for a given symbol within a date range.
+    Scrapes one GoogleNews page for the range.
+    Returns a DataFrame [Date, title] (empty if there is no news) or None if the fetch failed.
     """
     print(f"Fetching news for {symbol}...")
     googlenews = GoogleNews()
@@ -105,11 +143,11 @@ def fetch_news(symbol, start_date, end_date):
                 time.sleep(random.uniform(2, 4)) 
             except Exception as e:
                 print(f"Warning: Could not fetch news page {i}: {e}")
-                break
+                return None # Possibly rate limited: leave the range to be retried
             
         if not results:
             print("No news found.")
-            return pd.DataFrame()
+            return pd.DataFrame(columns=['Date', 'title'])
 
         news_df = pd.DataFrame(results)
         
@@ -131,14 +169,14 @@ def fetch_news(symbol, start_date, end_date):
         
         if news_df.empty:
              print("Could not parse dates for news items.")
-             return pd.DataFrame()
+             return pd.DataFrame(columns=['Date', 'title'])
 
-        news_df['Date'] = pd.to_datetime(news_df['Date']).dt.normalize() # Remove time component
+        news_df['Date'] = pd.to_datetime(news_df['Date']) # Time of day decides the session (see SentimentPanel)
         return news_df[['Date', 'title']]
 
     except Exception as e:
         print(f"Error fetching news: {e}")
-        return pd.DataFrame()
+        return None
 
 if __name__ == "__main__":
     # Test
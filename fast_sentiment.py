@@ -0,0 +1,270 @@
+# Bulk VADER compound scores (sentiment_analyzer.score_headlines(backend='fast')).
+#
+# NLTK's SentimentIntensityAnalyzer runs its rules token by token in Python. Here a batch
+# of headlines is split once, every distinct token is looked up once in tables compiled
+# from the same lexicon and VaderConstants (valence, booster, negation, caps, ...), and
+# the rules then run as NumPy operations over all tokens of the batch at once:
+# ALL-CAPS emphasis, boosters/dampeners up to 3 words back, negation, "never so/this",
+# special-case idioms, "least", "but", and !/? emphasis.
+#
+# Tolerance vs analyze_sentiment: the same floating-point operations are applied in the
+# same order (including the left-to-right sum and Python's round(compound, 4)), so scores
+# are expected to be identical; benchmarks/sentiment.py checks max |difference| <= 1e-4
+# (one unit of the 4th rounded decimal) on a reference corpus and found 0.
+#
+# Like polarity_scores, a repeated token is scored in the context of its first occurrence.
+
+import re
+import string
+from itertools import chain
+import numpy as np
+import pandas as pd
+from nltk.sentiment.vader import VaderConstants
+
+TOLERANCE = 1e-4
+
+_C = VaderConstants
+
+# A token made of one PUNC_LIST entry plus a punctuation-free word (2+ chars) is scored as
+# the word, e.g. 'great!' -> 'great' (SentiText._words_and_emoticons)
+_WORD = rf"[^{re.escape(string.punctuation)}\s]{{2,}}"
+_PUNC = '|'.join(re.escape(p) for p in sorted(_C.PUNC_LIST, key=len, reverse=True))
+_EDGE_PUNCTUATION = re.compile(rf"(?:{_PUNC})({_WORD})|({_WORD})(?:{_PUNC})")
+
+# Word sequences (offsets from the scored word) checked against SPECIAL_CASE_IDIOMS, in VADER's order
+_IDIOM_SEQUENCES = ((-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2))
+_BOOSTER_PHRASES = [key.split() for key in _C.BOOSTER_DICT if ' ' in key]
+
+_lexicon = None
+
+def get_lexicon():
+    """
+    {lowercase word: valence}, shared with the NLTK analyzer.
+    """
+    global _lexicon
+    if _lexicon is None:
+        from sentiment_analyzer import get_analyzer
+        _lexicon = get_analyzer().lexicon
+    return _lexicon
+
+class _Vocabulary:
+    """
+    Lookup tables for the distinct tokens of one batch: arrays indexed by token code,
+    with one extra neutral entry at the end so code -1 (no such word) reads as neutral.
+    """
+    def __init__(self, words, lexicon):
+        self.words = words
+        self.index = pd.Index(words)
+        lower = [w.lower() for w in words]
+        valence = [lexicon.get(w) for w in lower]
+
+        def table(values, dtype):
+            return np.array(list(values) + [dtype(0)], dtype=dtype)
+
+        self.in_lexicon = table((v is not None for v in valence), bool)
+        self.valence = table((v or 0.0 for v in valence), float)
+        self.booster = table((_C.BOOSTER_DICT.get(w, 0.0) for w in lower), float)
+        self.upper = table((w.isupper() for w in words), bool)
+        self.negated = table((w in _C.NEGATE or "n't" in w for w in lower), bool)
+        self.kind = table((w == 'kind' for w in lower), bool)
+        self.of = table((w == 'of' for w in lower), bool)
+        self.least = table((w == 'least' for w in lower), bool)
+        self.at_or_very = table((w in ('at', 'very') for w in lower), bool)
+        self.but = table((w == 'but' for w in lower), bool)
+        # Case-sensitive, like VADER's "never so/this" check
+        self.never = table((w == 'never' for w in words), bool)
+        self.so_this = table((w in ('so', 'this') for w in words), bool)
+
+    def codes(self, phrase):
+        # Token codes of a phrase's words; -2 (matches nothing) for words not in the batch
+        codes = self.index.get_indexer(phrase)
+        return np.where(codes < 0, -2, codes)
+
+def compound_scores(texts):
+    """
+    VADER compound score of every text (same as analyze_sentiment, see TOLERANCE).
+    texts: iterable of strings; returns a float64 array.
+    """
+    texts = ['' if t is None else str(t) for t in texts]
+    n_texts = len(texts)
+    if not n_texts:
+        return np.zeros(0)
+
+    # 1. Tokenize: whitespace split, drop 1-char tokens, strip edge punctuation
+    raw_codes, raw_tokens, token_text = _split(texts)
+    keep = np.array([len(t) > 1 for t in raw_tokens], dtype=bool)[raw_codes]
+    stripped = []
+    for token in raw_tokens:
+        match = _EDGE_PUNCTUATION.fullmatch(token)
+        stripped.append(token if match is None else match.group(1) or match.group(2))
+    word_of_raw, words = pd.factorize(np.array(stripped, dtype=object))
+    vocab = _Vocabulary(list(words), get_lexicon())
+
+    text_id = token_text[keep]
+    w0 = word_of_raw[raw_codes[keep]]
+    n_tokens = np.bincount(text_id, minlength=n_texts)
+    starts = np.concatenate([[0], np.cumsum(n_tokens)[:-1]])
+    position = np.arange(len(w0)) - starts[text_id]
+    length = n_tokens[text_id]
+
+    def back(d):
+        # Code of the token d places before (-1 if there is none)
+        shifted = np.full(len(w0), -1)
+        shifted[d:] = w0[:len(w0) - d]
+        shifted[position < d] = -1
+        return shifted
+
+    def ahead(d):
+        shifted = np.full(len(w0), -1)
+        shifted[:len(w0) - d] = w0[d:]
+        shifted[position + d >= length] = -1
+        return shifted
+
+    w1, w2, w3 = back(1), back(2), back(3)
+    f1, f2 = ahead(1), ahead(2)
+    at = {-3: w3, -2: w2, -1: w1, 0: w0, 1: f1, 2: f2}
+
+    # Some but not all tokens of the text in ALL CAPS
+    caps = np.bincount(text_id, weights=vocab.upper[w0], minlength=n_texts)
+    cap_diff = ((caps > 0) & (caps < n_tokens))[text_id]
+
+    # 2. Valence of each lexicon word with its modifiers (sentiment_valence)
+    skip = (vocab.kind[w0] & vocab.of[f1]) | (vocab.booster[w0] != 0)
+    scored = vocab.in_lexicon[w0] & ~skip
+    valence = vocab.valence[w0]
+    emphasized = vocab.upper[w0] & cap_diff
+    valence = np.where(emphasized, np.where(valence > 0, valence + _C.C_INCR, valence - _C.C_INCR), valence)
+
+    for start_i, before in enumerate((w1, w2, w3)):
+        active = (before != -1) & ~vocab.in_lexicon[before]
+        booster = vocab.booster[before]
+        scalar = np.where(valence < 0, -booster, booster)
+        booster_caps = (booster != 0) & vocab.upper[before] & cap_diff
+        scalar = np.where(booster_caps, np.where(valence > 0, scalar + _C.C_INCR, scalar - _C.C_INCR), scalar)
+        if start_i == 1:
+            scalar = scalar * 0.95
+        elif start_i == 2:
+            scalar = scalar * 0.9
+        updated = valence + scalar
+
+        # _never_check
+        if start_i == 0:
+            updated = np.where(vocab.negated[w1], updated * _C.N_SCALAR, updated)
+        elif start_i == 1:
+            never_so = vocab.never[w2] & vocab.so_this[w1]
+            updated = np.where(never_so, updated * 1.5, np.where(vocab.negated[w2], updated * _C.N_SCALAR, updated))
+        else:
+            never_so = (vocab.never[w3] & vocab.so_this[w2]) | vocab.so_this[w1]
+            updated = np.where(never_so, updated * 1.25, np.where(vocab.negated[w3], updated * _C.N_SCALAR, updated))
+            updated = _idioms(updated, vocab, at)
+
+        valence = np.where(active, updated, valence)
+
+    # _least_check
+    least = vocab.least[w1] & ~vocab.in_lexicon[w1]
+    valence = np.where(least & (w2 != -1) & ~vocab.at_or_very[w2], valence * _C.N_SCALAR, valence)
+    valence = np.where(least & (w2 == -1), valence * _C.N_SCALAR, valence)
+    valence = np.where(scored, valence, 0.0)
+
+    # 3. Every token takes the valence of the first occurrence of the same token in its text
+    key_codes, _ = pd.factorize(text_id * len(words) + w0)
+    first_positions = np.flatnonzero(key_codes > np.maximum.accumulate(np.concatenate([[-1], key_codes[:-1]])))
+    sentiments = valence[first_positions[key_codes]]
+
+    # _but_check: halve before the first 'but', x1.5 after it
+    but_tokens = np.flatnonzero(vocab.but[w0])
+    if len(but_tokens):
+        but_at = np.full(n_texts, -1)
+        texts_with_but, first = np.unique(text_id[but_tokens], return_index=True)
+        but_at[texts_with_but] = position[but_tokens[first]]
+        but_t = but_at[text_id]
+        has_but = but_t >= 0
+        sentiments = np.where(has_but & (position < but_t), sentiments * 0.5,
+                              np.where(has_but & (position > but_t), sentiments * 1.5, sentiments))
+
+    # 4. score_valence: left-to-right sum per text, !/? emphasis, normalize, round
+    total = np.zeros(n_texts)
+    for j in range(int(n_tokens.max())):
+        texts_j = np.flatnonzero(n_tokens > j)
+        total[texts_j] = total[texts_j] + sentiments[starts[texts_j] + j]
+
+    # !/? are counted over all tokens (whitespace never holds them)
+    exclamations = np.array([t.count('!') for t in raw_tokens], dtype=np.int64)[raw_codes]
+    questions = np.array([t.count('?') for t in raw_tokens], dtype=np.int64)[raw_codes]
+    emphasis = _punctuation_emphasis(np.bincount(token_text, weights=exclamations, minlength=n_texts).astype(np.int64),
+                                     np.bincount(token_text, weights=questions, minlength=n_texts).astype(np.int64))
+    total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+    compound = total / np.sqrt(total * total + 15)
+    return _round4(compound)
+
+def _split(texts):
+    """
+    Whitespace tokens of all texts: (token codes, distinct tokens, text number of each token).
+    The texts are joined with a separator token and split in one call when possible.
+    """
+    separator = '\x00'
+    joined = f' {separator} '.join(texts)
+    if len(texts) > 1 and joined.count(separator) == len(texts) - 1:
+        codes, tokens = pd.factorize(np.array(joined.split(), dtype=object))
+        tokens = list(tokens)
+        is_separator = codes == tokens.index(separator)
+        token_text = np.cumsum(is_separator) - is_separator
+        # The 1-char separator tokens are dropped with the other 1-char tokens
+        return codes, tokens, token_text
+
+    split = [t.split() for t in texts]
+    codes, tokens = pd.factorize(np.array(list(chain.from_iterable(split)), dtype=object))
+    token_text = np.repeat(np.arange(len(texts)), [len(s) for s in split])
+    return codes, list(tokens), token_text
+
+def _idioms(valence, vocab, at):
+    # _idioms_check at 3 words back: idioms replace the valence, 'kind of'-style bigrams dampen it
+    idiom = np.full(len(valence), np.nan)
+    for offsets in _IDIOM_SEQUENCES:
+        for phrase, value in _C.SPECIAL_CASE_IDIOMS.items():
+            words = phrase.split()
+            if len(words) == len(offsets):
+                match = _matches(vocab, at, offsets, words) & np.isnan(idiom)
+                idiom[match] = value
+    for offsets in ((0, 1), (0, 1, 2)):
+        for phrase, value in _C.SPECIAL_CASE_IDIOMS.items():
+            words = phrase.split()
+            if len(words) == len(offsets):
+                idiom[_matches(vocab, at, offsets, words)] = value
+    valence = np.where(np.isnan(idiom), valence, idiom)
+
+    bigram = np.zeros(len(valence), dtype=bool)
+    for words in _BOOSTER_PHRASES:
+        bigram |= _matches(vocab, at, (-3, -2), words) | _matches(vocab, at, (-2, -1), words)
+    return np.where(bigram, valence + _C.B_DECR, valence)
+
+def _matches(vocab, at, offsets, words):
+    codes = vocab.codes(words)
+    if (codes == -2).any():
+        return np.zeros(len(at[0]), dtype=bool)
+    match = at[offsets[0]] == codes[0]
+    for offset, code in zip(offsets[1:], codes[1:]):
+        match &= at[offset] == code
+    return match
+
+def _punctuation_emphasis(exclamations, questions):
+    # _amplify_ep + _amplify_qm
+    ep = np.minimum(exclamations, 4) * 0.292
+    qm = np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+    return ep + qm
+
+def _round4(values):
+    # Python's round(x, 4); np.round can only pick the other neighbour right next to a half-way point
+    rounded = np.round(values, 4)
+    scaled = values * 1e4
+    for k in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[k] = round(float(values[k]), 4)
+    return rounded
+
+def score_series(headlines):
+    """
+    compound_scores for a Series (same index) or any iterable of headlines.
+    """
+    index = headlines.index if isinstance(headlines, pd.Series) else None
+    texts = ['' if pd.isna(t) else str(t) for t in headlines]
+    return pd.Series(compound_scores(texts), index=index, dtype=float, name='Sentiment')
@@ -1,12 +1,13 @@
 import argparse
-from data_loader import fetch_stock_data, fetch_news, get_sp500_tickers, select_top_momentum_stocks
-from technical_analysis import add_technical_indicators, detect_candlestick_patterns
-from strategy import AdvancedPatternStrategy
-from backtester import Backtester
-from sentiment_analyzer import analyze_sentiment
+from data_loader import INTERVALS, get_sp500_tickers, select_top_momentum_stocks
+from backtester import Backtester, chunk_by_date
+from pipeline import apply_signals, run_pipeline
+from sentiment_panel import SESSION_CLOSE, SentimentPanel, bar_calendar
+from compact import memory_report
+from instrumentation import metrics, profile
+from sweep import load_universe
+from walk_forward import make_windows, walk_forward, print_report as print_walk_forward
 import pandas as pd
-from datetime import datetime, timedelta
-import time
 import matplotlib.pyplot as plt
 
 def main():
@@ -16,97 +17,91 @@ def main():
     parser.add_argument('--symbols', type=str, default='AAPL,GOOGL,MSFT,AMZN,TSLA,NVDA,META,NFLX', help="Comma-separated stock symbols")
     parser.add_argument('--sp500', action='store_true', help="Run on all S&P 500 stocks")
     parser.add_argument('--limit', type=int, default=0, help="Limit number of stocks (0 for all)")
+    parser.add_argument('--momentum', type=str, default='180', help="Momentum windows in days, LOOKBACK or LOOKBACK:SKIP (e.g. 365:30,180); ranks by the first")
     parser.add_argument('--start', type=str, default='2023-01-01', help="Start date (YYYY-MM-DD)")
     parser.add_argument('--end', type=str, default='2023-06-01', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--interval', type=str, default='1d', choices=INTERVALS, help="Bar size (intraday history is limited to recent weeks)")
+    parser.add_argument('--chunk-bars', type=int, default=0, help="Backtest in time-ordered chunks of N bars to bound memory (0 = all at once)")
+    parser.add_argument('--engine', type=str, default='vectorized', choices=['loop', 'vectorized'], help="Backtest engine")
+    parser.add_argument('--no-news', action='store_true', help="Skip news/sentiment")
+    parser.add_argument('--news-offline', action='store_true', help="Use archived headlines only, never fetch news (see news_archive.py)")
+    parser.add_argument('--io-workers', type=int, default=8, help="Concurrent price/news fetch threads")
+    parser.add_argument('--processes', type=int, default=0, help="Worker processes for sentiment, indicators and patterns (0 for all cores)")
+    parser.add_argument('--fetch-rate', type=float, default=1.0, help="Max price downloads per second (cache hits are free)")
+    parser.add_argument('--sentiment-backend', type=str, default='vader', choices=['vader', 'fast'], help="Headline scorer: NLTK VADER or the bulk NumPy port (fast_sentiment.py)")
+    parser.add_argument('--news-rate', type=float, default=1.0, help="Max news searches per second (archive hits are free)")
+    parser.add_argument('--compact', action='store_true', help="Keep only needed columns as float32/int8 (see compact.py)")
+    parser.add_argument('--walk-forward', action='store_true', help="Backtest rolling train/test windows across --start/--end")
+    parser.add_argument('--train-days', type=int, default=365, help="Walk-forward training period in calendar days")
+    parser.add_argument('--test-days', type=int, default=90, help="Walk-forward test period in calendar days")
+    parser.add_argument('--anchored', action='store_true', help="Walk-forward: grow the training period instead of rolling it")
+    parser.add_argument('--profile', type=str, default='', help="Write cProfile + flame graph stacks to this path prefix")
     
     args = parser.parse_args()
-    
+
+    with profile(args.profile, enabled=bool(args.profile)):
+        run(args)
+    metrics.print_summary()
+
+def run(args):
     if args.sp500:
         all_tickers = get_sp500_tickers()
-        if args.limit > 0:
-            # If limit is small (e.g. 10), we still want to scan a decent chunk to find winners
-            # But scanning 500 takes time. Let's scan ALL if limit is 0, or scan 100 if limit is small?
-            # User wants "all of s&p500". So we scan ALL 500, then pick Top 10 to trade.
-            # Wait, if user says --limit 10, do they mean "Trade 10" or "Scan 10"?
-            # To get good results, we must SCAN many and TRADE few.
-            # Let's assume we SCAN ALL (or a large subset) and TRADE the top 10.
-            
-            # For this demo speed, let's scan the first 100 tickers and pick top 10
-            scan_pool = all_tickers[:100] if len(all_tickers) > 100 else all_tickers
-            symbols = select_top_momentum_stocks(scan_pool, args.start, top_n=args.limit)
-        else:
-            # If no limit, scan all and trade all? That's too many.
-            # Let's default to trading Top 20 if no limit specified for safety?
-            # Or just scan all and trade all (which will be slow).
-            # Let's stick to the user's likely intent: "Make me money".
-            # So we scan ALL, and pick Top 20.
-            symbols = select_top_momentum_stocks(all_tickers, args.start, top_n=20)
+        # SCAN the whole index (the close panel is cached), TRADE only the winners:
+        # --limit N picks the Top N, otherwise the Top 20.
+        windows = [tuple(int(x) for x in w.split(':')) if ':' in w else (int(w), 0) for w in args.momentum.split(',')]
+        with metrics.timer('screen'):
+            symbols = select_top_momentum_stocks(all_tickers, args.start, top_n=args.limit if args.limit > 0 else 20,
+                                                 windows=windows)
     else:
         symbols = args.symbols.split(',')
     
     print(f"Running in {args.mode} mode for {len(symbols)} stocks: {symbols}...")
-    
-    # Dictionary to store processed dataframes
-    data_dict = {}
-    
-    # 1. Fetch and Process Data for EACH stock
-    for symbol in symbols:
-        print(f"\n--- Processing {symbol} ---")
-        
-        # Fetch extra data for indicators (warmup)
-        start_dt = datetime.strptime(args.start, '%Y-%m-%d')
-        warmup_start = (start_dt - timedelta(days=90)).strftime('%Y-%m-%d')
-        
-        df = fetch_stock_data(symbol, warmup_start, args.end)
-        if df.empty:
-            print(f"No data for {symbol}, skipping.")
-            continue
 
-        # Fetch News
-        print(f"Fetching news for {symbol}...")
-        news_df = fetch_news(symbol, args.start, args.end)
-        
-        if not news_df.empty:
-            print(f"Found {len(news_df)} news items.")
-            news_df['Sentiment'] = news_df['title'].apply(analyze_sentiment)
-        else:
-            print("No news found.")
+    if args.walk_forward:
+        run_walk_forward(args, symbols)
+        return
+    
+    # 1. Fetch and Process Data for EACH stock (I/O and CPU stages overlap; see pipeline.py)
+    # --news-offline reads the whole universe's headlines from the archive at once in step 2 instead
+    with_news = not args.no_news
+    data_dict, news = {}, {}
+    for symbol, df, news_df in run_pipeline(symbols, args.start, args.end, with_news=with_news and not args.news_offline,
+                                            io_workers=args.io_workers, cpu_workers=args.processes or None,
+                                            price_rate=args.fetch_rate, news_rate=args.news_rate, compact=args.compact,
+                                            interval=args.interval, warmup_days=warmup_days(args.interval),
+                                            sentiment_backend=args.sentiment_backend):
+        data_dict[symbol] = df
+        news[symbol] = news_df
 
-        # Add Indicators & Patterns
-        df = add_technical_indicators(df)
-        df = detect_candlestick_patterns(df)
-        
-        # Strategy
-        strategy = AdvancedPatternStrategy()
-        df = strategy.generate_signals(df, news_df)
-        
-        # Slice to requested range
-        df = df.loc[args.start:args.end]
-        
-        if not df.empty:
-            data_dict[symbol] = df
-            
-        print(f"Finished processing {symbol}. Waiting 5s...")
-        time.sleep(5) # Delay between stocks to prevent rate limiting
-            
+    # Symbols finish out of order, but the Backtester allocates cash in data_dict order
+    data_dict = {symbol: data_dict[symbol] for symbol in symbols if symbol in data_dict}
     if not data_dict:
         print("No valid data found for any stock.")
         return
+
+    # 2. One sentiment panel for the whole universe, joined to each symbol's bars for its signals
+    panel = build_sentiment_panel(args, data_dict, news) if with_news else None
+    data_dict = apply_signals(data_dict, args.start, args.end, panel, compact=args.compact)
+    if args.compact:
+        memory_report(data_dict)
     
-    # 2. Run Portfolio Backtest
+    # 3. Run Portfolio Backtest
     if args.mode == 'backtest':
         print("\n--- Running Portfolio Backtest ---")
-        backtester = Backtester(initial_capital=50000) # Increased capital for portfolio
-        history_df, trades = backtester.run(data_dict)
-        metrics = backtester.get_performance_metrics(history_df)
+        backtester = Backtester(initial_capital=50000, engine=args.engine) # Increased capital for portfolio
+        if args.chunk_bars:
+            history_df, trades = backtester.run_chunked(chunk_by_date(data_dict, args.chunk_bars))
+        else:
+            history_df, trades = backtester.run(data_dict)
+        performance = backtester.get_performance_metrics(history_df)
         
         print("\n--- Portfolio Results ---")
-        for k, v in metrics.items():
+        for k, v in performance.items():
             print(f"{k}: {v}")
             
         print(f"\nTotal Trades: {len(trades)}")
         
-        # 3. Visualization
+        # 4. Visualization
         if not history_df.empty:
             plt.figure(figsize=(12, 6))
             plt.plot(history_df.index, history_df['Portfolio Value'], label='Portfolio Value')
@@ -123,5 +118,61 @@ def main():
     else:
         print("Live mode not supported for portfolio yet.")
 
+def warmup_days(interval):
+    """
+    Calendar days of history fetched before --start so indicators are primed.
+    """
+    return 90 if interval == '1d' else 7
+
+def build_sentiment_panel(args, data_dict, news=None):
+    """
+    Sentiment of every symbol as one dates x symbols panel on the universe's bar sessions.
+    With --news-offline the archived headlines of all symbols are read and scored in one batch;
+    otherwise `news` holds each symbol's scored headlines from the pipeline.
+    """
+    calendar = bar_calendar(data_dict)
+    with metrics.timer('sentiment_panel'):
+        if args.news_offline:
+            return SentimentPanel.from_archive(list(data_dict), args.start, args.end, calendar,
+                                               backend=args.sentiment_backend, session_close=SESSION_CLOSE)
+        return SentimentPanel.from_news(news, calendar, symbols=list(data_dict), session_close=SESSION_CLOSE)
+
+def run_walk_forward(args, symbols):
+    """
+    Loads and prepares the universe once, then backtests every train/test window in parallel.
+    """
+    windows = make_windows(args.start, args.end, args.train_days, args.test_days, anchored=args.anchored)
+    if not windows:
+        print("History too short for one train + test window.")
+        return
+
+    # Same bars, news and float layout as the regular backtest under the same flags
+    with metrics.timer('fetch'):
+        data_dict = load_universe(symbols, args.start, args.end, warmup_days=warmup_days(args.interval),
+                                  interval=args.interval, compact=args.compact, with_news=not args.no_news,
+                                  news_offline=args.news_offline, sentiment_backend=args.sentiment_backend)
+    if not data_dict:
+        print("No valid data found for any stock.")
+        return
+
+    with metrics.timer('walk_forward'):
+        report, equity = walk_forward(data_dict, windows, initial_capital=50000)
+    print_walk_forward(report, equity, 50000)
+
+    if not equity.empty:
+        plt.figure(figsize=(12, 6))
+        plt.plot(equity.index, equity['Portfolio Value'], label='Out-of-Sample Portfolio Value')
+        for test_start in report['test_start']:
+            plt.axvline(pd.Timestamp(test_start), color='grey', alpha=0.3)
+        plt.title('Walk-Forward Performance (Advanced Strategy)')
+        plt.xlabel('Date')
+        plt.ylabel('Value ($)')
+        plt.legend()
+        plt.grid(True)
+
+        output_file = 'walk_forward_performance.png'
+        plt.savefig(output_file)
+        print(f"\nWalk-forward graph saved to {output_file}")
+
 if __name__ == "__main__":
     main()
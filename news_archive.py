@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import timedelta
+import pandas as pd
+from data_cache import CACHE_DIR, _add_range, _missing_ranges, _to_date
+from sentiment_panel import EXCHANGE_TZ
+
+NEWS_ARCHIVE_FILE = os.path.join(CACHE_DIR, 'news.sqlite')
+
+# Headlines are clustered by (symbol, date), so a backtest window is one index range scan.
+# date is 'YYYY-MM-DD', or 'YYYY-MM-DD HH:MM:SS' (exchange time) when the headline has a time of day.
+# coverage holds the [start, end) date ranges already fetched per symbol.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headlines (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    title TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (symbol, date, title)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    PRIMARY KEY (symbol, start)
+) WITHOUT ROWID;
+"""
+
+# Accepted column names in headline dumps (matched case-insensitively)
+COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'stock'),
+    'date': ('date', 'datetime', 'published', 'published_at', 'publishedat', 'time', 'timestamp'),
+    'title': ('title', 'headline'),
+}
+
+# A time of day followed by 'Z' or a UTC offset, e.g. '2024-01-05T18:30:00+00:00'
+OFFSET_PATTERN = r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}:?\d{2})$'
+
+class NewsArchive:
+    """
+    Persistent per-symbol, per-date headline archive in SQLite (WAL mode).
+
+    fetch_news fills it incrementally: like OHLCVCache, only the date ranges not covered
+    yet are fetched, so a warm archive serves a backtest without any network call.
+    Dumps of past headlines can be bulk loaded with import_file. Requested ranges are
+    inclusive of end_date (the GoogleNews time range convention).
+    """
+    def __init__(self, path=NEWS_ARCHIVE_FILE):
+        self.path = path
+        self._local = threading.local() # sqlite3 connections are per thread
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def covered(self, symbol):
+        """
+        Sorted list of [start, end) date pairs already fetched for a symbol.
+        """
+        rows = self._conn().execute('SELECT start, end FROM coverage WHERE symbol = ? ORDER BY start', (symbol.upper(),))
+        return [(_to_date(start), _to_date(end)) for start, end in rows]
+
+    def missing_ranges(self, symbol, start_date, end_date):
+        """
+        Returns the [start, end) sub-ranges of [start_date, end_date] not fetched yet.
+        """
+        return _missing_ranges(self.covered(symbol), _to_date(start_date), _day_after(end_date))
+
+    def is_covered(self, symbol, start_date, end_date):
+        return not self.missing_ranges(symbol, start_date, end_date)
+
+    def query(self, symbol, start_date, end_date):
+        """
+        Archived headlines for start_date <= date <= end_date as a DataFrame [Date, title].
+        """
+        rows = self._conn().execute(
+            'SELECT date, title FROM headlines WHERE symbol = ? AND date >= ? AND date < ? ORDER BY date',
+            (symbol.upper(), str(_to_date(start_date)), str(_day_after(end_date))),
+        ).fetchall()
+        news_df = pd.DataFrame(rows, columns=['Date', 'title'])
+        news_df['Date'] = pd.to_datetime(news_df['Date'], format='ISO8601')
+        return news_df
+
+    def add(self, symbol, news_df, source='', covered_range=None):
+        """
+        Stores headlines (a DataFrame with Date and title) for one symbol; exact repeats are ignored.
+        covered_range=(start, end) also marks [start, end) as fetched, in the same transaction.
+        Returns the number of new headlines.
+        """
+        symbol = symbol.upper()
+        rows = [] if news_df is None or news_df.empty else [
+            (symbol, stamp, title, source) for stamp, title in zip(_date_strings(news_df['Date']), news_df['title'])
+            if stamp and isinstance(title, str) and title
+        ]
+        conn = self._conn()
+        with conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO headlines (symbol, date, title, source) VALUES (?, ?, ?, ?)', rows)
+            added = conn.total_changes - before
+            if covered_range is not None:
+                self._mark_covered(conn, symbol, *covered_range)
+        return added
+
+    def mark_covered(self, symbol, start_date, end_date):
+        """
+        Marks [start_date, end_date] (inclusive) as fetched, e.g. after importing a complete dump.
+        """
+        conn = self._conn()
+        with conn:
+            self._mark_covered(conn, symbol.upper(), _to_date(start_date), _day_after(end_date))
+
+    def _mark_covered(self, conn, symbol, start, end):
+        covered = [(_to_date(s), _to_date(e)) for s, e in
+                   conn.execute('SELECT start, end FROM coverage WHERE symbol = ? ORDER BY start', (symbol,))]
+        conn.execute('DELETE FROM coverage WHERE symbol = ?', (symbol,))
+        conn.executemany('INSERT INTO coverage (symbol, start, end) VALUES (?, ?, ?)',
+                         [(symbol, str(s), str(e)) for s, e in _add_range(covered, start, end)])
+
+    def get(self, symbol, start_date, end_date, fetcher):
+        """
+        Returns headlines for [start_date, end_date], calling fetcher(symbol, start, end) only for
+        ranges not fetched yet. fetcher receives inclusive 'YYYY-MM-DD' strings and returns a
+        DataFrame [Date, title] (empty if there was no news) or None if the fetch failed;
+        failed ranges are not marked as covered so they are retried next time.
+        """
+        for range_start, range_end in self.missing_ranges(symbol, start_date, end_date):
+            last_day = range_end - timedelta(days=1)
+            news_df = fetcher(symbol, range_start.strftime('%Y-%m-%d'), last_day.strftime('%Y-%m-%d'))
+            if news_df is not None:
+                self.add(symbol, news_df, source='fetch', covered_range=(range_start, range_end))
+        return self.query(symbol, start_date, end_date)
+
+    def import_file(self, path, symbol=None, mark_covered=False, rows=100000):
+        """
+        Bulk loads a CSV or JSONL (one JSON object per line) headline dump, streamed in
+        chunks of `rows`. Columns are matched via COLUMN_ALIASES; a dump without a
+        symbol column needs `symbol`. mark_covered=True marks each symbol's first..last
+        date as fetched, so fetch_news never goes to the network for that span.
+        Returns {symbol: new headlines}.
+        """
+        added = {}
+        spans = {}
+        for chunk in _read_dump(path, rows):
+            chunk = _normalize_columns(chunk, symbol)
+            for sym, group in chunk.groupby('symbol', sort=False):
+                added[sym] = added.get(sym, 0) + self.add(sym, group, source=os.path.basename(path))
+                days = group['Date'].dropna()
+                if not days.empty:
+                    first, last = days.min(), days.max()
+                    if sym in spans:
+                        first, last = min(first, spans[sym][0]), max(last, spans[sym][1])
+                    spans[sym] = (first, last)
+
+        if mark_covered:
+            for sym, (first, last) in spans.items():
+                self.mark_covered(sym, first.date(), last.date())
+        return added
+
+    def stats(self):
+        """
+        Headline count and date span per symbol, as a DataFrame.
+        """
+        rows = self._conn().execute(
+            'SELECT symbol, COUNT(*), MIN(date), MAX(date) FROM headlines GROUP BY symbol ORDER BY symbol').fetchall()
+        return pd.DataFrame(rows, columns=['symbol', 'headlines', 'first', 'last'])
+
+def _day_after(value):
+    return _to_date(value) + timedelta(days=1)
+
+def _date_strings(dates):
+    # 'YYYY-MM-DD' per headline, plus ' HH:MM:SS' when it has a time of day; '' where the date is missing
+    stamps = pd.to_datetime(pd.Series(dates), errors='coerce')
+    return ['' if pd.isna(d) else d.strftime('%Y-%m-%d' if d == d.normalize() else '%Y-%m-%d %H:%M:%S') for d in stamps]
+
+def _read_dump(path, rows):
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            chunk = []
+            for line in f:
+                if line.strip():
+                    chunk.append(json.loads(line))
+                if len(chunk) >= rows:
+                    yield pd.DataFrame(chunk)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk)
+    else:
+        yield from pd.read_csv(path, chunksize=rows)
+
+def _normalize_columns(chunk, symbol):
+    """
+    Maps a dump chunk onto [symbol, Date, title], keeping the time of day. Timestamps with
+    UTC offsets are converted to exchange time (EXCHANGE_TZ); naive timestamps are kept as-is.
+    """
+    lower = {c.lower(): c for c in chunk.columns}
+    columns = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        found = next((lower[a] for a in aliases if a in lower), None)
+        if found is not None:
+            columns[name] = chunk[found]
+    if 'title' not in columns or 'date' not in columns:
+        raise ValueError(f"Headline dump needs a title and a date column, got {list(chunk.columns)}")
+    if 'symbol' not in columns:
+        if symbol is None:
+            raise ValueError("Headline dump has no symbol column; pass symbol")
+        columns['symbol'] = pd.Series(symbol, index=chunk.index)
+
+    instants = pd.to_datetime(columns['date'], errors='coerce', utc=True, format='mixed')
+    has_offset = columns['date'].astype(str).str.contains(OFFSET_PATTERN, regex=True)
+    dates = instants.dt.tz_convert(EXCHANGE_TZ).dt.tz_localize(None).where(has_offset, instants.dt.tz_localize(None))
+    return pd.DataFrame({
+        'symbol': columns['symbol'].astype(str).str.upper(),
+        'Date': dates,
+        'title': columns['title'],
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Local news headline archive used by fetch_news")
+    parser.add_argument('--archive', type=str, default=NEWS_ARCHIVE_FILE, help="SQLite archive path")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('import', help="Bulk load CSV/JSONL headline dumps")
+    load.add_argument('paths', nargs='+', help="Dump files (.csv, or .jsonl with one object per line)")
+    load.add_argument('--symbol', type=str, default=None, help="Symbol for dumps without a symbol column")
+    load.add_argument('--mark-covered', action='store_true', help="Treat each symbol's dumped date span as complete (no fetches there)")
+
+    commands.add_parser('stats', help="Headlines per symbol")
+    args = parser.parse_args()
+
+    archive = NewsArchive(args.archive)
+    if args.command == 'import':
+        for path in args.paths:
+            added = archive.import_file(path, symbol=args.symbol, mark_covered=args.mark_covered)
+            print(f"{path}: {sum(added.values())} new headlines for {len(added)} symbols")
+    else:
+        print(archive.stats().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
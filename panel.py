@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+class MarketPanel:
+    """
+    Dense dates x symbols view of a {symbol: DataFrame} universe.
+
+    Every field is a 2D float64 array aligned on the union of all dates.
+    Cells where a symbol has no bar are NaN and `present` is False.
+
+    A panel can be saved as a read-only directory and reopened memory-mapped, so any
+    number of processes share one copy of the data through the OS page cache:
+        meta.json    symbols, field names, dtype, timezone (and optional build parameters)
+        dates.npy    int64 nanoseconds
+        present.npy  bool (dates x symbols)
+        values.npy   fields x dates x symbols
+    """
+    def __init__(self, dates, symbols, fields, present):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.fields = fields # {name: ndarray (dates x symbols)}
+        self.present = present
+
+    @classmethod
+    def from_frames(cls, data_dict, columns=('Close', 'Signal', 'ATR'), defaults=None):
+        """
+        Aligns all frames once. Columns missing from a frame are filled with defaults[column]
+        (NaN if not given) on the dates where that symbol has a bar.
+        """
+        defaults = defaults or {}
+        symbols = list(data_dict.keys())
+        frames = list(data_dict.values())
+
+        dates = frames[0].index if frames else pd.DatetimeIndex([])
+        for df in frames[1:]:
+            dates = dates.union(df.index)
+        dates = dates.unique().sort_values()
+
+        present = np.zeros((len(dates), len(symbols)), dtype=bool)
+        fields = {c: np.full((len(dates), len(symbols)), np.nan) for c in columns}
+
+        for j, df in enumerate(frames):
+            rows = dates.get_indexer(df.index)
+            present[rows, j] = True
+            for column in columns:
+                if column in df.columns:
+                    fields[column][rows, j] = df[column].to_numpy(dtype=float)
+                else:
+                    fields[column][rows, j] = defaults.get(column, np.nan)
+
+        return cls(dates, symbols, fields, present)
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def ffill(self, name):
+        """
+        Returns the field forward-filled along dates (last known value per symbol).
+        """
+        values = self.fields[name]
+        valid = ~np.isnan(values)
+        rows = np.where(valid, np.arange(len(values))[:, None], 0)
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        filled = values[rows, np.arange(values.shape[1])]
+        # Leading gaps before the first valid value stay NaN
+        filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+        return filled
+
+    def to_frames(self, dtypes=None):
+        """
+        Rebuilds {symbol: DataFrame} from the panel, keeping only the dates each symbol has a bar.
+        dtypes optionally restores column types, e.g. {'Hammer': bool}.
+        """
+        dtypes = dtypes or {}
+        frames = {}
+        for j, symbol in enumerate(self.symbols):
+            rows = self.present[:, j]
+            df = pd.DataFrame({name: values[rows, j] for name, values in self.fields.items()}, index=self.dates[rows])
+            for column, dtype in dtypes.items():
+                if column in df.columns:
+                    df[column] = df[column].astype(dtype)
+            frames[symbol] = df
+        return frames
+
+    def save(self, path, dtype=np.float64, build=None):
+        """
+        Writes the panel to directory `path`. Fields are streamed one at a time into a
+        memory-mapped file, and the directory is swapped in atomically.
+        build: JSON-serialisable description of how the panel was prepared (see read_meta).
+        """
+        path = os.path.abspath(path)
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        dates = pd.DatetimeIndex(self.dates)
+        tz = str(dates.tz) if dates.tz is not None else ''
+        if tz:
+            dates = dates.tz_convert('UTC').tz_localize(None)
+        names = list(self.fields.keys())
+
+        np.save(os.path.join(tmp_path, 'dates.npy'), dates.values.astype('datetime64[ns]').astype(np.int64))
+        np.save(os.path.join(tmp_path, 'present.npy'), np.asarray(self.present, dtype=bool))
+        values = np.lib.format.open_memmap(os.path.join(tmp_path, 'values.npy'), mode='w+', dtype=dtype,
+                                           shape=(len(names), len(dates), len(self.symbols)))
+        for i, name in enumerate(names):
+            values[i] = self.fields[name]
+        values.flush()
+        del values
+
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'symbols': self.symbols, 'fields': names, 'dtype': np.dtype(dtype).name, 'tz': tz, 'build': build}, f)
+
+        old_path = path + '.old'
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @staticmethod
+    def read_meta(path):
+        """
+        The saved panel's meta.json, without opening its arrays.
+        """
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            return json.load(f)
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """
+        Opens a saved panel. With mmap=True the fields are read-only views of the file,
+        so opening costs no memory until pages are touched and is shared across processes.
+        """
+        meta = cls.read_meta(path)
+        dates = pd.DatetimeIndex(np.load(os.path.join(path, 'dates.npy')).astype('datetime64[ns]'), name='Date')
+        if meta['tz']:
+            dates = dates.tz_localize('UTC').tz_convert(meta['tz'])
+        mode = 'r' if mmap else None
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode=mode)
+        present = np.load(os.path.join(path, 'present.npy'), mmap_mode=mode)
+        fields = {name: values[i] for i, name in enumerate(meta['fields'])}
+        return cls(dates, meta['symbols'], fields, present)
+
+    def select(self, start=None, end=None, symbols=None, fields=None):
+        """
+        Sub-panel for dates in [start, end] (inclusive, like .loc). Date slicing returns
+        views, so it is free on a memory-mapped panel; selecting symbols copies those columns.
+        """
+        rows = self.dates.slice_indexer(start, end)
+        names = fields or list(self.fields.keys())
+        if symbols is None:
+            return MarketPanel(self.dates[rows], self.symbols, {n: self.fields[n][rows] for n in names}, self.present[rows])
+
+        position = {symbol: j for j, symbol in enumerate(self.symbols)}
+        cols = [position[s] for s in symbols]
+        return MarketPanel(self.dates[rows], symbols, {n: self.fields[n][rows, cols] for n in names}, self.present[rows, cols])
+
+    def frame(self, symbol, fields=None, dtypes=None):
+        """
+        One symbol as a DataFrame over the dates it has bars (e.g. to feed add_technical_indicators).
+        """
+        j = self.symbols.index(symbol)
+        rows = np.flatnonzero(self.present[:, j])
+        names = fields or list(self.fields.keys())
+        df = pd.DataFrame({name: self.fields[name][rows, j] for name in names}, index=self.dates[rows])
+        for column, dtype in (dtypes or {}).items():
+            if column in df.columns:
+                df[column] = df[column].astype(dtype)
+        return df
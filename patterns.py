@@ -0,0 +1,230 @@
+from functools import cached_property
+import numpy as np
+import pandas as pd
+
+# Registry of pattern name -> function(Candles) returning a bool array.
+# The bit of each pattern in the packed mask is its position here: only ever append.
+PATTERN_FUNCTIONS = {}
+
+# Bars a pattern may look back (three-candle patterns use the two previous bars)
+LOOKBACK = 2
+
+def pattern(name):
+    def register(fn):
+        PATTERN_FUNCTIONS[name] = fn
+        return fn
+    return register
+
+class Candles:
+    """
+    Shared building blocks for every pattern, computed once per frame as NumPy arrays:
+    body, wicks and range of the current bar, and the same for the previous bars on demand.
+    Previous values before the first bar are NaN, so any comparison with them is False.
+    """
+    def __init__(self, open_, high, low, close):
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+
+        self.body = self.close - self.open
+        self.abs_body = np.abs(self.body)
+        self.range = self.high - self.low
+        # fmin/fmax skip a missing open or close, like DataFrame.min(axis=1)
+        self.body_low = np.fmin(self.open, self.close)
+        self.body_high = np.fmax(self.open, self.close)
+        self.lower_wick = self.body_low - self.low
+        self.upper_wick = self.high - self.body_high
+        self.green = self.close > self.open
+        self.red = self.close < self.open
+        self.midpoint = (self.open + self.close) / 2
+
+    def prev(self, name, bars=1):
+        """
+        Building block `name` shifted back by `bars` (1 = previous candle).
+        """
+        return self._shifted[bars][name]
+
+    @cached_property
+    def _shifted(self):
+        return {bars: _ShiftedCandles(self, bars) for bars in range(1, LOOKBACK + 1)}
+
+class _ShiftedCandles(dict):
+    # Shifts a building block the first time a pattern asks for it, then reuses it
+    def __init__(self, candles, bars):
+        super().__init__()
+        self.candles = candles
+        self.bars = bars
+
+    def __missing__(self, name):
+        values = getattr(self.candles, name)
+        shifted = np.full(len(values), False if values.dtype == bool else np.nan, dtype=values.dtype)
+        shifted[self.bars:] = values[:len(values) - self.bars]
+        self[name] = shifted
+        return shifted
+
+# --- Single-candle patterns ---
+
+@pattern('bullish_engulfing')
+def _bullish_engulfing(c):
+    # Previous red, current green, body engulfs the previous body
+    return c.prev('red') & c.green & (c.open < c.prev('close')) & (c.close > c.prev('open'))
+
+@pattern('hammer')
+def _hammer(c):
+    # Long lower wick (> 2x body), upper wick shorter than the body
+    return (c.lower_wick > 2 * c.abs_body) & (c.upper_wick < c.abs_body)
+
+@pattern('bearish_engulfing')
+def _bearish_engulfing(c):
+    return c.prev('green') & c.red & (c.open > c.prev('close')) & (c.close < c.prev('open'))
+
+@pattern('doji')
+def _doji(c):
+    return (c.range > 0) & (c.abs_body <= 0.1 * c.range)
+
+@pattern('dragonfly_doji')
+def _dragonfly_doji(c):
+    return _doji(c) & (c.upper_wick <= 0.1 * c.range) & (c.lower_wick >= 0.6 * c.range)
+
+@pattern('gravestone_doji')
+def _gravestone_doji(c):
+    return _doji(c) & (c.lower_wick <= 0.1 * c.range) & (c.upper_wick >= 0.6 * c.range)
+
+def _inverted_shape(c):
+    return (c.upper_wick > 2 * c.abs_body) & (c.lower_wick < c.abs_body)
+
+@pattern('shooting_star')
+def _shooting_star(c):
+    # Inverted hammer shape after an up candle
+    return _inverted_shape(c) & c.prev('green')
+
+@pattern('inverted_hammer')
+def _inverted_hammer(c):
+    # Same shape after a down candle
+    return _inverted_shape(c) & c.prev('red')
+
+@pattern('hanging_man')
+def _hanging_man(c):
+    # Hammer shape after an up candle
+    return _hammer(c) & c.prev('green')
+
+@pattern('bullish_marubozu')
+def _bullish_marubozu(c):
+    return c.green & (c.range > 0) & (c.upper_wick <= 0.05 * c.range) & (c.lower_wick <= 0.05 * c.range)
+
+@pattern('bearish_marubozu')
+def _bearish_marubozu(c):
+    return c.red & (c.range > 0) & (c.upper_wick <= 0.05 * c.range) & (c.lower_wick <= 0.05 * c.range)
+
+@pattern('spinning_top')
+def _spinning_top(c):
+    return ((c.abs_body > 0.1 * c.range) & (c.abs_body < 0.3 * c.range)
+            & (c.upper_wick > c.abs_body) & (c.lower_wick > c.abs_body))
+
+# --- Two-candle patterns ---
+
+@pattern('bullish_harami')
+def _bullish_harami(c):
+    # Green body inside the previous red body
+    return c.prev('red') & c.green & (c.open > c.prev('close')) & (c.close < c.prev('open'))
+
+@pattern('bearish_harami')
+def _bearish_harami(c):
+    return c.prev('green') & c.red & (c.open < c.prev('close')) & (c.close > c.prev('open'))
+
+@pattern('piercing_line')
+def _piercing_line(c):
+    # Opens below the previous red close, closes above its midpoint but below its open
+    return (c.prev('red') & c.green & (c.open < c.prev('close'))
+            & (c.close > c.prev('midpoint')) & (c.close < c.prev('open')))
+
+@pattern('dark_cloud_cover')
+def _dark_cloud_cover(c):
+    return (c.prev('green') & c.red & (c.open > c.prev('close'))
+            & (c.close < c.prev('midpoint')) & (c.close > c.prev('open')))
+
+# --- Three-candle patterns ---
+
+@pattern('morning_star')
+def _morning_star(c):
+    # Long red candle, small-bodied candle, green candle closing above the first one's midpoint
+    first_long = c.prev('red', 2) & (c.prev('abs_body', 2) > 0.5 * c.prev('range', 2))
+    small_middle = c.prev('abs_body') < 0.3 * c.prev('abs_body', 2)
+    return first_long & small_middle & c.green & (c.close > c.prev('midpoint', 2))
+
+@pattern('evening_star')
+def _evening_star(c):
+    first_long = c.prev('green', 2) & (c.prev('abs_body', 2) > 0.5 * c.prev('range', 2))
+    small_middle = c.prev('abs_body') < 0.3 * c.prev('abs_body', 2)
+    return first_long & small_middle & c.red & (c.close < c.prev('midpoint', 2))
+
+@pattern('three_white_soldiers')
+def _three_white_soldiers(c):
+    # Three green candles with higher closes, each opening inside the previous body
+    return (c.prev('green', 2) & c.prev('green') & c.green
+            & (c.prev('close') > c.prev('close', 2)) & (c.close > c.prev('close'))
+            & (c.prev('open') > c.prev('open', 2)) & (c.prev('open') < c.prev('close', 2))
+            & (c.open > c.prev('open')) & (c.open < c.prev('close')))
+
+@pattern('three_black_crows')
+def _three_black_crows(c):
+    return (c.prev('red', 2) & c.prev('red') & c.red
+            & (c.prev('close') < c.prev('close', 2)) & (c.close < c.prev('close'))
+            & (c.prev('open') < c.prev('open', 2)) & (c.prev('open') > c.prev('close', 2))
+            & (c.open < c.prev('open')) & (c.open > c.prev('close')))
+
+PATTERNS = tuple(PATTERN_FUNCTIONS)
+MASK_DTYPE = np.uint32 if len(PATTERNS) <= 32 else np.uint64
+PATTERN_BITS = {name: MASK_DTYPE(1) << MASK_DTYPE(i) for i, name in enumerate(PATTERNS)}
+
+def detect_patterns(open_, high, low, close):
+    """
+    Evaluates every registered pattern from one set of building blocks.
+    Returns one MASK_DTYPE bitmask per bar (bit i set = PATTERNS[i] found on that bar).
+    """
+    candles = Candles(open_, high, low, close)
+    mask = np.zeros(len(candles.close), dtype=MASK_DTYPE)
+    for bit, fn in enumerate(PATTERN_FUNCTIONS.values()):
+        mask |= fn(candles).astype(MASK_DTYPE) << MASK_DTYPE(bit)
+    return mask
+
+def pattern_mask(df):
+    """
+    detect_patterns on a frame's OHLC columns.
+    """
+    return detect_patterns(df['Open'].to_numpy(), df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy())
+
+def has_pattern(mask, name):
+    """
+    Bool array (or Series, for a Series mask) of the bars where `name` was found.
+    """
+    found = (np.asarray(mask) & PATTERN_BITS[name]) != 0
+    if isinstance(mask, pd.Series):
+        return pd.Series(found, index=mask.index, name=name)
+    return found
+
+def has_any(mask, names):
+    """
+    Bars where at least one of `names` was found (a single AND against a combined bit mask).
+    """
+    bits = MASK_DTYPE(0)
+    for name in names:
+        bits |= PATTERN_BITS[name]
+    return (np.asarray(mask) & bits) != 0
+
+def pattern_names(value):
+    """
+    Names of the patterns set in one bar's mask value.
+    """
+    value = int(value)
+    return [name for i, name in enumerate(PATTERNS) if value >> i & 1]
+
+def unpack(mask, names=None, index=None):
+    """
+    Expands a mask into one bool column per pattern (for inspection; the packed form is what gets stored).
+    """
+    if isinstance(mask, pd.Series):
+        index = mask.index if index is None else index
+    mask = np.asarray(mask)
+    return pd.DataFrame({name: (mask & PATTERN_BITS[name]) != 0 for name in (names or PATTERNS)}, index=index)
@@ -0,0 +1,142 @@
+import os
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import pandas as pd
+from data_loader import fetch_stock_data, fetch_news, is_news_cached, is_stock_data_cached
+from instrumentation import metrics
+from ratelimit import TokenBucket
+
+def run_pipeline(symbols, start_date, end_date, with_news=True, io_workers=8, cpu_workers=None,
+                 price_rate=1.0, news_rate=1.0, queue_size=32, warmup_days=90, compact=False, interval='1d', news_offline=False,
+                 sentiment_backend='vader'):
+    """
+    Staged per-symbol processing: fetch -> news -> sentiment -> indicators -> patterns.
+
+    I/O threads fetch prices and news concurrently; network requests (cache misses) go
+    through per-source token buckets instead of a fixed sleep. Fetched symbols wait in a
+    bounded queue for a process pool that runs the CPU stages, so neither side can run
+    far ahead of the other. Yields (symbol, df, news_df) as each symbol finishes, in completion
+    order: df has indicators and patterns from the warmup bars on (or its compact float32 form
+    with compact=True, see compact.py), news_df the scored headlines. Signals need the whole
+    universe's sentiment, so they come after the pipeline (see apply_signals).
+    interval selects the bar size ('1d', or intraday such as '5m'; see data_loader.INTERVALS).
+    News comes from the local archive (news_archive.py); news_offline=True never fetches missing ranges.
+    sentiment_backend picks the headline scorer (sentiment_analyzer.BACKENDS).
+    """
+    warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=warmup_days)).strftime('%Y-%m-%d')
+    price_limiter = TokenBucket(price_rate)
+    news_limiter = TokenBucket(news_rate)
+    fetched = queue.Queue(maxsize=queue_size)
+    cpu_workers = cpu_workers or os.cpu_count()
+
+    def fetch(symbol):
+        # Always enqueue exactly one item per symbol so the dispatcher can count completions
+        try:
+            was_cached = is_stock_data_cached(symbol, warmup_start, end_date, interval)
+            if not was_cached:
+                price_limiter.acquire()
+            with metrics.timer('fetch', source='cache' if was_cached else 'network'):
+                df = fetch_stock_data(symbol, warmup_start, end_date, interval=interval)
+            if df.empty:
+                metrics.inc('fetch_errors_total', reason='empty')
+                fetched.put((symbol, None, None))
+                return
+
+            news_df = pd.DataFrame()
+            if with_news:
+                news_cached = news_offline or is_news_cached(symbol, start_date, end_date)
+                if not news_cached:
+                    news_limiter.acquire()
+                with metrics.timer('news', source='cache' if news_cached else 'network'):
+                    news_df = fetch_news(symbol, start_date, end_date, offline=news_offline)
+            fetched.put((symbol, df, news_df))
+        except Exception as e:
+            metrics.inc('fetch_errors_total', reason=type(e).__name__)
+            print(f"Error fetching {symbol}: {e}")
+            fetched.put((symbol, None, None))
+
+    completed = 0
+    pending = set()
+    owners = {} # {future: symbol}
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool, ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+        for symbol in symbols:
+            io_pool.submit(fetch, symbol)
+
+        while completed < len(symbols):
+            # 1. Hand fetched symbols to the CPU pool while it has room (block only when idle)
+            while len(pending) < cpu_workers * 2:
+                try:
+                    symbol, df, news_df = fetched.get(block=not pending)
+                except queue.Empty:
+                    break
+                if df is None:
+                    print(f"No data for {symbol}, skipping.")
+                    completed += 1
+                    if completed == len(symbols):
+                        break
+                    continue
+                future = cpu_pool.submit(process_symbol, df, news_df, compact, sentiment_backend)
+                owners[future] = symbol
+                pending.add(future)
+
+            if not pending:
+                continue
+
+            # 2. Stream out whatever finished
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                completed += 1
+                symbol = owners.pop(future)
+                try:
+                    df, news_df, timings = future.result()
+                except Exception as e:
+                    metrics.inc('processing_errors_total')
+                    print(f"Error processing {symbol}: {e}")
+                    continue
+                for stage, seconds in timings.items():
+                    metrics.observe('stage_duration_seconds', seconds, stage=stage)
+                print(f"Finished processing {symbol} ({len(df)} bars, {len(news_df)} news items).")
+                if not df.empty:
+                    yield symbol, df, news_df
+
+def process_symbol(df, news_df, compact=False, sentiment_backend='vader'):
+    """
+    CPU stages for one symbol (runs in a worker process).
+    Returns (df with warmup bars, scored news_df, {stage: seconds}).
+    """
+    from sentiment_analyzer import score_headlines
+    from technical_analysis import add_technical_indicators, detect_candlestick_patterns
+
+    timings = {}
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    if not news_df.empty:
+        news_df['Sentiment'] = timed('sentiment', score_headlines, news_df['title'], backend=sentiment_backend)
+
+    df = timed('indicators', add_technical_indicators, df, compact)
+    df = timed('patterns', detect_candlestick_patterns, df, compact)
+
+    return df, news_df, timings
+
+def apply_signals(data_dict, start_date, end_date, sentiment_panel=None, compact=False):
+    """
+    Signal stage for the whole prepared universe (in place with compact=True): each symbol's
+    sentiment is joined from one universe-wide SentimentPanel (see sentiment_panel.py;
+    None skips the sentiment rules). Returns {symbol: df} sliced to [start_date, end_date].
+    """
+    from strategy import AdvancedPatternStrategy
+
+    strategy = AdvancedPatternStrategy()
+    signals = {}
+    for symbol, df in data_dict.items():
+        with metrics.timer('signals'):
+            sentiment = sentiment_panel.join(symbol, df.index) if sentiment_panel is not None else None
+            signals[symbol] = strategy.generate_signals(df, compact=compact, sentiment=sentiment).loc[start_date:end_date]
+    return signals
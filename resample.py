@@ -0,0 +1,130 @@
+import argparse
+import os
+import pandas as pd
+
+# How each column of a finer bar folds into a coarser one (other columns are dropped)
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum', 'Dividends': 'sum'}
+
+DEFAULT_RULES = ('5min', '1h', '1D')
+
+class StreamingResampler:
+    """
+    Builds coarser bars ('5min', '1h', '1D', ...) from time-ordered chunks of finer bars.
+
+    Every chunk is resampled on its own. Its last bucket may still receive bars from the
+    next chunk, so those rows are held back and prepended to it. Memory is bounded by one
+    chunk plus one bucket, and the bars equal df.resample(rule).agg(AGGREGATIONS) over the
+    whole series, minus empty buckets (nights, weekends).
+
+    Buckets are aligned to midnight in the index's timezone (daily bars are exchange days
+    for tz-aware data), so the rule must divide a day evenly; `offset` shifts the grid,
+    e.g. '30min' for hourly bars starting at the 9:30 open.
+    """
+    def __init__(self, rule, offset=None):
+        seconds = pd.Timedelta(pd.tseries.frequencies.to_offset(rule)).total_seconds()
+        if seconds <= 0 or 86400 % seconds:
+            raise ValueError(f"Rule {rule} does not divide a day evenly")
+        self.rule = rule
+        self.offset = offset
+        self.pending = None # Rows of the last, possibly incomplete bucket
+
+    def update(self, chunk):
+        """
+        Feeds one chunk and returns the bars that are complete (possibly none).
+        """
+        if self.pending is not None:
+            if not chunk.empty and chunk.index[0] < self.pending.index[-1]:
+                raise ValueError(f"Chunk starting {chunk.index[0]} is older than the bars already seen")
+            chunk = pd.concat([self.pending, chunk])
+        if chunk.empty:
+            return pd.DataFrame()
+
+        bars = self._resample(chunk)
+        self.pending = chunk[chunk.index >= bars.index[-1]]
+        return bars.iloc[:-1]
+
+    def flush(self):
+        """
+        Returns the last bucket once the input is exhausted.
+        """
+        if self.pending is None or self.pending.empty:
+            return pd.DataFrame()
+        bars = self._resample(self.pending)
+        self.pending = None
+        return bars
+
+    def _resample(self, df):
+        aggregations = {c: f for c, f in AGGREGATIONS.items() if c in df.columns}
+        bars = df.resample(self.rule, offset=self.offset).agg(aggregations)
+        return bars.dropna(subset=['Close'])
+
+def resample_chunks(chunks, rule, offset=None):
+    """
+    Yields resampled bars per input chunk (see StreamingResampler).
+    """
+    resampler = StreamingResampler(rule, offset)
+    for chunk in chunks:
+        bars = resampler.update(chunk)
+        if not bars.empty:
+            yield bars
+    bars = resampler.flush()
+    if not bars.empty:
+        yield bars
+
+def frame_chunks(df, rows=100000):
+    """
+    Slices an in-memory frame into chunks of `rows` bars.
+    """
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+def read_csv_chunks(path, rows=1000000, tz=None):
+    """
+    Streams a bar CSV (first column the timestamp, e.g. an exported 1-minute history)
+    in chunks of `rows`, without ever loading the whole file. Naive timestamps are taken
+    to be in `tz`; timestamps with UTC offsets are converted to it.
+    """
+    for chunk in pd.read_csv(path, chunksize=rows, index_col=0):
+        index = pd.to_datetime(chunk.index, utc=True) if chunk.index.str.contains(r'[+-]\d\d:\d\d$').any() else pd.to_datetime(chunk.index)
+        if tz:
+            index = index.tz_convert(tz) if index.tz is not None else index.tz_localize(tz)
+        chunk.index = index
+        chunk.index.name = 'Date'
+        yield chunk
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream-resample fine bars (e.g. 1-minute) into coarser bars")
+    parser.add_argument('input', type=str, help="Bar CSV with the timestamp in the first column")
+    parser.add_argument('--rules', type=str, default=','.join(DEFAULT_RULES), help="Comma-separated target bar sizes")
+    parser.add_argument('--offset', type=str, default=None, help="Shift the bucket grid, e.g. 30min")
+    parser.add_argument('--tz', type=str, default='America/New_York', help="Exchange timezone for the bucket grid ('' keeps timestamps as-is)")
+    parser.add_argument('--rows', type=int, default=1000000, help="Input rows per chunk")
+    parser.add_argument('--output-prefix', type=str, default='', help="Write <prefix>_<rule>.csv (default: next to the input)")
+    args = parser.parse_args()
+
+    prefix = args.output_prefix or os.path.splitext(args.input)[0]
+    resamplers = {rule: StreamingResampler(rule, args.offset) for rule in args.rules.split(',')}
+    paths = {rule: f"{prefix}_{rule}.csv" for rule in resamplers}
+    counts = dict.fromkeys(resamplers, 0)
+
+    def write(rule, bars):
+        if bars.empty:
+            return
+        bars.to_csv(paths[rule], mode='a' if counts[rule] else 'w', header=not counts[rule])
+        counts[rule] += len(bars)
+
+    # One pass over the input feeds every target size
+    total = 0
+    for chunk in read_csv_chunks(args.input, args.rows, args.tz or None):
+        total += len(chunk)
+        for rule, resampler in resamplers.items():
+            write(rule, resampler.update(chunk))
+    for rule, resampler in resamplers.items():
+        write(rule, resampler.flush())
+
+    print(f"Read {total} bars from {args.input}")
+    for rule in resamplers:
+        print(f"{rule}: {counts[rule]} bars -> {paths[rule]}")
+
+if __name__ == "__main__":
+    main()
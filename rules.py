@@ -0,0 +1,202 @@
+import numpy as np
+
+# Comparison operators a condition may use
+OPERATORS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+             '==': np.equal, '!=': np.not_equal}
+
+def prev(column, bars=1):
+    """
+    Condition term for `column` `bars` bars ago (e.g. yesterday's SMA_20 in a crossover).
+    """
+    return (column, bars)
+
+class Rule:
+    """
+    Adds `weight` to the score where every condition holds.
+
+    A condition is (left, op, right): op is a key of OPERATORS and each side a column name,
+    prev(column, bars) or a number. A bare column name is a bool column (e.g. 'Hammer').
+    optional=True skips the rule when a column it reads is missing (e.g. Sentiment without news).
+    """
+    def __init__(self, weight, *conditions, optional=False):
+        self.weight = weight
+        self.conditions = conditions
+        self.optional = optional
+
+class Override:
+    """
+    Forces the signal to `signal` where every condition holds, after the thresholds
+    (e.g. sell on a death cross whatever the score).
+    """
+    def __init__(self, signal, *conditions, optional=False):
+        self.signal = signal
+        self.conditions = conditions
+        self.optional = optional
+
+class ScoringRules:
+    """
+    A scoring strategy compiled once from its declarative specification.
+
+    Every distinct condition is evaluated once per call and shared by the rules that use it,
+    the score is one weighted sum over the rule masks, then:
+      Signal = 1 where Score >= buy_threshold, -1 where Score <= sell_threshold, else 0,
+    and the overrides are applied in order.
+
+    The same object scores a history (score_frame: backtests) and the latest bar
+    (score_latest: live agents), so both always agree.
+    """
+    def __init__(self, rules, buy_threshold, sell_threshold, overrides=()):
+        self.rules = list(rules)
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.overrides = list(overrides)
+
+        # 1. Unique conditions, each normalised to (left term, op, right term)
+        self.conditions = []
+        positions = {}
+        def compile_condition(condition):
+            if isinstance(condition, str):
+                condition = (condition, '!=', False)
+            left, op, right = condition
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op!r} in condition {condition}")
+            key = (_term(left), op, _term(right))
+            if key not in positions:
+                positions[key] = len(self.conditions)
+                self.conditions.append(key)
+            return positions[key]
+
+        # 2. Each rule/override becomes the tuple of its condition positions
+        self.rule_conditions = [tuple(compile_condition(c) for c in rule.conditions) for rule in self.rules]
+        self.override_conditions = [tuple(compile_condition(c) for c in o.conditions) for o in self.overrides]
+        self.weights = np.array([rule.weight for rule in self.rules], dtype=np.int64)
+
+        # 3. Columns each condition reads, to skip optional rules on missing data
+        self.condition_columns = [{t[1] for t in (left, right) if t[0] == 'column'} for left, _, right in self.conditions]
+
+    @property
+    def columns(self):
+        """
+        Every column the rules read.
+        """
+        return set().union(*self.condition_columns)
+
+    def score_frame(self, df, unavailable=()):
+        """
+        Scores a history: df maps column -> values with bars along axis 0 (a DataFrame, or
+        {column: dates x symbols array}). prev() terms read earlier rows.
+        Columns in `unavailable` are treated as missing.
+        Returns (score, signal) int64 arrays.
+        """
+        return self._evaluate(_Columns(df, None, unavailable))
+
+    def score_latest(self, latest, previous=None, unavailable=()):
+        """
+        Scores one bar: a DataFrame row, a MarketSnapshot (one value per symbol) or any
+        mapping of column -> value(s). prev() terms read `previous`, the same kind of source
+        one bar earlier; without it they are NaN, so conditions on them are False.
+        Returns (score, signal): scalars for a row, arrays for a snapshot.
+        """
+        return self._evaluate(_Columns(latest, {} if previous is None else previous, unavailable))
+
+    def _evaluate(self, columns):
+        # 1. Evaluate each condition once (None = reads a missing column)
+        masks = [None] * len(self.conditions)
+        for i, (left, op, right) in enumerate(self.conditions):
+            if all(columns.available(c) for c in self.condition_columns[i]):
+                with np.errstate(invalid='ignore'):
+                    masks[i] = OPERATORS[op](columns.term(left), columns.term(right))
+
+        # 2. Rule masks, then the score as one weighted sum
+        rule_masks = [self._combine(masks, conditions, rule) for rule, conditions in zip(self.rules, self.rule_conditions)]
+        shape = np.broadcast_shapes(*(np.shape(m) for m in masks if m is not None))
+        if rule_masks:
+            score = np.tensordot(self.weights, np.stack([np.broadcast_to(m, shape) for m in rule_masks]), axes=1)
+        else:
+            score = np.zeros(shape, dtype=np.int64)
+
+        # 3. Thresholds, then overrides in order
+        signal = np.where(score >= self.buy_threshold, 1, 0)
+        signal = np.where(score <= self.sell_threshold, -1, signal)
+        for override, conditions in zip(self.overrides, self.override_conditions):
+            mask = self._combine(masks, conditions, override)
+            signal = np.where(mask, override.signal, signal)
+
+        if signal.ndim == 0:
+            return score.item(), signal.item()
+        return score, signal
+
+    def _combine(self, masks, conditions, rule):
+        if any(masks[i] is None for i in conditions):
+            if not rule.optional:
+                missing = sorted(set().union(*(self.condition_columns[i] for i in conditions if masks[i] is None)))
+                raise KeyError(f"Rule reads missing column(s) {missing}")
+            return False
+        mask = True
+        for i in conditions:
+            mask = mask & masks[i]
+        return mask
+
+def _term(value):
+    # ('column', name, bars) for columns, ('value', number) for constants
+    if isinstance(value, str):
+        return ('column', value, 0)
+    if isinstance(value, tuple):
+        column, bars = value
+        return ('column', column, bars)
+    return ('value', value)
+
+class _Columns:
+    """
+    Column values for one evaluation, each read (and shifted) at most once.
+    previous=None means rows are bars in time order and prev() shifts them.
+    """
+    def __init__(self, source, previous, unavailable):
+        self.source = source
+        self.previous = previous
+        self.unavailable = set(unavailable)
+        self.cache = {}
+
+    def available(self, name):
+        if name in self.unavailable:
+            return False
+        try:
+            self.term(('column', name, 0))
+        except KeyError:
+            return False
+        return True
+
+    def term(self, term):
+        if term[0] == 'value':
+            return term[1]
+        _, name, bars = term
+        key = (name, bars)
+        if key not in self.cache:
+            if bars == 0:
+                values = _read(self.source, name)
+            elif self.previous is None:
+                values = _shift(self.term(('column', name, 0)), bars)
+            else:
+                values = self._previous(name, bars)
+            self.cache[key] = values
+        return self.cache[key]
+
+    def _previous(self, name, bars):
+        # Only the bar right before `latest` is known
+        current = self.term(('column', name, 0))
+        if bars != 1:
+            return np.full(np.shape(current), np.nan)
+        try:
+            return _read(self.previous, name)
+        except KeyError:
+            return np.full(np.shape(current), np.nan)
+
+def _read(source, name):
+    values = source[name]
+    return values.to_numpy() if hasattr(values, 'to_numpy') else np.asarray(values)
+
+def _shift(values, bars):
+    # values[t - bars] along axis 0, NaN before the first bar
+    shifted = np.full(values.shape, np.nan)
+    shifted[bars:] = values[:len(values) - bars]
+    return shifted
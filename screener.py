@@ -0,0 +1,227 @@
+import os
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from datetime import timedelta
+from data_cache import CACHE_DIR, _to_date, _add_range, _missing_ranges
+
+# (lookback_days, skip_days): momentum over [ref - lookback, ref - skip)
+DEFAULT_WINDOWS = ((180, 0),)
+
+class ClosePanelCache:
+    """
+    One dates x symbols close-price panel for a whole universe, kept in a single .npz file.
+
+    All symbols in the panel share one list of covered [start, end) date ranges, so
+    screening a cached universe is a single file read with no per-symbol work. New symbols
+    are downloaded over the full covered span and new date ranges for every symbol. A range
+    (or a new symbol) is marked covered once its download succeeds, even if some symbols come
+    back without bars (delisted, not yet listed): those stay NaN instead of being re-fetched
+    on every run. A failed or throttled download (an error or an empty frame) leaves the
+    range open, so it is retried on the next run.
+    """
+    def __init__(self, path=os.path.join(CACHE_DIR, 'universe_close.npz')):
+        self.path = path
+
+    def load(self):
+        """
+        Returns (dates, symbols, close, covered); dates are datetime64[D], close is float64 with NaN gaps.
+        """
+        if not os.path.exists(self.path):
+            return np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)), []
+
+        with np.load(self.path, allow_pickle=False) as archive:
+            dates = archive['dates']
+            symbols = [str(s) for s in archive['symbols']]
+            close = archive['close']
+            covered = [(s.astype(object), e.astype(object)) for s, e in archive['covered']]
+        return dates, symbols, close, covered
+
+    def save(self, dates, symbols, close, covered):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, dates=dates, symbols=np.array(symbols, dtype=str), close=close,
+                     covered=np.array(covered, dtype='datetime64[D]').reshape(-1, 2))
+        os.replace(tmp_path, self.path)
+
+    def get(self, tickers, start_date, end_date, downloader):
+        """
+        Returns (dates, symbols, close) covering [start_date, end_date) for at least `tickers`.
+        downloader(tickers, start, end) must return a dates x tickers DataFrame of closes.
+        """
+        dates, symbols, close, covered = self.load()
+        start, end = _to_date(start_date), _to_date(end_date)
+
+        # 1. Work out what is missing: new symbols over the whole span, new dates for everyone
+        known = set(symbols)
+        new_symbols = list(dict.fromkeys(t for t in tickers if t not in known))
+        missing = _missing_ranges(covered, start, end)
+        if not new_symbols and not missing:
+            return dates, symbols, close
+
+        # 2. Download and merge into one frame
+        frame = pd.DataFrame(close, index=pd.DatetimeIndex(dates), columns=symbols)
+        fetched = False
+        covered_before = list(covered)
+
+        def download(job_symbols, job_start, job_end):
+            # Merges the downloaded closes; returns whether the download succeeded
+            nonlocal frame, fetched
+            try:
+                new_frame = downloader(job_symbols, job_start.strftime('%Y-%m-%d'), job_end.strftime('%Y-%m-%d'))
+            except Exception as e:
+                print(f"Warning: Close download failed for {job_start} to {job_end}: {e}")
+                return False
+            if new_frame is None or new_frame.empty:
+                return False
+            new_frame = new_frame.reindex(columns=job_symbols)
+            frame = new_frame.combine_first(frame) if not frame.empty else new_frame
+            fetched = True
+            return True
+
+        # New symbols stay out of the panel when their download failed, so they are retried next time
+        if new_symbols:
+            span_start = min([start] + [s for s, _ in covered])
+            span_end = max([end] + [e for _, e in covered])
+            if not download(new_symbols, span_start, span_end):
+                new_symbols = []
+
+        # 3. A range counts as covered once its download succeeded
+        # (a range without business days has no bars to wait for)
+        for range_start, range_end in missing:
+            if not symbols or np.busday_count(range_start, range_end) == 0 or download(symbols, range_start, range_end):
+                covered = _add_range(covered, range_start, range_end)
+        if not fetched and covered == covered_before:
+            return dates, symbols, close
+
+        frame = frame.reindex(columns=symbols + new_symbols).sort_index()
+        dates = frame.index.values.astype('datetime64[D]')
+        symbols = list(frame.columns)
+        close = frame.to_numpy(dtype=float)
+        try:
+            self.save(dates, symbols, close, covered)
+        except OSError as e:
+            print(f"Warning: Could not write close panel cache: {e}")
+        return dates, symbols, close
+
+def momentum_returns(dates, close, reference_date, windows=DEFAULT_WINDOWS):
+    """
+    Returns {window name: ndarray of returns per column} for every (lookback_days, skip_days)
+    window, using the first and last valid close inside [ref - lookback, ref - skip).
+
+    First/last valid row indices are computed once for the whole panel (a forward and a
+    backward running max/min), so each extra window costs only two row lookups per symbol.
+    Columns with no valid close in a window, or a non-positive start price, are NaN.
+    """
+    ref = np.datetime64(_to_date(reference_date), 'D')
+    n_rows, n_cols = close.shape
+    valid = ~np.isnan(close)
+    rows = np.arange(n_rows)[:, None]
+
+    # prev_valid[t, j]: last valid row <= t (-1 if none); next_valid[t, j]: first valid row >= t (n_rows if none)
+    prev_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    next_valid = np.minimum.accumulate(np.where(valid, rows, n_rows)[::-1], axis=0)[::-1]
+    cols = np.arange(n_cols)
+
+    results = {}
+    for lookback, skip in windows:
+        a = np.searchsorted(dates, ref - np.timedelta64(lookback, 'D'))
+        b = np.searchsorted(dates, ref - np.timedelta64(skip, 'D'))
+        returns = np.full(n_cols, np.nan)
+        if a < b:
+            first = next_valid[a]
+            last = prev_valid[b - 1]
+            ok = first < b
+            start_price = close[first[ok], cols[ok]]
+            end_price = close[last[ok], cols[ok]]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[ok] = np.where(start_price > 0, (end_price - start_price) / start_price, np.nan)
+        results[window_name(lookback, skip)] = returns
+    return results
+
+def window_name(lookback, skip):
+    return f"mom_{lookback}d" if not skip else f"mom_{lookback}d_skip{skip}d"
+
+def top_n_indices(values, n):
+    """
+    Positions of the n largest finite values, best first (ties keep input order).
+    Uses argpartition, so only the selected n are sorted.
+    """
+    candidates = np.flatnonzero(np.isfinite(values))
+    if n < len(candidates):
+        candidates = np.sort(candidates[np.argpartition(-values[candidates], n - 1)[:n]])
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order]
+
+class MomentumScreener:
+    """
+    Ranks a universe by price momentum from a cached close panel.
+    windows: (lookback_days, skip_days) pairs, e.g. ((365, 30), (180, 0)) for 12-1 and 6-month momentum.
+    """
+    def __init__(self, windows=DEFAULT_WINDOWS, cache=None):
+        self.windows = tuple(windows)
+        self.cache = cache or ClosePanelCache()
+
+    def scores(self, tickers, reference_date):
+        """
+        DataFrame of window returns indexed by ticker (tickers without data are dropped).
+        """
+        ref = _to_date(reference_date)
+        start = ref - timedelta(days=max(lookback for lookback, _ in self.windows))
+        dates, symbols, close = self.cache.get(tickers, start, ref, _download_closes)
+
+        position = {symbol: j for j, symbol in enumerate(symbols)}
+        tickers = [t for t in dict.fromkeys(tickers) if t in position]
+        if not tickers:
+            return pd.DataFrame(columns=[window_name(*w) for w in self.windows])
+
+        # Only the requested columns and the rows up to the reference date take part
+        stop = np.searchsorted(dates, np.datetime64(ref, 'D'))
+        first_row = np.searchsorted(dates, np.datetime64(start, 'D'))
+        panel = close[first_row:stop][:, [position[t] for t in tickers]]
+        returns = momentum_returns(dates[first_row:stop], panel, ref, self.windows)
+        return pd.DataFrame(returns, index=tickers).dropna(how='all')
+
+    def scores_from_panel(self, panel, reference_date, tickers=None):
+        """
+        Same as scores() but reads closes straight from a MarketPanel (e.g. a memory-mapped
+        one from MarketPanel.open) instead of the close cache. Rows are sliced as views, so
+        only the requested columns are copied.
+        """
+        ref = _to_date(reference_date)
+        start = ref - timedelta(days=max(lookback for lookback, _ in self.windows))
+        index = panel.dates.tz_localize(None) if panel.dates.tz is not None else panel.dates
+        dates = index.normalize().values.astype('datetime64[D]')
+
+        position = {symbol: j for j, symbol in enumerate(panel.symbols)}
+        tickers = [t for t in dict.fromkeys(tickers or panel.symbols) if t in position]
+        if not tickers:
+            return pd.DataFrame(columns=[window_name(*w) for w in self.windows])
+
+        stop = np.searchsorted(dates, np.datetime64(ref, 'D'))
+        first_row = np.searchsorted(dates, np.datetime64(start, 'D'))
+        close = panel['Close'][first_row:stop][:, [position[t] for t in tickers]]
+        returns = momentum_returns(dates[first_row:stop], close, ref, self.windows)
+        return pd.DataFrame(returns, index=tickers).dropna(how='all')
+
+    def top(self, tickers, reference_date, top_n=10, by=None):
+        """
+        Top N tickers by the `by` window (default: the first window).
+        """
+        scores = self.scores(tickers, reference_date)
+        column = by or window_name(*self.windows[0])
+        picked = top_n_indices(scores[column].to_numpy(), top_n)
+        return list(scores.index[picked])
+
+def _download_closes(tickers, start_date, end_date):
+    """
+    Bulk-downloads closes as a dates x tickers frame with a tz-naive daily index.
+    """
+    print(f"Downloading closes for {len(tickers)} symbols from {start_date} to {end_date}...")
+    data = yf.download(" ".join(tickers), start=start_date, end=end_date, progress=False)['Close']
+    if isinstance(data, pd.Series):
+        data = data.to_frame(tickers[0])
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    data.index = index.normalize()
+    return data
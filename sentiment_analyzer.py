@@ -1,11 +1,35 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
 import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from data_cache import CACHE_DIR
 
-# Ensure lexicon is downloaded
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
+SENTIMENT_CACHE_FILE = os.path.join(CACHE_DIR, 'sentiment.sqlite')
+
+# 'vader': NLTK's analyzer per headline; 'fast': bulk NumPy scorer (see fast_sentiment.py)
+BACKENDS = ('vader', 'fast')
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
+    """
+    Returns the shared VADER analyzer, downloading the lexicon on first use only.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                try:
+                    nltk.data.find('sentiment/vader_lexicon.zip')
+                except LookupError:
+                    nltk.download('vader_lexicon')
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
 
 def analyze_sentiment(text):
     """
@@ -14,11 +38,105 @@ def analyze_sentiment(text):
     """
     if not text:
         return 0.0
-    
-    sid = SentimentIntensityAnalyzer()
-    scores = sid.polarity_scores(text)
+
+    scores = get_analyzer().polarity_scores(text)
     return scores['compound']
 
+def normalize_headline(text):
+    """
+    Key used to collapse duplicate headlines. Only whitespace runs are collapsed:
+    VADER ignores them, but case ("GREAT") and punctuation ("!!!") change the score.
+    """
+    if not text:
+        return ''
+    return ' '.join(str(text).split())
+
+class SentimentCache:
+    """
+    Persistent {headline hash: compound score} store backed by SQLite.
+    """
+    def __init__(self, path=SENTIMENT_CACHE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS scores (hash TEXT PRIMARY KEY, compound REAL NOT NULL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # Bumped whenever normalize_headline changes, so older entries are never matched
+    KEY_VERSION = 'v2'
+
+    @staticmethod
+    def key(normalized):
+        return hashlib.sha1(f"{SentimentCache.KEY_VERSION}:{normalized}".encode('utf-8')).hexdigest()
+
+    def get_many(self, hashes):
+        found = {}
+        hashes = list(hashes)
+        with self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 900):
+                chunk = hashes[i:i + 900]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(conn.execute(f'SELECT hash, compound FROM scores WHERE hash IN ({placeholders})', chunk))
+        return found
+
+    def put_many(self, scores):
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO scores (hash, compound) VALUES (?, ?)', scores.items())
+
+def score_headlines(headlines, cache=True, processes=None, parallel_threshold=5000, backend='vader'):
+    """
+    Scores many headlines at once with one long-lived analyzer.
+    backend='fast' scores them in bulk with fast_sentiment (same scores, see its tolerance).
+
+    Duplicate headlines (see normalize_headline) are scored once, scores are
+    memoized in a persistent cache (pass a SentimentCache, True for the default one, or False),
+    and batches larger than parallel_threshold are spread across worker processes.
+    Returns a Series aligned with the input (same index if a Series was given).
+    """
+    index = headlines.index if isinstance(headlines, pd.Series) else None
+    texts = ['' if pd.isna(t) else str(t) for t in headlines]
+
+    # 1. Dedupe: one representative headline per normalized key
+    normalized = [normalize_headline(t) for t in texts]
+    representatives = {}
+    for text, norm in zip(texts, normalized):
+        if norm and norm not in representatives:
+            representatives[norm] = text
+    hashes = {norm: SentimentCache.key(norm) for norm in representatives}
+
+    # 2. Reuse memoized scores
+    if cache is True:
+        cache = SentimentCache()
+    scores_by_hash = cache.get_many(hashes.values()) if cache else {}
+
+    # 3. Score what is left
+    todo = [norm for norm in representatives if hashes[norm] not in scores_by_hash]
+    if todo:
+        todo_texts = [representatives[norm] for norm in todo]
+        if backend == 'fast':
+            from fast_sentiment import compound_scores
+            new_scores = compound_scores(todo_texts).tolist()
+        elif backend != 'vader':
+            raise ValueError(f"Unknown sentiment backend: {backend}")
+        elif processes != 1 and len(todo_texts) >= parallel_threshold:
+            processes = processes or os.cpu_count()
+            chunksize = max(1, len(todo_texts) // (processes * 4))
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                new_scores = list(pool.map(analyze_sentiment, todo_texts, chunksize=chunksize))
+        else:
+            new_scores = [analyze_sentiment(t) for t in todo_texts]
+
+        computed = {hashes[norm]: score for norm, score in zip(todo, new_scores)}
+        scores_by_hash.update(computed)
+        if cache:
+            cache.put_many(computed)
+
+    result = [scores_by_hash[hashes[norm]] if norm else 0.0 for norm in normalized]
+    return pd.Series(result, index=index, dtype=float, name='Sentiment')
+
 if __name__ == "__main__":
     print(f"Sentiment of 'I love this stock!': {analyze_sentiment('I love this stock!')}")
     print(f"Sentiment of 'This company is going bankrupt.': {analyze_sentiment('This company is going bankrupt.')}")
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+# Per-session features a panel can hold:
+#   mean  - mean headline sentiment of the session, carried forward until the next news (0 before any)
+#   count - headlines rolled into the session (0 without news)
+#   decay - mean of all headlines so far, each weighted by 0.5 ** (age in days / half_life);
+#           it holds its value between news, and recent headlines outweigh older ones
+AGGREGATIONS = ('mean', 'count', 'decay')
+
+DEFAULT_HALF_LIFE = 3.0
+
+# Exchange wall clock: news after the close belongs to the next session
+EXCHANGE_TZ = 'America/New_York'
+SESSION_CLOSE = '16:00'
+
+def session_days(index):
+    """
+    Wall-clock day of each bar as datetime64[D]. Bars carry the exchange timezone while
+    news dates are naive, so tz-aware indexes keep their local day.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype('datetime64[D]')
+
+def bar_calendar(data_dict):
+    """
+    Sorted session days of every frame in {symbol: df}.
+    """
+    days = [session_days(df.index) for df in data_dict.values()]
+    return np.unique(np.concatenate(days)) if days else np.array([], dtype='datetime64[D]')
+
+class SentimentPanel:
+    """
+    News sentiment for a whole universe: one dates x symbols frame per feature (see AGGREGATIONS).
+
+    Headlines are as-of joined to the session calendar: each one counts for the first
+    session on or after its date, so weekend and holiday news (and, with session_close,
+    after-hours news) rolls forward to the next trading day instead of being dropped.
+    All symbols are aggregated in one grouped pass.
+    """
+    def __init__(self, calendar, features):
+        self.calendar = calendar # sorted datetime64[D] session days
+        self.features = features # {name: DataFrame dates x symbols}
+
+    @classmethod
+    def from_news(cls, news, calendar, aggregations=('mean',), half_life=DEFAULT_HALF_LIFE,
+                  session_close=None, symbols=None):
+        """
+        news: {symbol: DataFrame[Date, Sentiment]} or one DataFrame with a symbol column.
+        calendar: session days (e.g. bar_calendar(data_dict)); news after the last one is dropped.
+        session_close: e.g. SESSION_CLOSE for timestamped news: headlines at or after the close
+        belong to the next session (None: dates are calendar days). Naive timestamps are
+        exchange time; tz-aware ones are converted to EXCHANGE_TZ.
+        """
+        for name in aggregations:
+            if name not in AGGREGATIONS:
+                raise ValueError(f"Unknown sentiment aggregation: {name}")
+        calendar = np.unique(session_days(calendar))
+        frame = _long_news(news)
+        if symbols is None:
+            symbols = sorted(frame['symbol'].unique())
+        symbols = list(symbols)
+        n_dates, n_symbols = len(calendar), len(symbols)
+
+        # 1. As-of join: session of each headline
+        stamps = frame['Date']
+        if not pd.api.types.is_datetime64_any_dtype(stamps):
+            stamps = pd.to_datetime(stamps)
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_convert(EXCHANGE_TZ).dt.tz_localize(None)
+        stamps = stamps.to_numpy()
+        if session_close is not None:
+            close = pd.to_datetime(session_close, format='%H:%M')
+            stamps = stamps + (pd.Timedelta(days=1) - pd.Timedelta(hours=close.hour, minutes=close.minute)).to_timedelta64()
+        days = stamps.astype('datetime64[D]')
+        session = np.searchsorted(calendar, days, side='left') # NaT sorts last: dropped
+        column = pd.Index(symbols).get_indexer(frame['symbol'])
+        valid = (session < n_dates) & (column >= 0)
+
+        # 2. Aggregate (session, symbol) cells for every symbol at once
+        cells = session[valid] * n_symbols + column[valid]
+        sentiment = frame['Sentiment'].to_numpy(dtype=float)[valid]
+        size = n_dates * n_symbols
+
+        dates = pd.DatetimeIndex(calendar.astype('datetime64[ns]'))
+        def grid(values):
+            return values.reshape(n_dates, n_symbols)
+
+        # 3. Features
+        features = {}
+        if 'mean' in aggregations:
+            mean = pd.Series(sentiment).groupby(cells).mean()
+            values = np.full(size, np.nan)
+            values[mean.index.to_numpy()] = mean.to_numpy()
+            features['mean'] = pd.DataFrame(grid(values), index=dates, columns=symbols).ffill().fillna(0.0)
+        if 'count' in aggregations:
+            count = np.bincount(cells, weights=~np.isnan(sentiment), minlength=size).astype(np.int64)
+            features['count'] = pd.DataFrame(grid(count), index=dates, columns=symbols)
+        if 'decay' in aggregations:
+            # Each headline enters its session already aged by the days it rolled forward
+            scored = ~np.isnan(sentiment)
+            age = (calendar[session[valid]] - days[valid]).astype(float)
+            weight = np.where(scored, 0.5 ** (age / half_life), 0.0)
+            weighted = np.bincount(cells, weights=np.where(scored, sentiment, 0.0) * weight, minlength=size)
+            weights = np.bincount(cells, weights=weight, minlength=size)
+            features['decay'] = pd.DataFrame(_decay(calendar, grid(weighted), grid(weights), half_life),
+                                             index=dates, columns=symbols)
+        return cls(calendar, features)
+
+    @classmethod
+    def from_archive(cls, symbols, start_date, end_date, calendar, archive=None, backend='fast', **options):
+        """
+        Builds the panel from the local news archive (no network): every archived headline
+        of the universe is scored in one batch (see sentiment_analyzer.score_headlines).
+        """
+        from news_archive import NewsArchive
+        from sentiment_analyzer import score_headlines
+
+        archive = archive or NewsArchive()
+        frames = [archive.query(symbol, start_date, end_date).assign(symbol=symbol) for symbol in symbols]
+        news = pd.concat(frames, ignore_index=True)
+        news['Sentiment'] = score_headlines(news['title'], backend=backend).to_numpy()
+        return cls.from_news(news, calendar, symbols=symbols, **options)
+
+    def feature(self, name='mean'):
+        if name not in self.features:
+            raise KeyError(f"Panel has no {name!r} feature (built with {list(self.features)})")
+        return self.features[name]
+
+    def join(self, symbol, index, feature='mean'):
+        """
+        Feature values for one symbol's bars: each bar takes its session's value
+        (every intraday bar of a day shares it; bars before the calendar get 0).
+        """
+        frame = self.feature(feature)
+        if symbol not in frame.columns:
+            return pd.Series(0.0, index=index, name='Sentiment')
+        position = np.searchsorted(self.calendar, session_days(index), side='right') - 1
+        values = frame[symbol].to_numpy()
+        joined = np.where(position >= 0, values[np.maximum(position, 0)], 0)
+        return pd.Series(joined, index=index, name='Sentiment')
+
+def sentiment_for_bars(news_df, index, feature='mean', **options):
+    """
+    Per-bar sentiment of one symbol straight from its news (a one-symbol panel on the bars' own sessions).
+    """
+    panel = SentimentPanel.from_news({'news': news_df}, session_days(index), aggregations=(feature,), **options)
+    return panel.join('news', index, feature)
+
+def _long_news(news):
+    if isinstance(news, pd.DataFrame):
+        return news[['symbol', 'Date', 'Sentiment']]
+    frames = [df[['Date', 'Sentiment']].assign(symbol=symbol) for symbol, df in news.items() if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame({'symbol': pd.Series(dtype=object), 'Date': pd.Series(dtype='datetime64[ns]'),
+                             'Sentiment': pd.Series(dtype=float)})
+    return pd.concat(frames, ignore_index=True)
+
+def _decay(calendar, weighted, weights, half_life):
+    # Running decay-weighted sums, stepped once per session for all symbols at once
+    gaps = np.diff(calendar).astype(float)
+    numerator = np.zeros(weighted.shape[1])
+    denominator = np.zeros(weighted.shape[1])
+    out = np.zeros(weighted.shape)
+    for t in range(len(weighted)):
+        if t:
+            fade = 0.5 ** (gaps[t - 1] / half_life)
+            numerator *= fade
+            denominator *= fade
+        numerator += weighted[t]
+        denominator += weights[t]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[t] = np.where(denominator > 0, numerator / denominator, 0.0)
+    return out
@@ -0,0 +1,106 @@
+import math
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError: # Optional JIT; the NumPy/Python paths give identical results
+    njit = None
+
+# Below this many symbols the scalar loop beats stepping NumPy through time
+# (benchmarks/stops.py timing: the two cross between 36 and 44 symbols, for 2 and 8 years of bars)
+CROSS_SECTION_MIN_SYMBOLS = 40
+
+def ratchet(price, atr, held, highest, multiplier):
+    """
+    One bar of the ATR trailing stop across symbols (the rule the Backtester and agents share).
+    Held symbols raise their high-water mark to today's close; a held symbol is stopped out
+    when its close falls below highest - ATR * multiplier (NaN ATR never stops).
+    Returns (new highest array, stop-hit mask).
+    """
+    highest = np.where(held & (price > highest), price, highest)
+    with np.errstate(invalid='ignore'):
+        hits = held & (price < highest - atr * multiplier)
+    return highest, hits
+
+def trailing_stop_path(price, atr, entries, multiplier=4.0, exits=None):
+    """
+    Path-dependent trailing stop for positions opened on `entries` bars.
+
+    price, atr: (bars,) or (bars, symbols); entries/exits: bool masks of the same shape.
+    Each bar, in the order Backtester and ProAgent/AggressiveAgent apply it:
+      1. a held position ratchets its high-water mark and is stopped out below highest - ATR * multiplier,
+      2. otherwise an exit signal closes it,
+      3. a symbol that was flat at the start of the bar opens on an entry signal (highest = entry close).
+    NaN prices are bars without data: the position carries over untouched.
+
+    Entries are positions actually opened; for a cash-constrained portfolio they come from
+    the portfolio simulation. Compiled with numba when it is installed.
+    Returns (stop exits, highest): stop exits are bar indices (1D input) or (bar, symbol)
+    index arrays like np.nonzero (2D input); highest is the running high-water mark,
+    NaN on bars where no position is held.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    one_symbol = price.ndim == 1
+    price = price.reshape(len(price), -1)
+    atr = np.asarray(atr, dtype=np.float64).reshape(price.shape)
+    entries = np.asarray(entries, dtype=bool).reshape(price.shape)
+    exits = np.zeros(price.shape, dtype=bool) if exits is None else np.asarray(exits, dtype=bool).reshape(price.shape)
+
+    stops = np.zeros(price.shape, dtype=bool)
+    highest = np.full(price.shape, np.nan)
+    if _compiled_path is not None:
+        _compiled_path(price, atr, entries, exits, float(multiplier), stops, highest)
+    elif price.shape[1] >= CROSS_SECTION_MIN_SYMBOLS:
+        _path_cross_section(price, atr, entries, exits, multiplier, stops, highest)
+    else:
+        _path_scalar(price, atr, entries, exits, multiplier, stops, highest)
+
+    if one_symbol:
+        return np.flatnonzero(stops[:, 0]), highest[:, 0]
+    return np.nonzero(stops), highest
+
+def _path_scalar(price, atr, entries, exits, multiplier, stops, highest):
+    # Plain loops so numba can compile it as-is; also the fallback for a few symbols
+    n_bars, n_symbols = price.shape
+    for j in range(n_symbols):
+        held = False
+        high = math.nan
+        for t in range(n_bars):
+            p = price[t, j]
+            if math.isnan(p):
+                if held:
+                    highest[t, j] = high
+                continue
+            if held:
+                if p > high:
+                    high = p
+                highest[t, j] = high
+                if p < high - atr[t, j] * multiplier:
+                    stops[t, j] = True
+                    held = False
+                elif exits[t, j]:
+                    held = False
+            elif entries[t, j]:
+                held = True
+                high = p
+                highest[t, j] = p
+
+def _path_cross_section(price, atr, entries, exits, multiplier, stops, highest):
+    # Steps through time once, every symbol at a time
+    n_symbols = price.shape[1]
+    held = np.zeros(n_symbols, dtype=bool)
+    high = np.full(n_symbols, np.nan)
+    for t in range(len(price)):
+        p = price[t]
+        active = ~np.isnan(p)
+        tracked = held & active
+        high, hits = ratchet(p, atr[t], tracked, high, multiplier)
+        stops[t] = hits
+        closing = tracked & (hits | exits[t])
+        opening = active & ~held & entries[t]
+        high = np.where(opening, p, high)
+        highest[t] = np.where(held | opening, high, np.nan)
+        held = (held & ~closing) | opening
+        high = np.where(closing, np.nan, high)
+
+_compiled_path = njit(cache=True, nogil=True)(_path_scalar) if njit is not None else None
@@ -1,69 +1,96 @@
 import pandas as pd
 import numpy as np
+from compact import FLOAT_DTYPE, SIGNAL_DTYPE
+from rules import Override, Rule, ScoringRules, prev
+from sentiment_panel import SESSION_CLOSE, sentiment_for_bars
 
 class BaseStrategy:
     def generate_signals(self, df, news_df=None):
         raise NotImplementedError
 
-class AdvancedPatternStrategy(BaseStrategy):
-    def generate_signals(self, df, news_df=None):
-        """
-        Generates signals based on a multi-factor scoring system.
-        """
-        df = df.copy()
-        df['Signal'] = 0
-        df['Score'] = 0
-        
+def pattern_rules(buy_threshold=2, sell_threshold=0, rsi_oversold=30, rsi_overbought=70):
+    """
+    The multi-factor scoring rules of AdvancedPatternStrategy (see rules.py).
+    """
+    return ScoringRules([
         # 1. Trend (SMA Crossover / Alignment)
         # +3 if SMA 20 > SMA 50 AND Close > SMA 20 (Strong Uptrend)
         # +2 if SMA 20 > SMA 50 (Uptrend)
-        df.loc[df['SMA_20'] > df['SMA_50'], 'Score'] += 2
-        df.loc[(df['SMA_20'] > df['SMA_50']) & (df['Close'] > df['SMA_20']), 'Score'] += 1
-        
+        Rule(2, ('SMA_20', '>', 'SMA_50')),
+        Rule(1, ('SMA_20', '>', 'SMA_50'), ('Close', '>', 'SMA_20')),
+
         # 2. Momentum (RSI)
         # +2 if RSI < 30 (Oversold - Reversal Buy)
         # +1 if RSI > 50 and RSI < 70 (Healthy Bullish Momentum)
         # -2 if RSI > 70 (Overbought - Reversal Sell)
-        df.loc[df['RSI'] < 30, 'Score'] += 2
-        df.loc[(df['RSI'] > 50) & (df['RSI'] < 70), 'Score'] += 1
-        df.loc[df['RSI'] > 70, 'Score'] -= 2
-        
+        Rule(2, ('RSI', '<', rsi_oversold)),
+        Rule(1, ('RSI', '>', 50), ('RSI', '<', rsi_overbought)),
+        Rule(-2, ('RSI', '>', rsi_overbought)),
+
         # 3. Momentum (MACD)
         # +1 if MACD > Signal (Bullish Momentum)
-        df.loc[df['MACD'] > df['MACD_Signal'], 'Score'] += 1
-        
+        Rule(1, ('MACD', '>', 'MACD_Signal')),
+
         # 4. Volatility (Bollinger Bands)
         # +2 if Close < BB_Low (Oversold/Dip Buy)
-        df.loc[df['Close'] < df['BB_Low'], 'Score'] += 2
-        
+        Rule(2, ('Close', '<', 'BB_Low')),
+
         # 5. Candlestick Patterns
         # +2 for Bullish Engulfing
         # +1 for Hammer
-        if 'Bullish_Engulfing' in df.columns:
-            df.loc[df['Bullish_Engulfing'], 'Score'] += 2
-        if 'Hammer' in df.columns:
-            df.loc[df['Hammer'], 'Score'] += 1
+        Rule(2, 'Bullish_Engulfing', optional=True),
+        Rule(1, 'Hammer', optional=True),
+
+        # 6. Sentiment (only when news was given)
+        # +2 for Positive Sentiment, -2 for Negative
+        Rule(2, ('Sentiment', '>', 0.1), optional=True),
+        Rule(-2, ('Sentiment', '<', -0.1), optional=True),
+    ],
+    # Decision Threshold
+    # Buy if Score >= 2 (Aggressive Entry - Catch all trends)
+    # Sell if Score <= 0 (Weakness)
+    buy_threshold, sell_threshold,
+    overrides=[
+        # Force Sell on Death Cross (Trend Reversal)
+        Override(-1, ('SMA_20', '<', 'SMA_50'), (prev('SMA_20'), '>=', prev('SMA_50'))),
+    ])
+
+class AdvancedPatternStrategy(BaseStrategy):
+    def __init__(self, buy_threshold=2, sell_threshold=0, rsi_oversold=30, rsi_overbought=70):
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.rsi_oversold = rsi_oversold
+        self.rsi_overbought = rsi_overbought
+        self.rules = pattern_rules(buy_threshold, sell_threshold, rsi_oversold, rsi_overbought)
+
+    def generate_signals(self, df, news_df=None, compact=False, sentiment=None):
+        """
+        Generates signals based on a multi-factor scoring system (pattern_rules).
+        compact=True works on df in place and stores Signal/Score as int8 (see compact.py).
+        sentiment: per-bar sentiment already joined to df (e.g. SentimentPanel.join),
+        used instead of news_df.
+        """
+        if compact:
+            df['Signal'] = np.zeros(len(df), dtype=SIGNAL_DTYPE)
+            df['Score'] = np.zeros(len(df), dtype=SIGNAL_DTYPE)
+        else:
+            df = df.copy()
+            df['Signal'] = 0
+            df['Score'] = 0
             
         # Sentiment Integration
-        if news_df is not None and not news_df.empty:
+        has_news = sentiment is not None or (news_df is not None and not news_df.empty)
+        if has_news:
             print("Applying sentiment filter...")
-            daily_sentiment = news_df.groupby('Date')['Sentiment'].mean()
-            df['Sentiment'] = df.index.map(daily_sentiment)
-            df['Sentiment'] = df['Sentiment'].fillna(method='ffill').fillna(0)
-            
-            # +2 for Positive Sentiment, -2 for Negative
-            df.loc[df['Sentiment'] > 0.1, 'Score'] += 2
-            df.loc[df['Sentiment'] < -0.1, 'Score'] -= 2
+            if sentiment is None:
+                # As-of join: news counts for the first bar day on or after its date (after the close: the next one), then carries forward
+                sentiment = sentiment_for_bars(news_df, df.index, session_close=SESSION_CLOSE)
+            df['Sentiment'] = np.asarray(sentiment, dtype=FLOAT_DTYPE if compact else np.float64)
 
-        # Decision Threshold
-        # Buy if Score >= 2 (Aggressive Entry - Catch all trends)
-        # Sell if Score <= 0 (Weakness)
-        
-        df.loc[df['Score'] >= 2, 'Signal'] = 1
-        df.loc[df['Score'] <= 0, 'Signal'] = -1
-        
-        # Force Sell on Death Cross (Trend Reversal)
-        death_cross = (df['SMA_20'] < df['SMA_50']) & (df['SMA_20'].shift(1) >= df['SMA_50'].shift(1))
-        df.loc[death_cross, 'Signal'] = -1
+        # All rules, thresholds and the death-cross override in one evaluation
+        score, signal = self.rules.score_frame(df, unavailable=() if has_news else ('Sentiment',))
+        dtype = SIGNAL_DTYPE if compact else score.dtype
+        df['Score'] = score.astype(dtype)
+        df['Signal'] = signal.astype(dtype)
         
         return df
@@ -0,0 +1,283 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from compact import FLOAT_DTYPE
+from panel import MarketPanel
+from sentiment_panel import SESSION_CLOSE, SentimentPanel, bar_calendar
+from strategy import AdvancedPatternStrategy
+
+# Columns AdvancedPatternStrategy and Backtester read
+SWEEP_COLUMNS = ('Open', 'High', 'Low', 'Close', 'SMA_20', 'SMA_50', 'RSI', 'MACD', 'MACD_Signal',
+                 'BB_Low', 'ATR', 'Bullish_Engulfing', 'Hammer')
+BOOL_COLUMNS = {'Bullish_Engulfing': bool, 'Hammer': bool}
+# Optional per-bar sentiment (see load_universe); without it the sentiment rules are skipped
+SENTIMENT_COLUMN = 'Sentiment'
+
+BACKTESTER_PARAMS = ('trailing_stop_atr_multiplier', 'allocation_pct', 'min_trade_size')
+STRATEGY_PARAMS = ('buy_threshold', 'sell_threshold', 'rsi_oversold', 'rsi_overbought')
+
+def load_universe(symbols, start_date, end_date, warmup_days=90, interval='1d', compact=False,
+                  with_news=False, news_offline=False, sentiment_backend='vader'):
+    """
+    Fetches and prepares every symbol once (indicators + patterns, including warmup bars).
+    interval and compact are as in run_pipeline. with_news adds a Sentiment column joined from
+    one universe-wide SentimentPanel (news_offline: archived headlines only), so the sentiment
+    rules score exactly as in main's backtest.
+    """
+    from data_loader import fetch_stock_data
+    from technical_analysis import add_technical_indicators, detect_candlestick_patterns
+
+    warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=warmup_days)).strftime('%Y-%m-%d')
+    data_dict = {}
+    for symbol in symbols:
+        df = fetch_stock_data(symbol, warmup_start, end_date, interval=interval)
+        if df.empty:
+            print(f"No data for {symbol}, skipping.")
+            continue
+        data_dict[symbol] = detect_candlestick_patterns(add_technical_indicators(df, compact), compact)
+
+    if with_news and data_dict:
+        panel = _sentiment_panel(data_dict, start_date, end_date, news_offline, sentiment_backend)
+        for symbol, df in data_dict.items():
+            sentiment = panel.join(symbol, df.index).to_numpy()
+            df['Sentiment'] = sentiment.astype(FLOAT_DTYPE) if compact else sentiment
+    return data_dict
+
+def _sentiment_panel(data_dict, start_date, end_date, offline, backend):
+    # Every symbol's headlines scored in one batch, then aggregated on the universe's bar sessions
+    from data_loader import fetch_news
+    from sentiment_analyzer import score_headlines
+
+    calendar = bar_calendar(data_dict)
+    if offline:
+        return SentimentPanel.from_archive(list(data_dict), start_date, end_date, calendar, backend=backend,
+                                           session_close=SESSION_CLOSE)
+    news = pd.concat([fetch_news(symbol, start_date, end_date).assign(symbol=symbol) for symbol in data_dict],
+                     ignore_index=True)
+    if news.empty:
+        return SentimentPanel.from_news({}, calendar, symbols=list(data_dict))
+    news['Sentiment'] = score_headlines(news['title'], backend=backend).to_numpy()
+    return SentimentPanel.from_news(news, calendar, symbols=list(data_dict), session_close=SESSION_CLOSE)
+
+def universe_columns(data_dict):
+    """
+    Panel fields for a prepared universe: SWEEP_COLUMNS, plus Sentiment when it was loaded with news.
+    """
+    has_sentiment = any(SENTIMENT_COLUMN in df.columns for df in data_dict.values())
+    return SWEEP_COLUMNS + ((SENTIMENT_COLUMN,) if has_sentiment else ())
+
+def grid_space(grid):
+    """
+    Expands {param: [values]} into every combination.
+    """
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def random_space(space, n_samples, seed=0):
+    """
+    Samples n_samples configurations. Each entry of space is either a list of choices
+    or a (low, high) tuple sampled uniformly (integers if both bounds are ints).
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n_samples):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = rng.uniform(low, high)
+            else:
+                config[name] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+def run_sweep(data, configs, start_date, end_date=None, initial_capital=50000, processes=None, rank_by='Return (%)'):
+    """
+    Runs one Backtester pass per configuration across a process pool.
+
+    The prepared universe (or the saved panel at that path) is memory-mapped by every
+    worker at startup, so each task only ships its parameter dict.
+    Returns a DataFrame of parameters + get_performance_metrics, best first.
+    """
+    for config in configs:
+        unknown = set(config) - set(BACKTESTER_PARAMS) - set(STRATEGY_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    processes = processes or os.cpu_count()
+    chunksize = max(1, len(configs) // (processes * 4))
+    with shared_universe(data, start_date=start_date, end_date=end_date, initial_capital=initial_capital) as meta:
+        print(f"Sweeping {len(configs)} configurations over {len(meta['symbols'])} symbols with {processes} workers...")
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(meta,)) as pool:
+            results = list(pool.map(_run_config, configs, chunksize=chunksize))
+
+    results_df = pd.DataFrame(results)
+    if not results_df.empty and rank_by in results_df.columns:
+        results_df = results_df.sort_values(rank_by, ascending=False, kind='stable').reset_index(drop=True)
+        results_df.index += 1
+        results_df.index.name = 'Rank'
+    return results_df
+
+@contextmanager
+def shared_universe(data, **extra):
+    """
+    Makes the prepared universe available to worker processes as a read-only, memory-mapped
+    MarketPanel on disk. `data` is either {symbol: prepared df}, written to a temporary panel
+    for the lifetime of the block, or the path of a panel saved earlier (see prepare_panel).
+    Workers map the same file, so the universe lives once in the page cache however many
+    workers run. Yields the metadata (plus `extra`) that init_worker needs.
+    """
+    temp_dir = None
+    if isinstance(data, str):
+        path = data
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='stocksagent_panel_')
+        path = os.path.join(temp_dir, 'universe')
+        MarketPanel.from_frames(data, columns=universe_columns(data)).save(path)
+    try:
+        panel = MarketPanel.open(path)
+        missing = set(SWEEP_COLUMNS) - set(panel.fields)
+        if missing:
+            raise ValueError(f"Panel at {path} lacks columns: {sorted(missing)}")
+        yield {'panel_path': path, 'symbols': panel.symbols, **extra}
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+def prepare_panel(symbols, start_date, end_date, path, **options):
+    """
+    Reuses the panel saved at `path` if it was built for the same symbols, dates and
+    load_universe options; otherwise builds it with load_universe and saves it there.
+    Returns the path, or None when no symbol has data.
+    """
+    build = json.loads(json.dumps({'symbols': list(symbols), 'start_date': start_date, 'end_date': end_date, **options}))
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        saved = MarketPanel.read_meta(path).get('build')
+        if saved == build:
+            print(f"Using saved panel {path} (delete it to re-fetch)")
+            return path
+        print(f"Saved panel {path} was built for other symbols, dates or options; rebuilding it")
+    data_dict = load_universe(symbols, start_date, end_date, **options)
+    if not data_dict:
+        return None
+    MarketPanel.from_frames(data_dict, columns=universe_columns(data_dict)).save(path, build=build)
+    print(f"Saved panel to {path}")
+    return path
+
+# Per-worker state, filled once by init_worker (the pool initializer, also used by walk_forward.py)
+_worker = {}
+
+# Signal arrays kept per worker (one int8 byte per date x symbol each)
+SIGNAL_CACHE_SIZE = 64
+
+def init_worker(meta):
+    _worker['panel'] = MarketPanel.open(meta['panel_path'])
+    _worker['meta'] = meta
+    _worker['signals'] = {} # {strategy params: int8 signal array (dates x symbols)}
+
+def _signal_array(strategy_params):
+    """
+    Full-history signals for one strategy configuration, computed once per worker.
+    Configurations that only differ in Backtester knobs or date range share them.
+    Each symbol's frame is built from the mapped panel only while its signals are computed.
+    """
+    key = tuple(sorted(strategy_params.items()))
+    signals = _worker['signals'].get(key)
+    if signals is None:
+        panel = _worker['panel']
+        strategy = AdvancedPatternStrategy(**strategy_params)
+        signals = np.zeros(panel.present.shape, dtype=np.int8)
+        fields = SWEEP_COLUMNS + tuple(c for c in (SENTIMENT_COLUMN,) if c in panel.fields)
+        for j, symbol in enumerate(panel.symbols):
+            rows = np.flatnonzero(panel.present[:, j])
+            frame = panel.frame(symbol, fields=fields, dtypes=BOOL_COLUMNS)
+            df = strategy.generate_signals(frame, sentiment=frame.get(SENTIMENT_COLUMN))
+            signals[rows, j] = df['Signal'].to_numpy()
+
+        if len(_worker['signals']) >= SIGNAL_CACHE_SIZE:
+            _worker['signals'].pop(next(iter(_worker['signals'])))
+        _worker['signals'][key] = signals
+    return signals
+
+def run_backtest(config, start_date, end_date, initial_capital):
+    """
+    Runs one configuration over [start_date, end_date] in a worker set up by init_worker.
+    Returns (metrics, history_df).
+    """
+    strategy_params = {k: v for k, v in config.items() if k in STRATEGY_PARAMS}
+    backtester_params = {k: v for k, v in config.items() if k in BACKTESTER_PARAMS}
+
+    # Date slices of the mapped panel are views: nothing is copied per task
+    panel = _worker['panel']
+    signals = _signal_array(strategy_params)
+    rows = panel.dates.slice_indexer(start_date, end_date)
+    window = MarketPanel(panel.dates[rows], panel.symbols,
+                         {'Close': panel['Close'][rows], 'Signal': signals[rows], 'ATR': panel['ATR'][rows]},
+                         panel.present[rows])
+
+    backtester = Backtester(initial_capital=initial_capital, engine='vectorized', verbose=False, **backtester_params)
+    history_df, _ = backtester.run(window)
+    return backtester.get_performance_metrics(history_df), history_df
+
+def _run_config(config):
+    meta = _worker['meta']
+    metrics, _ = run_backtest(config, meta['start_date'], meta['end_date'], meta['initial_capital'])
+    return {**config, **metrics}
+
+def parse_param(text):
+    """
+    'name=1,2,3' -> list of choices, 'name=1.5:4.0' -> (low, high) range for random search.
+    """
+    name, values = text.split('=', 1)
+
+    def number(v):
+        return int(v) if v.lstrip('-').isdigit() else float(v)
+
+    if ':' in values:
+        low, high = values.split(':', 1)
+        return name, (number(low), number(high))
+    return name, [number(v) for v in values.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep for AdvancedPatternStrategy + Backtester")
+    parser.add_argument('--symbols', type=str, default='AAPL,GOOGL,MSFT,AMZN,TSLA,NVDA,META,NFLX', help="Comma-separated stock symbols")
+    parser.add_argument('--start', type=str, default='2023-01-01', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('--end', type=str, default='2023-06-01', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--param', action='append', default=[], help="name=v1,v2,... (grid) or name=low:high (random)")
+    parser.add_argument('--random', type=int, default=0, help="Sample N random configurations instead of the full grid")
+    parser.add_argument('--processes', type=int, default=0, help="Worker processes (0 for all cores)")
+    parser.add_argument('--top', type=int, default=20, help="Rows of the ranked table to print")
+    parser.add_argument('--panel', type=str, default='', help="Reuse (or build and keep) the prepared universe at this directory")
+    args = parser.parse_args()
+
+    space = dict(parse_param(p) for p in args.param)
+    if not space:
+        space = {'trailing_stop_atr_multiplier': [2.0, 3.0, 4.0, 5.0], 'buy_threshold': [2, 3, 4]}
+    configs = random_space(space, args.random) if args.random else grid_space(space)
+
+    if args.panel:
+        data = prepare_panel(args.symbols.split(','), args.start, args.end, args.panel)
+    else:
+        data = load_universe(args.symbols.split(','), args.start, args.end)
+    if not data:
+        print("No valid data found for any stock.")
+        return
+
+    results = run_sweep(data, configs, args.start, args.end, processes=args.processes or None)
+    print(results.head(args.top).to_string())
+
+if __name__ == "__main__":
+    main()
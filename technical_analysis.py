@@ -1,76 +1,213 @@
+import numpy as np
 import pandas as pd
 from ta.trend import SMAIndicator, MACD
 from ta.momentum import RSIIndicator, StochasticOscillator
 from ta.volatility import BollingerBands, AverageTrueRange
+from compact import FLOAT_DTYPE, PRICE_COLUMNS
+from patterns import LOOKBACK, has_pattern, pattern_mask
 
-def add_technical_indicators(df):
+def add_technical_indicators(df, compact=False):
     """
     Adds technical indicators to the dataframe.
+    compact=True returns a new frame with only OHLC and the indicators read downstream,
+    stored as float32 without copying the input (see compact.py for the tolerance).
     """
-    df = df.copy()
+    if compact:
+        out = pd.DataFrame({c: df[c].astype(FLOAT_DTYPE) for c in PRICE_COLUMNS}, index=df.index)
+    else:
+        out = df.copy()
+
+    def store(name, values):
+        out[name] = values.astype(FLOAT_DTYPE) if compact else values
     
     # SMA
-    df['SMA_20'] = SMAIndicator(close=df['Close'], window=20).sma_indicator()
-    df['SMA_50'] = SMAIndicator(close=df['Close'], window=50).sma_indicator()
+    store('SMA_20', SMAIndicator(close=df['Close'], window=20).sma_indicator())
+    store('SMA_50', SMAIndicator(close=df['Close'], window=50).sma_indicator())
     
     # RSI
-    df['RSI'] = RSIIndicator(close=df['Close'], window=14).rsi()
+    store('RSI', RSIIndicator(close=df['Close'], window=14).rsi())
     
     # MACD
     macd = MACD(close=df['Close'])
-    df['MACD'] = macd.macd()
-    df['MACD_Signal'] = macd.macd_signal()
+    store('MACD', macd.macd())
+    store('MACD_Signal', macd.macd_signal())
     
     # Bollinger Bands
     bb = BollingerBands(close=df['Close'], window=20, window_dev=2)
-    df['BB_High'] = bb.bollinger_hband()
-    df['BB_Low'] = bb.bollinger_lband()
+    if not compact: # BB_High is never read downstream
+        store('BB_High', bb.bollinger_hband())
+    store('BB_Low', bb.bollinger_lband())
     
-    # Stochastic Oscillator
-    stoch = StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'], window=14, smooth_window=3)
-    df['Stoch_K'] = stoch.stoch()
-    df['Stoch_D'] = stoch.stoch_signal()
+    # Stochastic Oscillator (display only; not read downstream)
+    if not compact:
+        stoch = StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'], window=14, smooth_window=3)
+        store('Stoch_K', stoch.stoch())
+        store('Stoch_D', stoch.stoch_signal())
     
     # ATR (Average True Range) for Volatility-based Stops
     atr = AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'], window=14)
-    df['ATR'] = atr.average_true_range()
+    store('ATR', atr.average_true_range())
     
-    return df
+    return out
 
-def detect_candlestick_patterns(df):
+def detect_candlestick_patterns(df, compact=False):
     """
-    Detects simple candlestick patterns.
+    Detects candlestick patterns (see patterns.PATTERNS for the catalog).
+    All patterns are stored as one packed bitmask column, 'Patterns'; the two the strategy
+    scores, Bullish_Engulfing and Hammer, are also kept as bool columns.
+    compact=True adds the columns to df in place instead of copying it.
     """
-    df = df.copy()
-    
-    # Bullish Engulfing
-    # Previous candle red, Current candle green
-    # Current Open < Prev Close AND Current Close > Prev Open
-    df['Bullish_Engulfing'] = (
-        (df['Close'].shift(1) < df['Open'].shift(1)) & # Prev Red
-        (df['Close'] > df['Open']) & # Curr Green
-        (df['Open'] < df['Close'].shift(1)) & # Open lower than prev close
-        (df['Close'] > df['Open'].shift(1))   # Close higher than prev open
-    )
-    
-    # Hammer
-    # Small body, long lower wick, short/no upper wick
-    # (High - Low) > 3 * (Open - Close) (Body is small)
-    # (Close - Low) / (.001 + High - Low) > 0.6 (Long lower wick)
-    # (High - Close) / (.001 + High - Low) < 0.1 (Small upper wick)
-    # Green Hammer: Close > Open
-    body = (df['Close'] - df['Open']).abs()
-    range_len = df['High'] - df['Low']
-    lower_wick = df[['Open', 'Close']].min(axis=1) - df['Low']
-    upper_wick = df['High'] - df[['Open', 'Close']].max(axis=1)
-    
-    df['Hammer'] = (
-        (lower_wick > 2 * body) & 
-        (upper_wick < body)
-    )
-    
+    if not compact:
+        df = df.copy()
+
+    mask = pattern_mask(df)
+    df['Patterns'] = mask
+    df['Bullish_Engulfing'] = has_pattern(mask, 'bullish_engulfing')
+    df['Hammer'] = has_pattern(mask, 'hammer')
+
     return df
 
+class ChunkedIndicators:
+    """
+    add_technical_indicators over time-ordered chunks of one symbol's bars, for histories
+    too long to hold at once (e.g. years of 1-minute bars).
+
+    Rolling indicators (SMA, Bollinger Bands, Stochastic) are computed with `ta` on the chunk
+    plus the last HISTORY bars of the previous one; the recursive ones (RSI, MACD, ATR) carry
+    their smoothing state across chunks. Memory is bounded by the chunk size, and the output
+    matches add_technical_indicators on the whole history (exactly for the recursive
+    indicators, to rolling-sum rounding for the others).
+    """
+    HISTORY = 50 # Longest rolling window (SMA_50)
+    RSI_WINDOW = 14
+    MACD_FAST, MACD_SLOW, MACD_SIGN = 12, 26, 9
+    ATR_WINDOW = 14
+
+    def __init__(self, compact=False):
+        self.compact = compact
+        self.n = 0 # Bars seen so far
+        self.tail = None # Last HISTORY input bars
+        self.ema = {} # {'up', 'down', 'fast', 'slow', 'signal': last smoothed value}
+        self.atr = 0.0
+        self.true_ranges = [] # True ranges of the first ATR window
+
+    def update(self, chunk):
+        """
+        Returns the chunk with indicator columns, like add_technical_indicators(chunk, compact)
+        would if it had seen every earlier chunk.
+        """
+        if chunk.empty:
+            return chunk
+        prefix = 0 if self.tail is None else len(self.tail)
+        data = chunk if self.tail is None else pd.concat([self.tail, chunk])
+        position = np.arange(self.n - prefix, self.n - prefix + len(data)) # Bar number in the whole history
+        close = data['Close']
+
+        if self.compact:
+            out = pd.DataFrame({c: chunk[c].astype(FLOAT_DTYPE) for c in PRICE_COLUMNS}, index=chunk.index)
+        else:
+            out = chunk.copy()
+
+        def store(name, values):
+            values = values.iloc[prefix:] if isinstance(values, pd.Series) else pd.Series(values[prefix:], index=chunk.index)
+            out[name] = values.astype(FLOAT_DTYPE) if self.compact else values
+
+        store('SMA_20', SMAIndicator(close=close, window=20).sma_indicator())
+        store('SMA_50', SMAIndicator(close=close, window=50).sma_indicator())
+
+        # RSI: Wilder smoothing of up/down moves (the first bar's move counts as zero)
+        diff = close.diff(1)
+        up = self._smooth('up', diff.where(diff > 0, 0.0), alpha=1 / self.RSI_WINDOW, prefix=prefix)
+        down = self._smooth('down', -diff.where(diff < 0, 0.0), alpha=1 / self.RSI_WINDOW, prefix=prefix)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+        rsi = np.where(position >= self.RSI_WINDOW - 1, rsi, np.nan)
+        store('RSI', rsi)
+
+        # MACD: EMAs seeded with the first close; the signal line starts at the first full MACD
+        fast = self._smooth('fast', close, span=self.MACD_FAST, prefix=prefix)
+        slow = self._smooth('slow', close, span=self.MACD_SLOW, prefix=prefix)
+        macd = np.where(position >= self.MACD_SLOW - 1, fast - slow, np.nan)
+        signal = self._smooth('signal', pd.Series(macd, index=data.index), span=self.MACD_SIGN, prefix=prefix)
+        store('MACD', macd)
+        store('MACD_Signal', np.where(position >= self.MACD_SLOW + self.MACD_SIGN - 2, signal, np.nan))
+
+        bb = BollingerBands(close=close, window=20, window_dev=2)
+        if not self.compact:
+            store('BB_High', bb.bollinger_hband())
+        store('BB_Low', bb.bollinger_lband())
+
+        if not self.compact:
+            stoch = StochasticOscillator(high=data['High'], low=data['Low'], close=close, window=14, smooth_window=3)
+            store('Stoch_K', stoch.stoch())
+            store('Stoch_D', stoch.stoch_signal())
+
+        store('ATR', self._atr(data, prefix))
+
+        self.n += len(chunk)
+        self.tail = data.iloc[-self.HISTORY:]
+        return out
+
+    def _smooth(self, key, values, prefix, alpha=None, span=None):
+        """
+        Continues an adjust=False EWM from its last value: seeding the recursion with that value
+        reproduces exactly what the EWM over the whole history computes. Returns values for data rows.
+        """
+        new = values.iloc[prefix:]
+        previous = self.ema.get(key)
+        if previous is not None:
+            new = pd.concat([pd.Series([previous]), pd.Series(new.to_numpy())])
+        smoothed = new.ewm(alpha=alpha, span=span, adjust=False).mean().to_numpy()
+        if previous is not None:
+            smoothed = smoothed[1:]
+        if len(smoothed) and not np.isnan(smoothed[-1]):
+            self.ema[key] = smoothed[-1]
+        return np.concatenate([np.full(prefix, np.nan), smoothed])
+
+    def _atr(self, data, prefix):
+        """
+        Same recurrence as ta's AverageTrueRange (zero until the first full window).
+        """
+        high, low, close = data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy()
+        prev_close = np.concatenate([[np.nan], close[:-1]])
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        window = self.ATR_WINDOW
+        atr = np.zeros(len(data))
+        value = self.atr
+        for i in range(prefix, len(data)):
+            n = self.n + i - prefix
+            if n < window - 1:
+                self.true_ranges.append(true_range[i])
+            elif n == window - 1:
+                self.true_ranges.append(true_range[i])
+                value = np.mean(self.true_ranges)
+                atr[i] = value
+            else:
+                value = (value * (window - 1) + true_range[i]) / float(window)
+                atr[i] = value
+        self.atr = value
+        return atr
+
+def indicator_chunks(chunks, compact=False):
+    """
+    Streams indicators + candlestick patterns over time-ordered chunks of one symbol's bars.
+    Yields one processed frame per non-empty chunk.
+    """
+    indicators = ChunkedIndicators(compact)
+    previous = None # Last processed bars, for the patterns that look back up to LOOKBACK bars
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        df = indicators.update(chunk)
+        overlap = 0 if previous is None else len(previous)
+        if overlap:
+            df = pd.concat([previous[df.columns], df])
+        df = detect_candlestick_patterns(df, compact).iloc[overlap:]
+        # A chunk shorter than LOOKBACK keeps the tail of the earlier bars too
+        previous = df.iloc[-LOOKBACK:] if previous is None else pd.concat([previous, df]).iloc[-LOOKBACK:]
+        yield df
+
 if __name__ == "__main__":
     # Mock data for testing
     data = {'Close': [100, 101, 102, 103, 102, 101, 100, 99, 98, 99, 100, 102, 105, 108, 110]}
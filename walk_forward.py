@@ -0,0 +1,167 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from backtester import Backtester
+from sweep import (BACKTESTER_PARAMS, STRATEGY_PARAMS, load_universe, grid_space, prepare_panel, shared_universe,
+                   init_worker, run_backtest, parse_param)
+
+def make_windows(start_date, end_date, train_days=365, test_days=90, step_days=None, anchored=False):
+    """
+    Splits [start_date, end_date] into consecutive train/test windows.
+
+    Rolling windows keep a fixed train length and slide by step_days (default test_days);
+    anchored windows keep train_start fixed and grow the training period instead.
+    Test periods of successive windows do not overlap when step_days >= test_days.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    step = pd.Timedelta(days=step_days or test_days)
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+
+    windows = []
+    train_start = start
+    test_start = start + train
+    while test_start < end:
+        test_end = min(test_start + test - pd.Timedelta(days=1), end)
+        windows.append({
+            'window': len(windows) + 1,
+            'train_start': train_start.strftime('%Y-%m-%d'),
+            'train_end': (test_start - pd.Timedelta(days=1)).strftime('%Y-%m-%d'),
+            'test_start': test_start.strftime('%Y-%m-%d'),
+            'test_end': test_end.strftime('%Y-%m-%d'),
+        })
+        test_start += step
+        if not anchored:
+            train_start += step
+    return windows
+
+def walk_forward(data, windows, configs=None, initial_capital=50000, processes=None, rank_by='Return (%)'):
+    """
+    Runs every window in parallel worker processes sharing one prepared universe
+    ({symbol: df}, or the path of a saved panel, see sweep.shared_universe).
+
+    With several configs, each window picks the best config on its train period (by rank_by)
+    and evaluates only that config on its test period, i.e. a walk-forward optimisation.
+    A single config has nothing to pick, so train periods are not backtested (no Train columns).
+    Returns (report DataFrame, one row per window; stitched out-of-sample equity DataFrame).
+    """
+    configs = configs or [{}]
+    for config in configs:
+        unknown = set(config) - set(BACKTESTER_PARAMS) - set(STRATEGY_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown walk-forward parameters: {sorted(unknown)}")
+
+    processes = processes or os.cpu_count()
+    with shared_universe(data) as meta:
+        print(f"Walk-forward over {len(windows)} windows x {len(configs)} configurations "
+              f"on {len(meta['symbols'])} symbols with {processes} workers...")
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(meta,)) as pool:
+            if len(configs) == 1:
+                chosen = [(configs[0], {})] * len(windows)
+            else:
+                # 1. In-sample: every config on every train period
+                train_tasks = [(w['train_start'], w['train_end'], config, initial_capital, False) for w in windows for config in configs]
+                train_results = list(pool.map(_run_window, train_tasks, chunksize=max(1, len(train_tasks) // (processes * 4))))
+
+                # 2. Pick each window's best config
+                chosen = []
+                for i, window in enumerate(windows):
+                    results = train_results[i * len(configs):(i + 1) * len(configs)]
+                    best = max(range(len(configs)), key=lambda k: results[k][0].get(rank_by, float('-inf')))
+                    chosen.append((configs[best], results[best][0]))
+
+            # 3. Out-of-sample: the chosen config on each test period
+            test_tasks = [(w['test_start'], w['test_end'], config, initial_capital, True) for w, (config, _) in zip(windows, chosen)]
+            test_results = list(pool.map(_run_window, test_tasks))
+
+    rows, curves = [], []
+    for window, (config, train_metrics), (test_metrics, history_df) in zip(windows, chosen, test_results):
+        row = dict(window)
+        row.update(config)
+        row.update({f'Train {k}': v for k, v in train_metrics.items()})
+        row.update({f'Test {k}': v for k, v in test_metrics.items()})
+        rows.append(row)
+        curves.append(history_df)
+
+    report = pd.DataFrame(rows).set_index('window')
+    return report, stitch_equity(curves, initial_capital)
+
+def stitch_equity(curves, initial_capital):
+    """
+    Chains per-window test equity curves into one compounded out-of-sample curve:
+    each window is rescaled to start from the value the previous window ended at.
+    """
+    pieces = []
+    value = initial_capital
+    for window, history_df in enumerate(curves, start=1):
+        if history_df.empty:
+            continue
+        scaled = history_df[['Portfolio Value']] * (value / initial_capital)
+        scaled['Window'] = window
+        value = scaled['Portfolio Value'].iloc[-1]
+        pieces.append(scaled)
+    if not pieces:
+        return pd.DataFrame(columns=['Portfolio Value', 'Window'])
+    equity = pd.concat(pieces)
+    return equity[~equity.index.duplicated(keep='last')]
+
+def summarize(equity, initial_capital):
+    """
+    get_performance_metrics over the stitched curve (trade count is per window, so omitted).
+    """
+    metrics = Backtester(initial_capital=initial_capital, verbose=False).get_performance_metrics(equity)
+    metrics.pop('Total Trades', None)
+    return metrics
+
+def _run_window(task):
+    start_date, end_date, config, initial_capital, keep_history = task
+    metrics, history_df = run_backtest(config, start_date, end_date, initial_capital)
+    return metrics, (history_df if keep_history else None)
+
+def print_report(report, equity, initial_capital):
+    columns = ['train_start', 'test_start', 'test_end'] + [c for c in report.columns if c in BACKTESTER_PARAMS or c in STRATEGY_PARAMS]
+    columns += [c for c in ('Train Return (%)', 'Test Return (%)', 'Test Max Drawdown (%)', 'Test Total Trades') if c in report.columns]
+    print("\n--- Walk-Forward Windows ---")
+    print(report[columns].to_string())
+
+    print("\n--- Out-of-Sample (stitched) ---")
+    for k, v in summarize(equity, initial_capital).items():
+        print(f"{k}: {v}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of AdvancedPatternStrategy")
+    parser.add_argument('--symbols', type=str, default='AAPL,GOOGL,MSFT,AMZN,TSLA,NVDA,META,NFLX', help="Comma-separated stock symbols")
+    parser.add_argument('--start', type=str, default='2019-01-01', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('--end', type=str, default='2024-01-01', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--train-days', type=int, default=365, help="Training period length in calendar days")
+    parser.add_argument('--test-days', type=int, default=90, help="Test period length in calendar days")
+    parser.add_argument('--step-days', type=int, default=0, help="Window step in days (0 = test length)")
+    parser.add_argument('--anchored', action='store_true', help="Grow the training period from --start instead of rolling it")
+    parser.add_argument('--param', action='append', default=[], help="name=v1,v2,... grid optimised on each train period")
+    parser.add_argument('--processes', type=int, default=0, help="Worker processes (0 for all cores)")
+    parser.add_argument('--panel', type=str, default='', help="Reuse (or build and keep) the prepared universe at this directory")
+    parser.add_argument('--output', type=str, default='', help="Write the window report to this CSV")
+    args = parser.parse_args()
+
+    configs = grid_space(dict(parse_param(p) for p in args.param)) if args.param else None
+    windows = make_windows(args.start, args.end, args.train_days, args.test_days, args.step_days or None, args.anchored)
+    if not windows:
+        print("History too short for one train + test window.")
+        return
+
+    if args.panel:
+        data = prepare_panel(args.symbols.split(','), args.start, args.end, args.panel)
+    else:
+        data = load_universe(args.symbols.split(','), args.start, args.end)
+    if not data:
+        print("No valid data found for any stock.")
+        return
+
+    report, equity = walk_forward(data, windows, configs, processes=args.processes or None)
+    print_report(report, equity, 50000)
+    if args.output:
+        report.to_csv(args.output)
+        print(f"\nWindow report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()